@@ -232,11 +232,12 @@ class FilterWalker(NodeWalker):
         return node.result
 
     def walk_ASTQuery(self, node, children):
-        mfilter = {'$and': [
+        filters = [
             subnode.result
             for subnode in node.val
             if subnode.name == 'filter'
-        ]}
+        ]
+        mfilter = {'$and': filters} if filters else {}
 
         start, stop = self.resolve_slices([
             subnode
@@ -244,7 +245,10 @@ class FilterWalker(NodeWalker):
             if subnode.name == 'slice'
         ])
 
-        grouping = node.val[-1] if node.val[-1].name == 'group' else None
+        grouping = None
+
+        if node.val and node.val[-1].name == 'group':
+            grouping = node.val[-1]
 
         if grouping is not None:
             match_stage = {
@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+
+from link.reqi.request.groupby import getcombiner
+
+
+GROUP_OPERATOR_MAP = {
+    'count': '$sum',
+    'sum': '$sum',
+    'min': '$min',
+    'max': '$max',
+    'mean': '$avg',
+    'first': '$first',
+    'last': '$last'
+}
+
+
+class GroupTranslator(object):
+    """Translate a group-by pushed down by a read to aggregation stages."""
+
+    def translate(self, groupby, aggregates):
+        groupid = dict(
+            (field, '${0}'.format(field)) for field in groupby
+        )
+        group = {'_id': groupid}
+        project = {'_id': 0}
+
+        for field in groupby:
+            project[field] = '$_id.{0}'.format(field)
+
+        for name, combiner, field in aggregates:
+            group[name] = self.resolve(
+                getattr(combiner, 'name', combiner), field
+            )
+            project[name] = 1
+
+        return [{'$group': group}, {'$project': project}]
+
+    def resolve(self, combiner, field):
+        operator = GROUP_OPERATOR_MAP[combiner]
+
+        if combiner == 'count':
+            if field is None:
+                return {operator: 1}
+
+            # null and missing values are lower than other values
+            return {
+                operator: {
+                    '$cond': [{'$gt': ['${0}'.format(field), None]}, 1, 0]
+                }
+            }
+
+        return {operator: '${0}'.format(field)}
+
+    def partial(self, aggregates):
+        group = {'_id': None}
+
+        for name, combiner, field in aggregates:
+            combiner = getattr(combiner, 'name', combiner)
+
+            if combiner == 'mean':
+                group[name] = self.resolve('sum', field)
+                group['{0}_count'.format(name)] = self.resolve('count', field)
+
+            else:
+                group[name] = self.resolve(combiner, field)
+
+        return [{'$group': group}]
+
+    def states(self, aggregates, doc):
+        states = {}
+
+        for name, combiner, field in aggregates:
+            cname = getattr(combiner, 'name', combiner)
+
+            if doc is None:
+                states[name] = getcombiner(combiner).init()
+
+            elif cname == 'mean':
+                states[name] = doc[name], doc['{0}_count'.format(name)]
+
+            elif cname in ['first', 'last']:
+                states[name] = (doc[name],)
+
+            else:
+                states[name] = doc[name]
+
+        return states
@@ -54,11 +54,11 @@ class UpdateWalker(NodeWalker):
     def walk_ASTAssign(self, node, children, assignmentsByProp):
         left, right = node.val
 
-        assignmentsByProp[left.val] = right.val
+        assignmentsByProp[left.val] = right
 
     def walk_ASTInsert(self, node, children, assignmentsByProp):
         node.result = {
-            prop: self.resolve_expression(expr)
+            prop: self.resolve_expression(expr, assignmentsByProp)
             for prop, expr in assignmentsByProp.items()
         }
 
@@ -66,7 +66,7 @@ class UpdateWalker(NodeWalker):
 
     def walk_ASTUpdate(self, node, children, assignmentsByProp):
         doc = {
-            prop: self.resolve_expression(expr)
+            prop: self.resolve_expression(expr, assignmentsByProp)
             for prop, expr in assignmentsByProp.items()
         }
 
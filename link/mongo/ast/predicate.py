@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+
+from link.reqi.request.expr.base import Expression
+
+
+PREDICATE_OPERATOR_MAP = {
+    'lt': '$lt',
+    'lte': '$lte',
+    'eq': '$eq',
+    'ne': '$ne',
+    'gte': '$gte',
+    'gt': '$gt',
+    'regex': '$regex',
+    'in': '$in'
+}
+
+JOIN_OPERATOR_MAP = {
+    'and': '$and',
+    'or': '$or'
+}
+
+REVERSED_OPERATOR_MAP = {
+    '$lt': '$gt',
+    '$lte': '$gte',
+    '$eq': '$eq',
+    '$ne': '$ne',
+    '$gte': '$lte',
+    '$gt': '$lt'
+}
+
+
+class PredicateTranslator(object):
+    """Translate predicates pushed down by a request plan to a mongo filter."""
+
+    def translate(self, nodes):
+        filters = [self.resolve(node) for node in nodes]
+
+        if len(filters) == 1:
+            return filters[0]
+
+        return {'$and': filters}
+
+    def resolve(self, node):
+        if node.opname in JOIN_OPERATOR_MAP:
+            return {
+                JOIN_OPERATOR_MAP[node.opname]: [
+                    self.resolve(param) for param in node.params
+                ]
+            }
+
+        operator = PREDICATE_OPERATOR_MAP[node.opname]
+        left, right = node.params[:2]
+
+        if operator == '$regex':
+            if isinstance(right, Expression):
+                raise ValueError('Regex pattern must be a value')
+
+        elif operator == '$in':
+            return {left.prop: {operator: list(right)}}
+
+        elif not isinstance(left, Expression):
+            left, right = right, left
+            operator = REVERSED_OPERATOR_MAP[operator]
+
+        if isinstance(right, Expression):
+            fields = ['${0}'.format(left.prop), '${0}'.format(right.prop)]
+
+            return {'$expr': {operator: fields}}
+
+        return {left.prop: {operator: right}}
@@ -0,0 +1,38 @@
+# -*- coding: utf-8 -*-
+
+from bson.son import SON
+
+
+NULL_FIELD = '_null{0}'  #: name of the field flagging null sort values.
+
+
+class SortTranslator(object):
+    """Translate a sort pushed down by a read to aggregation stages.
+
+    Null and missing values are sorted last in both directions, such as in
+    memory."""
+
+    def translate(self, sort, skip=None, limit=None):
+        nulls = {}
+        order = SON()
+
+        for index, (field, direction) in enumerate(sort):
+            name = NULL_FIELD.format(index)
+
+            nulls[name] = {
+                '$cond': [{'$gt': ['${0}'.format(field), None]}, 0, 1]
+            }
+            order[name] = 1
+            order[field] = direction
+
+        result = [{'$addFields': nulls}, {'$sort': order}]
+
+        if skip:
+            result.append({'$skip': skip})
+
+        if limit is not None:
+            result.append({'$limit': limit})
+
+        result.append({'$project': dict((name, 0) for name in nulls)})
+
+        return result
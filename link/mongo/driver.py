@@ -5,12 +5,16 @@ from link.dbrequest.driver import Driver
 
 from link.mongo.ast.insert import UpdateWalker
 from link.mongo.ast.filter import FilterWalker
+from link.mongo.ast.predicate import PredicateTranslator
+from link.mongo.ast.group import GroupTranslator
+from link.mongo.ast.sort import SortTranslator
 from link.mongo.model import MongoCursor
 
 
 class MongoQueryDriver(Driver):
 
     cursor_class = MongoCursor
+    raw = True  #: read documents lazily (see MongoStorage.find)
 
     def __init__(self, *args, **kwargs):
         super(MongoQueryDriver, self).__init__(*args, **kwargs)
@@ -18,6 +22,9 @@ class MongoQueryDriver(Driver):
         self.mbuilder = ModelBuilder()
         self.wfilter = FilterWalker()
         self.wupdate = UpdateWalker()
+        self.tpredicate = PredicateTranslator()
+        self.tgroup = GroupTranslator()
+        self.tsort = SortTranslator()
 
     def process_query(self, query):
         if query['type'] == Driver.QUERY_CREATE:
@@ -41,12 +48,65 @@ class MongoQueryDriver(Driver):
                 else:
                     aggregation = True
 
+            predicates = query.get('predicates')
+
+            if predicates:
+                pfilter = self.tpredicate.translate(predicates)
+
+                if aggregation:
+                    result.insert(0, {'$match': pfilter})
+
+                elif mfilter:
+                    mfilter = {'$and': [mfilter, pfilter]}
+
+                else:
+                    mfilter = pfilter
+
+            group = query.get('group')
+            sort = query.get('sort')
+
+            if (group or sort) and not aggregation:
+                result = [{'$match': mfilter}] if mfilter else []
+
+                if s.start:
+                    result.append({'$skip': s.start})
+
+                if s.stop:
+                    result.append({'$limit': s.stop})
+
+                aggregation = True
+
+            if group:
+                if group.get('partial'):
+                    result += self.tgroup.partial(group['aggregates'])
+
+                else:
+                    result += self.tgroup.translate(
+                        group['groupby'], group['aggregates']
+                    )
+
+            if sort:
+                result += self.tsort.translate(
+                    sort, skip=query.get('skip'), limit=query.get('limit')
+                )
+
             if not aggregation:
-                result = self.obj.find(mfilter, skip=s.start, limit=s.stop)
+                result = self.obj.find(
+                    mfilter, skip=s.start, limit=s.stop, raw=self.raw
+                )
 
             else:
                 result = self.obj.aggregate(result)
 
+            if group and group.get('partial'):
+                docs = list(result)
+
+                result = [
+                    self.tgroup.states(
+                        group['aggregates'], docs[0] if docs else None
+                    )
+                ]
+
             if query['type'] == Driver.QUERY_COUNT:
                 result = result.count()
 
@@ -70,3 +130,41 @@ class MongoQueryDriver(Driver):
             result = self.obj.delete(mfilter, multi=True)
 
             return result.deleted_count
+
+    def process_writes(self, queries, ordered=False, counts=False):
+        """Process several create, update and delete queries with bulk
+        writes instead of one round trip per query.
+
+        Systems give their create, update and delete nodes to this method
+        (see link.reqi.sys.System.write).
+
+        Returns one result per query (see MongoStorage.bulk).
+        """
+
+        ops = [self.write_op(query) for query in queries]
+
+        return self.obj.bulk(ops, ordered=ordered, counts=counts)
+
+    def write_op(self, query):
+        if query['type'] == Driver.QUERY_CREATE:
+            ast = AST('insert', query['update'])
+            doc = self.wupdate.walk(self.mbuilder.parse(ast), {})
+
+            return ('insert', doc)
+
+        elif query['type'] == Driver.QUERY_UPDATE:
+            filter_ast = AST('query', query['filter'])
+            update_ast = AST('update', query['update'])
+
+            mfilter, _ = self.wfilter.walk(self.mbuilder.parse(filter_ast))
+            uspec = self.wupdate.walk(self.mbuilder.parse(update_ast), {})
+
+            return ('update', mfilter, uspec, True)
+
+        elif query['type'] == Driver.QUERY_DELETE:
+            ast = AST('query', query['filter'])
+            mfilter, _ = self.wfilter.walk(self.mbuilder.parse(ast))
+
+            return ('delete', mfilter, True)
+
+        raise ValueError('Not a write query: {0}'.format(query['type']))
@@ -1,11 +1,109 @@
 # -*- coding: utf-8 -*-
 
-from link.dbrequest.model import Cursor
+from link.dbrequest.model import Model, Cursor
 
 from pymongo.command_cursor import CommandCursor
+from bson.raw_bson import RawBSONDocument
 from bson import json_util
+
+from six import string_types, integer_types
 import json
 
+try:
+    from collections.abc import Mapping, MutableMapping
+
+except ImportError:
+    from collections import Mapping, MutableMapping
+
+
+JSON_TYPES = string_types + integer_types + (float, bool, type(None))
+
+
+def to_json(value):
+    """Convert a BSON value to a JSON compatible value.
+
+    Only extended types (ObjectId, datetime, Decimal128, ...) are converted
+    with json_util, as json_util.dumps would do, without serializing the
+    whole document.
+    """
+
+    if isinstance(value, JSON_TYPES):
+        return value
+
+    elif isinstance(value, RawBSONDocument):
+        return LazyDocument(value)
+
+    elif isinstance(value, Mapping):
+        return dict((key, to_json(value[key])) for key in value)
+
+    elif isinstance(value, (list, tuple)):
+        return [to_json(item) for item in value]
+
+    return to_json(json_util.default(value))
+
+
+class LazyDocument(MutableMapping):
+    """View on a RawBSONDocument which converts fields when they are read.
+
+    The whole document is converted on the first write, so that the raw
+    document is never modified. Pickled documents are dicts.
+    """
+
+    __slots__ = ('_raw', '_fields')
+
+    def __init__(self, raw, *args, **kwargs):
+        super(LazyDocument, self).__init__(*args, **kwargs)
+
+        self._raw = raw
+        self._fields = {}
+
+    def __getitem__(self, key):
+        if self._raw is not None and key not in self._fields:
+            self._fields[key] = to_json(self._raw[key])
+
+        return self._fields[key]
+
+    def __setitem__(self, key, value):
+        self._decode()
+        self._fields[key] = value
+
+    def __delitem__(self, key):
+        self._decode()
+        del self._fields[key]
+
+    def __iter__(self):
+        return iter(self._fields if self._raw is None else self._raw)
+
+    def __len__(self):
+        return len(self._fields if self._raw is None else self._raw)
+
+    def __reduce__(self):
+        return dict, (dict(self),)
+
+    def __repr__(self):
+        return 'LazyDocument({0})'.format(dict(self))
+
+    def _decode(self):
+        """Convert all fields and release the raw document."""
+
+        if self._raw is not None:
+            for key in self._raw:
+                self[key]
+
+            self._raw = None
+
+
+class MongoModel(Model):
+    """Model which serializes lazy documents."""
+
+    __slots__ = ()
+
+    def __str__(self):
+        return json.dumps(self.data, default=dict)
+
+    def __repr__(self):
+        return 'Model({0})'.format(self)
+
 
 class MongoCursor(Cursor):
 
@@ -14,8 +112,8 @@ class MongoCursor(Cursor):
     def __init__(self, *args, **kwargs):
         super(MongoCursor, self).__init__(*args, **kwargs)
 
-        if isinstance(self.cursor, CommandCursor):
-            self._result = list(self.cursor)
+        if isinstance(self.cursor, (CommandCursor, list)):
+            self._result = [self.to_model(doc) for doc in self.cursor]
             self._iterator = iter(self._result)
 
         else:
@@ -23,10 +121,7 @@ class MongoCursor(Cursor):
             self._iterator = None
 
     def to_model(self, doc):
-        jsondoc = json_util.dumps(doc)
-        doc = json.loads(jsondoc)
-
-        return super(MongoCursor, self).to_model(doc)
+        return MongoModel(self.driver, to_json(doc))
 
     def __iter__(self):
         if self._result is not None:
@@ -6,7 +6,15 @@ from link.feature import addfeatures
 
 from link.mongo.driver import MongoQueryDriver
 
-from pymongo import MongoClient
+from pymongo import (
+    MongoClient, InsertOne, UpdateOne, UpdateMany, DeleteOne, DeleteMany
+)
+from pymongo.errors import BulkWriteError
+from bson.codec_options import CodecOptions
+from bson.raw_bson import RawBSONDocument
+
+
+BULK_CHUNKSIZE = 1000
 
 
 @register_middleware
@@ -72,6 +80,10 @@ class MongoStorage(ConnectableMiddleware):
     def _disconnect(self, conn):
         del self._database
         del self._collection
+
+        if hasattr(self, '_raw_collection'):
+            del self._raw_collection
+
         del conn
 
     def _isconnected(self, conn):
@@ -94,8 +106,21 @@ class MongoStorage(ConnectableMiddleware):
 
         return docs
 
-    def find(self, mfilter, skip=None, limit=None):
-        result = self.collection.find(mfilter)
+    @property
+    def raw_collection(self):
+        """Collection which returns RawBSONDocument documents, decoded
+        lazily by MongoCursor."""
+
+        if not hasattr(self, '_raw_collection'):
+            self._raw_collection = self.collection.with_options(
+                codec_options=CodecOptions(document_class=RawBSONDocument)
+            )
+
+        return self._raw_collection
+
+    def find(self, mfilter, skip=None, limit=None, raw=False):
+        collection = self.raw_collection if raw else self.collection
+        result = collection.find(mfilter)
 
         if skip is not None:
             result = result.skip(skip)
@@ -128,3 +153,120 @@ class MongoStorage(ConnectableMiddleware):
 
     def aggregate(self, pipeline):
         return self.collection.aggregate(pipeline)
+
+    def bulk(
+        self, ops, ordered=False, chunksize=BULK_CHUNKSIZE, counts=False
+    ):
+        """Execute mixed write operations with bulk writes.
+
+        Operations are tuples:
+
+        - ('insert', doc)
+        - ('update', mfilter, spec[, multi=True])
+        - ('delete', mfilter[, multi=True])
+
+        Operations are sent by chunks of chunksize operations. In ordered
+        mode, operations after the first failing one are not executed.
+
+        bulk_write only counts matched, modified and deleted documents of a
+        whole chunk, so updates and deletes are not counted by default. If
+        counts is True, a chunk ends after each update or delete operation,
+        so that its counts are the ones of this operation, at the cost of
+        one round trip per update or delete.
+
+        Returns one result per operation, a dict with 'ok' (bool), 'error'
+        (error message or None), '_id' for inserted documents, 'matched'
+        and 'modified' for counted updates and 'deleted' for counted
+        deletes.
+        """
+
+        results = [{'ok': True, 'error': None} for _ in ops]
+        failed = False
+
+        for start, stop in _bulkchunks(ops, chunksize, counts):
+            chunk = results[start:stop]
+
+            if failed:
+                for result in chunk:
+                    result.update(ok=False, error='skipped')
+
+                continue
+
+            requests = [self._bulkrequest(op) for op in ops[start:stop]]
+
+            try:
+                details = self.collection.bulk_write(
+                    requests, ordered=ordered
+                ).bulk_api_result
+
+            except BulkWriteError as err:
+                details = err.details
+
+            errors = details.get('writeErrors', [])
+
+            for error in errors:
+                chunk[error['index']].update(
+                    ok=False, error=error.get('errmsg')
+                )
+
+            if ordered and errors:
+                failed = True
+
+                for result in chunk[errors[0]['index'] + 1:]:
+                    result.update(ok=False, error='skipped')
+
+            kind = ops[stop - 1][0]
+
+            if counts and kind != 'insert' and chunk[-1]['ok']:
+                if kind == 'update':
+                    chunk[-1].update(
+                        matched=details.get('nMatched', 0),
+                        modified=details.get('nModified', 0)
+                    )
+
+                else:
+                    chunk[-1]['deleted'] = details.get('nRemoved', 0)
+
+        for op, result in zip(ops, results):
+            if op[0] == 'insert' and result['ok']:
+                result['_id'] = op[1].get('_id')
+
+        return results
+
+    def _bulkrequest(self, op):
+        kind = op[0]
+
+        if kind == 'insert':
+            return InsertOne(op[1])
+
+        multi = op[-1] if len(op) > (3 if kind == 'update' else 2) else True
+
+        if kind == 'update':
+            cls = UpdateMany if multi else UpdateOne
+            return cls(op[1], op[2])
+
+        elif kind == 'delete':
+            cls = DeleteMany if multi else DeleteOne
+            return cls(op[1])
+
+        raise ValueError('Unknown bulk operation {0}'.format(kind))
+
+
+def _bulkchunks(ops, chunksize, counts):
+    """Get (start, stop) bounds of bulk write chunks.
+
+    A chunk has at most chunksize operations, and ends after an update or a
+    delete if counts is True.
+    """
+
+    start = 0
+
+    for index, op in enumerate(ops):
+        stop = index + 1
+
+        if stop - start >= chunksize or (counts and op[0] != 'insert'):
+            yield start, stop
+            start = stop
+
+    if start < len(ops):
+        yield start, len(ops)
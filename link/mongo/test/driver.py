@@ -0,0 +1,141 @@
+# -*- coding: utf-8 -*-
+
+from unittest import main
+
+from b3j0f.utils.ut import UTCase
+
+from mongomock import MongoClient
+
+from link.dbrequest.assignment import A
+from link.dbrequest.ast import AST
+from link.dbrequest.comparison import C
+from link.dbrequest.driver import Driver
+
+from link.mongo.driver import MongoQueryDriver
+from link.mongo.storage import MongoStorage
+
+
+class ProcessWritesTest(UTCase):
+    """Check that write queries are sent with bulk writes."""
+
+    def setUp(self):
+        self.storage = MongoStorage.__new__(MongoStorage)  # not connected
+        self.storage._conn = None
+        self.storage._collection = MongoClient().db.schema
+
+        self.driver = MongoQueryDriver(self.storage)
+
+    def test_writes(self):
+        results = self.driver.process_writes([
+            {
+                'type': Driver.QUERY_CREATE,
+                'update': [A('v', 1).get_ast(), A('w', 1).get_ast()]
+            },
+            {'type': Driver.QUERY_CREATE, 'update': [A('v', 2).get_ast()]},
+            {
+                'type': Driver.QUERY_UPDATE,
+                'filter': [AST('filter', (C('v') == 1).get_ast())],
+                'update': [A('v', 3).get_ast(), A('w', unset=True).get_ast()]
+            }
+        ], counts=True)
+
+        self.assertTrue(all(result['ok'] for result in results))
+        self.assertEqual(results[2]['matched'], 1)
+        self.assertEqual(
+            sorted(
+                doc['v'] for doc in self.storage.collection.find({'w': None})
+            ),
+            [2, 3]
+        )
+
+    def test_delete(self):
+        self.storage.collection.insert_many([{'v': 1}, {'v': 2}])
+
+        results = self.driver.process_writes(
+            [{'type': Driver.QUERY_DELETE, 'filter': []}], counts=True
+        )
+
+        self.assertEqual(results[0]['deleted'], 2)
+        self.assertEqual(self.storage.collection.count_documents({}), 0)
+
+
+class PartialTest(UTCase):
+    """Check that partial groups return combiner states."""
+
+    def setUp(self):
+        self.storage = MongoStorage.__new__(MongoStorage)  # not connected
+        self.storage._conn = None
+        self.storage._collection = MongoClient().db.schema
+
+        self.driver = MongoQueryDriver(self.storage)
+
+    def read(self):
+        return self.driver.process_query({
+            'type': Driver.QUERY_READ,
+            'filter': [],
+            'group': {
+                'groupby': [],
+                'partial': True,
+                'aggregates': [('s', 'sum', 'v'), ('m', 'mean', 'v')]
+            }
+        })
+
+    def test_states(self):
+        self.storage.collection.insert_many([{'v': 1}, {'v': 2}])
+
+        self.assertEqual(self.read(), [{'s': 3, 'm': (3, 2)}])
+
+    def test_empty(self):
+        self.assertEqual(self.read(), [{'s': 0, 'm': (0, 0)}])
+
+
+class SortTest(UTCase):
+    """Check that sorts are read with aggregation stages."""
+
+    def setUp(self):
+        self.storage = MongoStorage.__new__(MongoStorage)  # not connected
+        self.storage._conn = None
+        self.storage._collection = MongoClient().db.schema
+        self.storage.collection.insert_many(
+            [{'v': value} for value in [2, None, 1, 3]] + [{}]
+        )
+
+        self.pipelines = []
+        aggregate = self.storage.aggregate
+
+        def record(pipeline):
+            self.pipelines.append(pipeline)
+
+            return aggregate(pipeline)
+
+        self.storage.aggregate = record
+
+        self.driver = MongoQueryDriver(self.storage)
+
+    def read(self, direction, skip=None, limit=None):
+        result = self.driver.process_query({
+            'type': Driver.QUERY_READ,
+            'filter': [],
+            'sort': [('v', direction)],
+            'skip': skip,
+            'limit': limit
+        })
+
+        return [doc.get('v') for doc in result]
+
+    def test_sort(self):
+        self.assertEqual(self.read(1), [1, 2, 3, None, None])
+        self.assertEqual(self.read(-1), [3, 2, 1, None, None])
+
+    def test_page(self):
+        self.assertEqual(self.read(-1, skip=1, limit=2), [2, 1])
+
+        stages = [list(stage)[0] for stage in self.pipelines[0]]
+
+        self.assertEqual(
+            stages, ['$addFields', '$sort', '$skip', '$limit', '$project']
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+
+from unittest import main
+
+from b3j0f.utils.ut import UTCase
+
+from mongomock import MongoClient
+
+from link.reqi.request.groupby import getcombiner
+
+from link.mongo.ast.group import GroupTranslator
+
+
+class GroupTranslatorTest(UTCase):
+    """Check that partial states read with a $group stage are the states of
+    in memory combiners."""
+
+    def setUp(self):
+        self.values = [3, 1, None, 2]
+
+        self.collection = MongoClient().db.schema
+        self.collection.insert_many(
+            [{'v': value} for value in self.values]
+        )
+
+        self.translator = GroupTranslator()
+        self.aggregates = [
+            (name, name, 'v')
+            for name in ['count', 'sum', 'min', 'max', 'mean']
+        ]
+
+    def test_partial(self):
+        stages = self.translator.partial(self.aggregates)
+        doc = list(self.collection.aggregate(stages))[0]
+
+        states = self.translator.states(self.aggregates, doc)
+
+        for name, combiner, _ in self.aggregates:
+            combiner = getcombiner(combiner)
+            state = combiner.init()
+
+            for value in self.values:
+                state = combiner.add(state, value)
+
+            self.assertEqual(
+                combiner.result(states[name]), combiner.result(state)
+            )
+
+    def test_missing(self):
+        self.collection.insert_one({})
+
+        stages = self.translator.partial([('count', 'count', 'v')])
+        doc = list(self.collection.aggregate(stages))[0]
+
+        self.assertEqual(doc['count'], 3)
+
+    def test_empty(self):
+        states = self.translator.states(self.aggregates, None)
+
+        self.assertEqual(states['count'], 0)
+        self.assertEqual(states['mean'], (0, 0))
+        self.assertIsNone(states['min'])
+
+
+if __name__ == '__main__':
+    main()
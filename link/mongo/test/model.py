@@ -0,0 +1,138 @@
+# -*- coding: utf-8 -*-
+
+from unittest import main
+
+from b3j0f.utils.ut import UTCase
+
+from bson import encode, json_util
+from bson.decimal128 import Decimal128
+from bson.objectid import ObjectId
+from bson.raw_bson import RawBSONDocument
+
+from datetime import datetime
+
+from six.moves.cPickle import dumps, loads
+import json
+
+from link.mongo.driver import MongoQueryDriver
+from link.mongo.model import LazyDocument, MongoCursor, to_json
+
+
+DOC = {
+    '_id': ObjectId('5f0c6a4e8e1b2c3d4e5f6a7b'),
+    'name': u'doc',
+    'count': 3,
+    'ratio': 0.5,
+    'flag': True,
+    'none': None,
+    'date': datetime(2016, 1, 2, 3, 4, 5),
+    'price': Decimal128('1.10'),
+    'data': b'bytes',
+    'tags': [u'a', {'id': ObjectId('5f0c6a4e8e1b2c3d4e5f6a7c')}],
+    'nested': {'n': 1, 'deep': {'date': datetime(2016, 1, 2)}}
+}
+
+
+class ToJSONTest(UTCase):
+    """Check that conversions match the json_util round trip."""
+
+    def roundtrip(self):
+        return json.loads(json_util.dumps(DOC))
+
+    def test_to_json(self):
+        self.assertEqual(to_json(DOC), self.roundtrip())
+
+    def test_raw(self):
+        doc = to_json(RawBSONDocument(encode(DOC)))
+
+        self.assertIsInstance(doc, LazyDocument)
+        self.assertEqual(doc, self.roundtrip())
+
+
+class LazyDocumentTest(UTCase):
+
+    def setUp(self):
+        self.raw = RawBSONDocument(encode(DOC))
+        self.doc = LazyDocument(self.raw)
+
+    def test_lazy(self):
+        self.assertEqual(self.doc['count'], 3)
+        self.assertEqual(list(self.doc._fields), ['count'])
+        self.assertEqual(len(self.doc), len(DOC))
+
+    def test_write(self):
+        self.doc['count'] = 4
+        self.doc['new'] = 5
+        del self.doc['none']
+
+        self.assertIsNone(self.doc._raw)
+        self.assertEqual(self.doc['count'], 4)
+        self.assertEqual(self.doc['new'], 5)
+        self.assertNotIn('none', self.doc)
+        self.assertEqual(self.raw['count'], 3)
+        self.assertEqual(len(self.doc), len(DOC))
+
+    def test_nested(self):
+        self.doc['nested']['n'] = 2
+
+        self.assertEqual(self.doc['nested']['n'], 2)
+        self.assertEqual(self.raw['nested']['n'], 1)
+
+    def test_pickle(self):
+        doc = loads(dumps(self.doc))
+
+        self.assertIs(type(doc), dict)
+        self.assertIs(type(doc['nested']), dict)
+        self.assertEqual(doc, to_json(DOC))
+
+
+class RawCursor(object):
+
+    def __init__(self, docs):
+        self.docs = iter(docs)
+
+    def next(self):
+        return next(self.docs)
+
+
+class RawFind(object):
+    """Storage which returns raw documents."""
+
+    def __init__(self):
+        self.raws = []
+
+    def find(self, mfilter, skip=None, limit=None, raw=False):
+        self.raws.append(raw)
+
+        return RawCursor([RawBSONDocument(encode(DOC))])
+
+
+class MongoCursorTest(UTCase):
+
+    def setUp(self):
+        self.storage = RawFind()
+        self.driver = MongoQueryDriver(self.storage)
+
+    def read(self):
+        return self.driver.process_query(
+            {'type': MongoQueryDriver.QUERY_READ, 'filter': []}
+        )
+
+    def test_raw(self):
+        self.read()
+
+        self.assertEqual(self.storage.raws, [True])
+
+    def test_model(self):
+        model = next(MongoCursor(self.driver, self.read()))
+
+        model['count'] = 4
+        model.flag = False
+
+        self.assertEqual(model['count'], 4)
+        self.assertFalse(model['flag'])
+        self.assertEqual(json.loads(str(model))['name'], 'doc')
+
+
+if __name__ == '__main__':
+    main()
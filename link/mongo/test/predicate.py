@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+
+from unittest import main
+
+from b3j0f.utils.ut import UTCase
+
+from mongomock import MongoClient
+
+from link.reqi.request.expr.base import Expression
+from link.reqi.request.expr.group import And
+from link.reqi.request.expr.num import LT, LTE, EQ, NEQ, GT, GTE
+
+from link.mongo.ast.predicate import PredicateTranslator
+
+
+class PredicateTranslatorTest(UTCase):
+    """Check that pushed down predicates and in memory predicates keep the
+    same items."""
+
+    def setUp(self):
+        self.rows = [
+            {'_id': index, 'x': index, 'y': 9 - index}
+            for index in range(10)
+        ]
+        self.rows.append({'_id': 10, 'y': 1})
+
+        self.collection = MongoClient().db.schema
+        self.collection.insert_many([dict(row) for row in self.rows])
+
+        self.translator = PredicateTranslator()
+        self.x = Expression(schema='schema', prop='x')
+        self.y = Expression(schema='schema', prop='y')
+
+    def pushed(self, predicates):
+        mfilter = self.translator.translate(predicates)
+
+        return sorted(doc['_id'] for doc in self.collection.find(mfilter))
+
+    def inmemory(self, predicates):
+        ctx = {'schema': [dict(row) for row in self.rows]}
+
+        for predicate in predicates:
+            predicate._run(dispatcher=None, ctx=ctx)
+
+        return sorted(row['_id'] for row in ctx['schema'])
+
+    def assertsame(self, *predicates):
+        predicates = list(predicates)
+
+        self.assertEqual(self.pushed(predicates), self.inmemory(predicates))
+
+    def test_comparisons(self):
+        for cls in (LT, LTE, EQ, NEQ, GT, GTE):
+            self.assertsame(cls(params=[self.x, 5]))
+
+    def test_reversed(self):
+        self.assertsame(LT(params=[5, self.x]))
+
+    def test_conjunction(self):
+        self.assertsame(LT(params=[self.x, 5]), GT(params=[self.x, 2]))
+
+        self.assertEqual(
+            self.pushed([LT(params=[self.x, 5]), GT(params=[self.x, 2])]),
+            [3, 4]
+        )
+
+    def test_expressions(self):
+        self.rows.pop()  # mongomock $expr fails on missing fields
+        self.collection.delete_one({'_id': 10})
+
+        self.assertsame(GT(params=[self.x, self.y]))
+
+    def test_and(self):
+        node = And(params=[LT(params=[self.x, 5]), GT(params=[self.x, 2])])
+
+        self.assertEqual(self.pushed([node]), [3, 4])
+
+
+if __name__ == '__main__':
+    main()
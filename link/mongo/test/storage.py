@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+
+from unittest import main
+
+from b3j0f.utils.ut import UTCase
+
+from mongomock import MongoClient
+
+from link.mongo.storage import MongoStorage
+
+
+class BulkCollection(object):
+    """Collection which counts bulk writes."""
+
+    def __init__(self, collection):
+        self.collection = collection
+        self.calls = 0
+
+    def bulk_write(self, requests, ordered=True):
+        self.calls += 1
+
+        return self.collection.bulk_write(requests, ordered=ordered)
+
+
+class BulkTest(UTCase):
+    """Check per operation results of bulk writes."""
+
+    def setUp(self):
+        self.collection = BulkCollection(MongoClient().db.schema)
+
+        self.storage = MongoStorage.__new__(MongoStorage)  # not connected
+        self.storage._conn = None
+        self.storage._collection = self.collection
+
+    def ops(self):
+        return [
+            ('insert', {'_id': 0, 'v': 0}),
+            ('insert', {'_id': 1, 'v': 1}),
+            ('update', {}, {'$set': {'v': 1}}),
+            ('insert', {'_id': 2, 'v': 2}),
+            ('delete', {'v': 1})
+        ]
+
+    def test_counts(self):
+        results = self.storage.bulk(self.ops(), counts=True)
+
+        self.assertEqual(
+            results,
+            [
+                {'ok': True, 'error': None, '_id': 0},
+                {'ok': True, 'error': None, '_id': 1},
+                {'ok': True, 'error': None, 'matched': 2, 'modified': 1},
+                {'ok': True, 'error': None, '_id': 2},
+                {'ok': True, 'error': None, 'deleted': 2}
+            ]
+        )
+        self.assertEqual(self.collection.calls, 2)
+        self.assertEqual(
+            list(self.collection.collection.find()), [{'_id': 2, 'v': 2}]
+        )
+
+    def test_nocounts(self):
+        results = self.storage.bulk(self.ops())
+
+        self.assertEqual(results[2], {'ok': True, 'error': None})
+        self.assertEqual(self.collection.calls, 1)
+
+    def test_chunksize(self):
+        ops = [('insert', {'_id': index}) for index in range(5)]
+
+        results = self.storage.bulk(ops, chunksize=2)
+
+        self.assertEqual(
+            [result['_id'] for result in results], list(range(5))
+        )
+        self.assertEqual(self.collection.calls, 3)
+
+    def test_ordered(self):
+        ops = self.ops()
+        ops.insert(1, ('insert', {'_id': 0}))
+
+        results = self.storage.bulk(ops, ordered=True)
+
+        self.assertEqual(
+            [result['ok'] for result in results],
+            [True, False, False, False, False, False]
+        )
+        self.assertEqual(
+            [result['error'] for result in results[2:]], ['skipped'] * 4
+        )
+        self.assertEqual(self.collection.calls, 1)
+
+    def test_unordered(self):
+        ops = self.ops()
+        ops.insert(1, ('insert', {'_id': 0}))
+
+        results = self.storage.bulk(ops)
+
+        self.assertEqual(
+            [result['ok'] for result in results],
+            [True, False, True, True, True, True]
+        )
+        self.assertEqual(self.collection.calls, 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,240 @@
+# -*- coding: utf-8 -*-
+
+# --------------------------------------------------------------------
+# The MIT License (MIT)
+#
+# Copyright (c) 2016 Jonathan Labéjof <jonathan.labejof@gmail.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+# --------------------------------------------------------------------
+
+"""Specification of the asyncio execution path (python 3.5+).
+
+Asynchronous systems implement a coroutine ``run`` method (see AsyncSystem).
+Synchronous systems are adapted in offloading their calls to a thread pool,
+so that an event loop may process many concurrent requests while systems
+wait for their backends.
+
+Plans are executed in their step order, except consecutive SYSTEM steps which
+do not read or write the same context names (see Plan.groups): their system
+calls are gathered on context copies, and their writes are merged in the step
+order."""
+
+__all__ = [
+    'AsyncSystem', 'callsystem', 'adelegate', 'arunplan', 'arunrequest',
+    'arunqueue'
+]
+
+from asyncio import gather, get_event_loop, iscoroutinefunction
+
+from functools import partial
+
+from .request.ctx import written
+from .request.plan import PLANS, SYSTEM, route
+
+
+class AsyncSystem(object):
+    """System interface with a coroutine run method."""
+
+    async def run(self, nodes, dispatcher, ctx):
+        """Run input nodes.
+
+        :param list nodes: nodes to run.
+        :param b3j0f.reqi.dispatch.Dispatcher dispatcher: dispatcher.
+        :param dict ctx: execution context.
+        :return: execution context.
+        :rtype: dict"""
+
+        raise NotImplementedError()
+
+
+async def callsystem(system, nodes, dispatcher, ctx, executor=None):
+    """Call the run method of input system.
+
+    :param system: synchronous or asynchronous system.
+    :param list nodes: nodes to run.
+    :param b3j0f.reqi.dispatch.Dispatcher dispatcher: dispatcher.
+    :param dict ctx: execution context.
+    :param concurrent.futures.Executor executor: executor where offload
+        synchronous system calls. Default is the loop default executor.
+    :return: system result.
+    """
+
+    if iscoroutinefunction(system.run):
+        result = await system.run(nodes=nodes, dispatcher=dispatcher, ctx=ctx)
+
+    else:
+        result = await get_event_loop().run_in_executor(
+            executor,
+            partial(system.run, nodes=nodes, dispatcher=dispatcher, ctx=ctx)
+        )
+
+    return result
+
+
+async def adelegate(name, nodes, dispatcher, ctx, executor=None):
+    """Asynchronous version of b3j0f.reqi.request.plan.delegate.
+
+    The cost model calls systems synchronously, so nodes given to the
+    cheapest system (see Dispatcher.runcheapest) are offloaded to the
+    executor. Asynchronous systems are awaited without cost routing.
+
+    :param str name: system name.
+    :param list nodes: nodes to delegate.
+    :param b3j0f.reqi.dispatch.Dispatcher dispatcher: dispatcher to run.
+    :param dict ctx: execution context.
+    :param concurrent.futures.Executor executor: executor where offload
+        synchronous calls.
+    :return: execution context.
+    :rtype: dict"""
+
+    runcheapest = getattr(dispatcher, 'runcheapest', None)
+    cache = getattr(dispatcher, 'cache', None)
+
+    key = None if cache is None else cache.key(name, nodes, ctx)
+
+    if cache is None or not cache.load(name, nodes, ctx, key=key):
+        prev = None if cache is None else dict(ctx)
+        system = dispatcher.systems[name]
+        cheapest, schema = route(nodes, runcheapest)
+
+        if cheapest and not iscoroutinefunction(system.run):
+            result = await get_event_loop().run_in_executor(
+                executor,
+                partial(runcheapest, nodes, schema, system=name, ctx=ctx)
+            )
+
+        else:
+            result = await callsystem(
+                system, nodes, dispatcher, ctx, executor=executor
+            )
+
+        ctx = result or ctx
+
+        if cache is not None:
+            cache.save(name, nodes, ctx, prev, key=key)
+
+    return ctx
+
+
+async def arunplan(nodes, dispatcher, ctx, cache=PLANS, executor=None):
+    """Asynchronous version of b3j0f.reqi.request.plan.runplan.
+
+    Other steps than SYSTEM steps may call systems synchronously, so they are
+    offloaded to the executor too.
+
+    :param list nodes: root nodes to execute in order.
+    :param b3j0f.reqi.dispatch.Dispatcher dispatcher: dispatcher to run.
+    :param dict ctx: execution context.
+    :param PlanCache cache: plan cache. If None, the plan is not cached.
+    :param concurrent.futures.Executor executor: executor where offload
+        synchronous calls.
+    :return: execution context.
+    :rtype: dict"""
+
+    if cache is None:
+        from .request.plan import compileplan
+        plan, walked = compileplan(nodes)
+
+    else:
+        plan, walked = cache.get(nodes)
+
+    loop = get_event_loop()
+
+    async def runstep(step, ctx):
+        ctx, torun = plan.prepare(step, walked, dispatcher, ctx)
+
+        if torun:
+            ctx = await adelegate(
+                step.system, torun, dispatcher, ctx, executor=executor
+            )
+
+        return ctx
+
+    for group in plan.groups(walked):
+
+        if group[0].kind != SYSTEM:
+            ctx = await loop.run_in_executor(
+                executor, plan.runstep, group[0], walked, dispatcher, ctx
+            )
+            continue
+
+        if len(group) == 1:
+            ctx = await runstep(group[0], ctx)
+
+        else:  # concurrent steps write in their own ctx copy
+            copies = [ctx.copy() for _ in group]
+            sctxs = await gather(
+                *[runstep(step, copy) for step, copy in zip(group, copies)]
+            )
+
+            for sctx in sctxs:
+                for name, value in written(ctx, sctx):
+                    ctx[name] = value
+
+        for step in group:
+            plan.finish(step, walked, ctx)
+
+    return ctx
+
+
+async def arunrequest(request, force=False, executor=None):
+    """Asynchronous version of b3j0f.reqi.request.core.Request.run.
+
+    :param Request request: request to run.
+    :param bool force: force running even if resctx exist already.
+    :param concurrent.futures.Executor executor: executor where offload
+        synchronous calls.
+    :rtype: dict"""
+
+    if request.incremental:  # incremental runs are synchronous
+        await get_event_loop().run_in_executor(
+            executor, partial(request.run, force=force)
+        )
+
+    elif force or not request.executed:
+        request.resctx = await arunplan(
+            nodes=request.nodes, dispatcher=request.dispatcher,
+            ctx=request.initctx(), cache=request.plans, executor=executor
+        )
+
+    return request.resctx
+
+
+async def arunqueue(queue, nodes, ctx=None, dispatcher=None, executor=None):
+    """Asynchronous version of b3j0f.reqi.request.queue.RequestQueue.run.
+
+    :param RequestQueue queue: queue where add a new request.
+    :param list nodes: nodes to process.
+    :param dict ctx: execution context.
+    :param Dispatcher dispatcher: dispatcher to use. Default is the queue
+        dispatcher.
+    :param concurrent.futures.Executor executor: executor where offload
+        synchronous calls.
+    :return: queue."""
+
+    queue.flush()
+
+    request = queue._request(nodes=nodes, ctx=ctx, dispatcher=dispatcher)
+
+    await arunrequest(request, executor=executor)
+
+    queue._record([request])
+
+    return queue
@@ -0,0 +1,426 @@
+# -*- coding: utf-8 -*-
+
+# --------------------------------------------------------------------
+# The MIT License (MIT)
+#
+# Copyright (c) 2016 Jonathan Labéjof <jonathan.labejof@gmail.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+# --------------------------------------------------------------------
+
+"""Specification of the dispatcher result cache.
+
+A result cache keeps values written by systems in execution contexts, by
+system name, normalized sub-request (the structural context names of nodes
+delegated to the system) and input values: digests of the values of read
+schemas which are already in the execution context, such as items filtered by
+previous steps. All values written by the system call are cached, such as
+schema items. Entries are evicted in LRU order beyond a number of entries and
+a byte budget, and expire after a time to live.
+
+Values are stored pickled, so that they are measured by their pickled size
+and that a hit never shares items with another request. Entries are
+invalidated when Create, Update or Delete nodes are executed on their schema.
+"""
+
+__all__ = ['ResultCache', 'CacheStats']
+
+from b3j0f.utils.version import OrderedDict
+
+from six.moves import intern
+from six.moves.cPickle import dumps, loads, PicklingError, HIGHEST_PROTOCOL
+
+from hashlib import sha1
+
+from threading import Lock
+
+from time import time
+
+from .request.base import Ref
+from .request.ctx import written
+from .request.crud import Create, Update, Delete
+from .request.utils import materialize
+
+DEFAULT_SIZE = 1024  #: default maximal number of entries.
+
+_UNKNOWN = object()  #: key which is not computed yet.
+
+
+class CacheStats(object):
+    """Result cache statistics."""
+
+    __slots__ = ['hits', 'misses', 'evictions', 'invalidations']
+
+    def __init__(self, *args, **kwargs):
+
+        super(CacheStats, self).__init__(*args, **kwargs)
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0  # entries evicted by size, budget or ttl
+        self.invalidations = 0  # entries invalidated by writes
+
+    def __repr__(self):
+
+        return 'CacheStats(hits={0}, misses={1}, evictions={2}, {3})'.format(
+            self.hits, self.misses, self.evictions,
+            'invalidations={0}'.format(self.invalidations)
+        )
+
+
+class _Entry(object):
+    """Cached system values."""
+
+    __slots__ = ['data', 'schemas', 'expires']
+
+    def __init__(self, data, schemas, expires, *args, **kwargs):
+
+        super(_Entry, self).__init__(*args, **kwargs)
+
+        self.data = data  # pickled values by ctx name
+        self.schemas = schemas  # read schema names, None if unknown
+        self.expires = expires
+
+
+class ResultCache(object):
+    """LRU cache of system results.
+
+    Results are cached only if the system wrote values in the execution
+    context, and if read input values can be pickled."""
+
+    __slots__ = [
+        'size', 'ttl', 'maxbytes', 'stats', 'clock',
+        '_entries', '_bytes', '_lock'
+    ]
+
+    def __init__(
+            self, size=DEFAULT_SIZE, ttl=None, maxbytes=None, clock=time,
+            *args, **kwargs
+    ):
+        """
+        :param int size: maximal number of entries.
+        :param float ttl: entry time to live in seconds. Default is infinite.
+        :param int maxbytes: maximal pickled size of entries. Default is
+            infinite.
+        :param clock: function which returns the current time in seconds.
+        """
+
+        super(ResultCache, self).__init__(*args, **kwargs)
+
+        self.size = size
+        self.ttl = ttl
+        self.maxbytes = maxbytes
+        self.clock = clock
+        self.stats = CacheStats()
+
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = Lock()
+
+    def __len__(self):
+
+        return len(self._entries)
+
+    @property
+    def nbytes(self):
+        """Get the pickled size of entries.
+
+        :rtype: int"""
+
+        return self._bytes
+
+    def key(self, system, nodes, ctx):
+        """Get the cache key of input nodes delegated to input system.
+
+        :param str system: system name.
+        :param list nodes: delegated nodes.
+        :param dict ctx: execution context before the system call.
+        :return: key, or None if nodes are writes (which are not cached) or
+            if input values can not be pickled.
+        :rtype: tuple"""
+
+        if any(isinstance(node, (Create, Update, Delete)) for node in nodes):
+            return None
+
+        schemas = readschemas(nodes)
+        names = sorted(ctx if schemas is None else schemas, key=str)
+        inputs = []
+
+        for name in names:
+            if name in ctx:
+                try:
+                    data = dumps(materialize(ctx[name]), HIGHEST_PROTOCOL)
+
+                except (PicklingError, TypeError, AttributeError):
+                    inputs = None
+                    break
+
+                inputs.append((intern(str(name)), sha1(data).hexdigest()))
+
+        if inputs is None:
+            result = None
+
+        else:
+            result = (
+                system, tuple(node.getctxname() for node in nodes),
+                tuple(inputs)
+            )
+
+        return result
+
+    def get(self, key):
+        """Get cached values.
+
+        :param tuple key: cache key.
+        :return: values by ctx name, or None if not cached.
+        :rtype: dict"""
+
+        with self._lock:
+            entry = self._entries.pop(key, None)
+
+            if entry is not None and entry.expires < self.clock():
+                self._bytes -= len(entry.data)
+                self.stats.evictions += 1
+                entry = None
+
+            if entry is None:
+                self.stats.misses += 1
+                result = None
+
+            else:
+                self._entries[key] = entry
+                self.stats.hits += 1
+                result = entry.data
+
+        if result is not None:
+            result = loads(result)
+
+        return result
+
+    def put(self, key, values, schemas=None):
+        """Cache values.
+
+        :param tuple key: cache key.
+        :param dict values: values by ctx name.
+        :param set schemas: read schema names. None if unknown.
+        :return: True if values are cached (they are picklable and fit in
+            the byte budget).
+        :rtype: bool"""
+
+        try:
+            data = dumps(
+                dict((name, materialize(values[name])) for name in values),
+                HIGHEST_PROTOCOL
+            )
+
+        except (PicklingError, TypeError, AttributeError):
+            data = None
+
+        result = data is not None and (
+            self.maxbytes is None or len(data) <= self.maxbytes
+        )
+
+        if result:
+            expires = float('inf') if self.ttl is None else (
+                self.clock() + self.ttl
+            )
+
+            with self._lock:
+                self._remove(key)
+                self._entries[key] = _Entry(data, schemas, expires)
+                self._bytes += len(data)
+
+                while len(self._entries) > self.size or (
+                        self.maxbytes is not None and
+                        self._bytes > self.maxbytes
+                ):
+                    _, entry = self._entries.popitem(last=False)
+                    self._bytes -= len(entry.data)
+                    self.stats.evictions += 1
+
+        return result
+
+    def _remove(self, key):
+        """Remove an entry without lock.
+
+        :rtype: bool"""
+
+        entry = self._entries.pop(key, None)
+
+        if entry is not None:
+            self._bytes -= len(entry.data)
+
+        return entry is not None
+
+    def invalidate(self, system=None, schema=None):
+        """Invalidate entries of input system and schema.
+
+        Entries with unknown schemas are invalidated by all schemas.
+
+        :param str system: system name. Default is all systems.
+        :param str schema: schema name. Default is all schemas.
+        :return: number of invalidated entries.
+        :rtype: int"""
+
+        with self._lock:
+            keys = [
+                key for key, entry in self._entries.items()
+                if (system is None or key[0] == system) and (
+                    schema is None or entry.schemas is None or
+                    schema in entry.schemas
+                )
+            ]
+
+            for key in keys:
+                self._remove(key)
+
+            self.stats.invalidations += len(keys)
+
+        return len(keys)
+
+    def clear(self):
+        """Remove all entries."""
+
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def written(self, nodes, system=None):
+        """Invalidate entries of schemas written by input nodes.
+
+        :param list nodes: executed nodes.
+        :param str system: system name where nodes are executed if known.
+        :return: True if a node is a write.
+        :rtype: bool"""
+
+        result = False
+
+        for node in nodes:
+            if isinstance(node, (Create, Update, Delete)):
+                result = True
+                self.invalidate(
+                    system=getattr(node, 'system', system), schema=node.schema
+                )
+
+        return result
+
+    def load(self, system, nodes, ctx, key=_UNKNOWN):
+        """Set cached values of input delegated nodes in ctx.
+
+        :param str system: system name.
+        :param list nodes: delegated nodes.
+        :param dict ctx: execution context.
+        :param tuple key: cache key of nodes in ctx (see key) if known.
+        :return: True if values are cached.
+        :rtype: bool"""
+
+        if key is _UNKNOWN:
+            key = self.key(system, nodes, ctx)
+
+        values = None if key is None else self.get(key)
+
+        result = values is not None
+
+        if result:
+            ctx.update(values)
+
+        return result
+
+    def save(self, system, nodes, ctx, prev, key=_UNKNOWN):
+        """Cache values written in ctx by input system for input nodes, or
+        invalidate entries if nodes are writes.
+
+        :param str system: system name.
+        :param list nodes: delegated nodes.
+        :param dict ctx: execution context after the system call.
+        :param dict prev: copy of the execution context before the system
+            call (``dict(ctx)``).
+        :param tuple key: cache key of nodes in prev (see key) if known.
+        :return: True if values are cached.
+        :rtype: bool"""
+
+        result = not self.written(nodes, system=system)
+
+        if result:
+            if key is _UNKNOWN:
+                key = self.key(system, nodes, prev)
+
+            values = dict(written(prev, ctx))
+            result = key is not None and bool(values)
+
+            if result:
+                result = self.put(key, values, readschemas(nodes))
+
+        return result
+
+    def call(self, system, nodes, ctx, run):
+        """Get values of input delegated nodes from this or from input run
+        function.
+
+        :param str system: system name.
+        :param list nodes: delegated nodes.
+        :param dict ctx: execution context.
+        :param run: function which takes the ctx and returns the ctx updated
+            by the system.
+        :return: execution context.
+        :rtype: dict"""
+
+        key = self.key(system, nodes, ctx)
+
+        if not self.load(system, nodes, ctx, key=key):
+            prev = dict(ctx)
+            ctx = run(ctx) or ctx
+            self.save(system, nodes, ctx, prev, key=key)
+
+        return ctx
+
+
+def readschemas(nodes):
+    """Get names of schemas read by input node trees.
+
+    :param list nodes: node trees.
+    :return: schema names, or None if a leaf node refers to a system
+        without schema.
+    :rtype: set"""
+
+    result = set()
+    tovisit = list(nodes)
+
+    while tovisit:
+        node = tovisit.pop()
+
+        if isinstance(node, Ref):
+            node = node.ref
+
+        schema = getattr(node, 'schema', None)
+        params = [
+            param for param in getattr(node, 'params', None) or ()
+            if hasattr(param, 'getctxname')
+        ]
+
+        if schema is not None:
+            result.add(schema)
+
+        elif getattr(node, 'system', None) is not None and not params:
+            result = None  # read all system schemas
+            break
+
+        tovisit += params
+
+    return result
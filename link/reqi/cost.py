@@ -0,0 +1,254 @@
+# -*- coding: utf-8 -*-
+
+# --------------------------------------------------------------------
+# The MIT License (MIT)
+#
+# Copyright (c) 2016 Jonathan Labéjof <jonathan.labejof@gmail.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+# --------------------------------------------------------------------
+
+"""Specification of the cost model used to choose among systems.
+
+Systems are ranked by a cost computed from their observed latency and row
+counts (exponentially weighted moving averages) and their failure rate."""
+
+__all__ = ['CostModel', 'countrows']
+
+try:
+    from collections.abc import Mapping
+
+except ImportError:
+    from collections import Mapping
+
+from threading import Lock
+
+from time import time
+
+DEFAULT_ALPHA = 0.2  #: default EWMA smoothing factor.
+DEFAULT_ROWCOST = 1e-6  #: default cost (in seconds) of one row.
+DEFAULT_FAILCOST = 10.  #: default cost (in seconds) of one failure.
+
+
+class SystemCost(object):
+    """Observed statistics of one system."""
+
+    __slots__ = ['latency', 'rows', 'failrate', 'calls', 'failures']
+
+    def __init__(self, *args, **kwargs):
+
+        super(SystemCost, self).__init__(*args, **kwargs)
+
+        self.latency = 0.  # latency EWMA in seconds
+        self.rows = 0.  # row count EWMA
+        self.failrate = 0.  # failure rate EWMA
+        self.calls = 0
+        self.failures = 0
+
+
+class CostModel(object):
+    """In charge of ranking systems by cost.
+
+    Systems without observation have a null cost in order to be tried."""
+
+    __slots__ = ['alpha', 'rowcost', 'failcost', '_costs', '_lock']
+
+    def __init__(
+            self, alpha=DEFAULT_ALPHA, rowcost=DEFAULT_ROWCOST,
+            failcost=DEFAULT_FAILCOST, *args, **kwargs
+    ):
+        """
+        :param float alpha: EWMA smoothing factor in ]0, 1].
+        :param float rowcost: cost (in seconds) of one row.
+        :param float failcost: cost (in seconds) of one failure, weighted by
+            the failure rate.
+        """
+
+        super(CostModel, self).__init__(*args, **kwargs)
+
+        self.alpha = alpha
+        self.rowcost = rowcost
+        self.failcost = failcost
+
+        self._costs = {}
+        self._lock = Lock()
+
+    def stats(self, system):
+        """Get observed statistics of input system.
+
+        :param str system: system name.
+        :rtype: SystemCost"""
+
+        with self._lock:
+            result = self._costs.get(system)
+
+            if result is None:
+                result = self._costs[system] = SystemCost()
+
+        return result
+
+    def observe(self, system, latency, rows=0):
+        """Register a successful system call.
+
+        :param str system: system name.
+        :param float latency: call latency in seconds.
+        :param int rows: number of rows returned by the call.
+        """
+
+        stats = self.stats(system)
+        alpha = self.alpha
+
+        with self._lock:
+
+            if stats.calls == stats.failures:  # first observation
+                stats.latency = latency
+                stats.rows = rows
+
+            else:
+                stats.latency += alpha * (latency - stats.latency)
+                stats.rows += alpha * (rows - stats.rows)
+
+            stats.failrate -= alpha * stats.failrate
+            stats.calls += 1
+
+    def fail(self, system):
+        """Register a failed system call.
+
+        :param str system: system name.
+        """
+
+        stats = self.stats(system)
+
+        with self._lock:
+            stats.failrate += self.alpha * (1 - stats.failrate)
+            stats.calls += 1
+            stats.failures += 1
+
+    def cost(self, system):
+        """Get the cost of input system.
+
+        :param str system: system name.
+        :rtype: float"""
+
+        stats = self.stats(system)
+
+        return (
+            stats.latency
+            + self.rowcost * stats.rows
+            + self.failcost * stats.failrate
+        )
+
+    def rank(self, systems):
+        """Sort input systems by cost. Ties keep the input order.
+
+        :param list systems: system names.
+        :rtype: list"""
+
+        return sorted(systems, key=self.cost)
+
+    def measure(self, system, func, *args, **kwargs):
+        """Call input func and register its latency, row count or failure
+        for input system.
+
+        :param str system: system name.
+        :param func: function to call with args and kwargs.
+        :return: func result.
+        """
+
+        return self._measure(system, func, args, kwargs)
+
+    def _measure(self, system, func, args, kwargs, names=None, rows=None):
+        """Measure a call where rows are counted by input rows function, or
+        by countrows with names."""
+
+        start = time()
+
+        try:
+            result = func(*args, **kwargs)
+
+        except Exception:
+            self.fail(system)
+            raise
+
+        self.observe(
+            system, time() - start,
+            rows=countrows(result, names) if rows is None else rows(result)
+        )
+
+        return result
+
+    def call(self, systems, func, names=None, rows=None):
+        """Call input func with the cheapest system, and fall back on other
+        systems in cost order if it fails.
+
+        :param list systems: qualifying system names.
+        :param func: function which takes a system name in parameter.
+        :param list names: execution context names where count result rows.
+            Default is all names.
+        :param rows: function which counts rows of a func result. Default
+            counts rows of names.
+        :return: func result.
+        :raises: the last system error if all systems fail.
+        """
+
+        error = None
+
+        for system in self.rank(systems):
+
+            try:
+                return self._measure(
+                    system, func, (system,), {}, names, rows
+                )
+
+            except Exception as err:
+                error = err
+
+        if error is None:
+            raise ValueError('No system to call.')
+
+        raise error
+
+
+def countrows(result, names=None):
+    """Count rows of a system result.
+
+    :param result: system result. Execution contexts are counted by list
+        values.
+    :param list names: execution context names to count. Default is all
+        names, in O(context size).
+    :rtype: int"""
+
+    if isinstance(result, Mapping):
+        if names is None:
+            values = result.values()
+
+        else:
+            values = (result.get(name) for name in set(names))
+
+        result = sum(
+            len(value) for value in values if isinstance(value, list)
+        )
+
+    elif isinstance(result, (list, tuple)):
+        result = len(result)
+
+    else:
+        result = 0
+
+    return result
@@ -30,7 +30,13 @@ __all__ = ['Dispatcher']
 
 from b3j0f.utils.version import OrderedDict
 
-from .urils import getidentifiers, getname
+from .utils import getidentifiers, getname
+from .routing import RoutingIndex
+from .executor import Executor
+from .cost import CostModel, countrows
+from .request.batch import callbatch
+from .request.plan import runplan
+from .request.queue import RequestQueue
 
 from link.middleware import Middleware
 
@@ -73,19 +79,69 @@ def ctxname(node):
 class Dispatcher(object):
     """In charge of dispatching requests."""
 
-    __slots__ = ['systems']
+    __slots__ = [
+        'systems', 'executor', 'cost', 'cache', 'partitioned', '_index',
+        '_systemsperschema', '_schemaspersystem', '_schemasperprop'
+    ]
 
-    def __init__(self, systems, *args, **kwargs):
+    def __init__(
+            self, systems, executor=None, cost=None, cache=None,
+            partitioned=None, *args, **kwargs
+    ):
         """
         :param dict systems: systems by name to handle.
+        :param Executor executor: executor used to run independent system
+            calls. Default is a serial executor.
+        :param CostModel cost: cost model fed by system calls and used to
+            choose among systems hosting the same schema.
+        :param ResultCache cache: cache of system results, invalidated by
+            writes executed by this. Default is no cache.
+        :param set partitioned: names of schemas whose items are spread over
+            (partitioned between) the systems hosting them. Other schemas
+            hosted by several systems are replicated.
         """
 
         super(Dispatcher, self).__init__(*args, **kwargs)
 
         self.systems = systems
+        self.executor = Executor() if executor is None else executor
+        self.cost = CostModel() if cost is None else cost
+        self.cache = cache
+        self.partitioned = set() if partitioned is None else set(partitioned)
 
         self._loadsystems()
 
+    def _loadsystems(self):
+        """Index systems, schemas and schema properties.
+
+        The routing index is built once here in order to resolve
+        getsystemswithschemas without scanning system/schema lists."""
+
+        self._index = RoutingIndex()
+        self._systemsperschema = OrderedDict()
+        self._schemaspersystem = OrderedDict()
+        self._schemasperprop = OrderedDict()
+
+        for sysname in self.systems:
+
+            system = self.systems[sysname]
+
+            self._index.register(sysname)
+            schemas = self._schemaspersystem[sysname] = []
+
+            for schema in getattr(system, 'schemas', None) or ():
+
+                schname = getattr(schema, 'name', schema)
+                props = _getpropnames(schema)
+
+                self._index.register(sysname, schname, props)
+
+                schemas.append(schname)
+                self._systemsperschema.setdefault(schname, []).append(sysname)
+
+                for prop in props:
+                    self._schemasperprop.setdefault(prop, []).append(schname)
+
     def subdivise(self, node):
         """Subdivise input query to queries by systems.
 
@@ -151,20 +207,84 @@ class Dispatcher(object):
 
         return result
 
-    def processnode(node, command=None):
+    def processnode(self, node, command='run'):
+        """Process input node in calling systems on their subdivision.
+
+        Subdivisions are independent, so they are given to this executor.
+        Results are merged in the subdivision order.
+
+        :param link.dbrequest.tree.Node node: node to process.
+        :param str command: system method name to call with system nodes.
+        :return: merged system results.
+        :rtype: dict"""
 
         result = {}
 
         subdivision = self.subdivise(node)
 
-        for name in subdivision:
+        def callsystem(name):
             system = self.systems[name]
-            sysresult = getattr(system, command)(node)
+            return self.cost.measure(
+                name, getattr(system, command), subdivision[name]
+            )
 
+        names = list(subdivision)
+
+        for sysresult in self.executor.map(callsystem, names):
             result.update(sysresult)
 
         return result
 
+    def runcheapest(
+            self, nodes, schema, system=None, ctx=None, batches=None
+    ):
+        """Run input nodes on the cheapest system hosting input schema.
+
+        Other qualifying systems are tried in cost order if it fails. Rows
+        observed by the cost model are those written under the schema and
+        the node context names.
+
+        :param list nodes: nodes to run.
+        :param str schema: schema name. None if unknown.
+        :param str system: system name of nodes. It is called alone if it
+            does not host the schema.
+        :param dict ctx: execution context.
+        :param list batches: list of (nodes, ctx) of several requests, given
+            in one call to the system (see batch.callbatch) instead of nodes
+            and ctx. Input nodes are all batch nodes then.
+        :return: execution context, or execution context per batch.
+        :rtype: dict"""
+
+        systems = []
+
+        if schema is not None:
+            systems, _ = self.getsystemswithschemas(schema=schema)
+
+        if system is not None and system not in systems:
+            systems = [system]
+
+        names = [node.getctxname() for node in nodes]
+
+        if schema is not None:
+            names.append(schema)
+
+        if batches is None:
+            rows = None
+
+            def runsystem(name):
+                return self.systems[name].run(
+                    nodes=nodes, dispatcher=self, ctx=ctx
+                )
+
+        else:
+            def rows(ctxs):
+                return sum(countrows(ctx, names) for ctx in ctxs)
+
+            def runsystem(name):
+                return callbatch(self.systems[name], batches, self)
+
+        return self.cost.call(systems, runsystem, names=names, rows=rows)
+
     def getsystemswithschemas(
             self, system=None, schema=None, prop=None,
             defsystems=None, defschemas=None
@@ -181,97 +301,63 @@ class Dispatcher(object):
         :rtype: tuple
         """
 
-        if defsystems is None:
+        return self._index.resolve(
+            system=system, schema=schema, prop=prop,
+            defsystems=defsystems, defschemas=defschemas
+        )
 
-            if defschemas is None:
-                defsystems = list(self._schemaspersystem)
+    def run(self, nodes, ctx=None):
+        """Run input nodes with a cached plan.
 
-            else:
-                defsystems = [
-                    _system
-                    for _schema in defschemas
-                    for _system in self._systemsperschema[_schema]
-                ]
+        :param list nodes: nodes to run.
+        :param dict ctx: execution context.
+        :return: execution context.
+        :rtype: dict"""
 
-        if defschemas is None:
+        return runplan(
+            nodes=nodes, dispatcher=self, ctx={} if ctx is None else ctx
+        )
 
-            defschemas = [
-                _schema
-                for _system in defsystems
-                for _schema in self._schemaspersystem[_system]
-            ]
+    def arun(self, nodes, ctx=None, executor=None):
+        """Get a coroutine which runs input nodes (python 3.5+).
 
-        if system is not None:
-            systems = [system]
+        Independent system calls are gathered and synchronous systems are
+        offloaded to input executor.
 
-        if schema is not None:
-            schemas = [schema]
+        :param list nodes: nodes to run.
+        :param dict ctx: execution context.
+        :param concurrent.futures.Executor executor: executor where offload
+            synchronous calls. Default is the event loop default executor.
+        :return: coroutine which returns the execution context."""
 
-        if prop is None:
+        from .aio import arunplan
 
-            if schema is None:
+        return arunplan(
+            nodes=nodes, dispatcher=self, ctx={} if ctx is None else ctx,
+            executor=executor
+        )
 
-                if system is None:
-                    systems = defsystems
-                    schemas = defschemas
+    def queue(self):
+        """Create a new Request Queue.
 
-                else:
-                    schemas = [
-                        schema for schema in self._schemaspersystem[system]
-                        if schema in defschemas
-                    ]
+        :rtype: RequestQueue"""
 
-            else:
-                if system is None:
-                    systems = [
-                        system for system in self._systemsperschema[schema]
-                        if system in defsystems
-                    ]
+        return RequestQueue(dispatcher=self)
 
-        else:
 
-            if schema is None:
-
-                if system is None:
-                    schemas = [
-                        schema
-                        for schema in self._schemasperprop[prop]
-                        if schema in defschemas
-                    ]
-                    systems = [
-                        system
-                        for schema in schemas
-                        for system in self._systemsperschema[schema]
-                        if system in defsystems
-                    ]
-
-                else:
-                    schemas = [
-                        schema
-                        for schemas in self._schemasperprop[prop]
-                        if schema in self._schemaspersystem[system]
-                        and schema in defschemas
-                    ]
-
-            else:
-
-                if system is None:
-                    systems = [
-                        system for system in self._systemsperschema[schema]
-                        if system in defsystems
-                    ]
-
-        _removeoccurences(systems)
-        _removeoccurences(schemas)
-
-        return systems, schemas
+def _getpropnames(schema):
+    """Get property names of input schema.
 
-    def queue(self):
-        """Create a new Request Queue.
+    :param schema: schema from where get property names.
+    :rtype: list"""
 
-        :rtype: RequestQueue"""
+    if hasattr(schema, 'getschemas'):
+        props = schema.getschemas()
 
-        return RequestQueue(dispatcher=self)
+    else:
+        props = getattr(schema, 'properties', None) or ()
+
+    return [getattr(prop, 'name', prop) for prop in props]
 
 
 def _removeoccurences(l):
@@ -282,10 +368,8 @@ def _removeoccurences(l):
     """
 
     if len(l) != len(set(l)):
-        l.reverse()
-
-        for item in list(l):
-            for _ in range(1, l.count(item)):
-                l.remove(item)
+        found = set()
 
-        l.reverse()
+        l[:] = [
+            item for item in l if not (item in found or found.add(item))
+        ]
@@ -0,0 +1,201 @@
+# -*- coding: utf-8 -*-
+
+# --------------------------------------------------------------------
+# The MIT License (MIT)
+#
+# Copyright (c) 2016 Jonathan Labéjof <jonathan.labejof@gmail.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+# --------------------------------------------------------------------
+
+"""Specification of executors used by the dispatcher to run system calls.
+
+An executor applies a function on a list of items and returns results in the
+items order, whatever the completion order is.
+
+Executors are thread safe. A map called by a function which is executed by
+the same executor is serial, so that nested maps never wait for workers held
+by their callers."""
+
+__all__ = ['Executor', 'ThreadExecutor', 'AsyncioExecutor']
+
+from multiprocessing.pool import ThreadPool
+
+from threading import Lock, Thread, local
+
+DEFAULT_WORKERS = 4  #: default maximal number of concurrent workers.
+
+
+class Executor(object):
+    """Serial executor.
+
+    Default dispatcher executor which runs functions one after the other."""
+
+    __slots__ = ['workers', '_lock', '_local']
+
+    def __init__(self, workers=DEFAULT_WORKERS, *args, **kwargs):
+        """
+        :param int workers: maximal number of concurrent workers.
+        """
+
+        super(Executor, self).__init__(*args, **kwargs)
+
+        self.workers = workers
+        self._lock = Lock()  # resource lock
+        self._local = local()  # worker thread flag
+
+    def map(self, func, items):
+        """Apply input func on all items.
+
+        :param func: function to apply on each item.
+        :param list items: function arguments.
+        :return: function results in the items order.
+        :rtype: list"""
+
+        items = list(items)
+
+        if len(items) > 1 and not getattr(self._local, 'working', False):
+
+            def work(item):
+
+                self._local.working = True
+
+                try:
+                    return func(item)
+
+                finally:
+                    self._local.working = False
+
+            result = list(self._map(work, items))
+
+        else:  # avoid concurrency overhead and nested waits
+            result = [func(item) for item in items]
+
+        return result
+
+    def _map(self, func, items):
+        """Custom map method called with more than one item.
+
+        :param func: function to apply on each item.
+        :param list items: function arguments.
+        :rtype: list"""
+
+        return [func(item) for item in items]
+
+    def close(self):
+        """Release executor resources."""
+
+
+class ThreadExecutor(Executor):
+    """Executor which runs functions in a bounded thread pool."""
+
+    __slots__ = ['_pool']
+
+    def __init__(self, *args, **kwargs):
+
+        super(ThreadExecutor, self).__init__(*args, **kwargs)
+
+        self._pool = None
+
+    def _map(self, func, items):
+
+        with self._lock:
+            if self._pool is None:
+                self._pool = ThreadPool(self.workers)
+
+            pool = self._pool
+
+        return pool.map(func, items)
+
+    def close(self):
+
+        with self._lock:
+            pool, self._pool = self._pool, None
+
+        if pool is not None:
+            pool.close()
+            pool.join()
+
+
+class AsyncioExecutor(Executor):
+    """Executor which gathers functions in an asyncio event loop.
+
+    The loop runs in a thread of its own and functions are offloaded to a
+    bounded thread pool of the loop, so that this may be called concurrently
+    and inside a running event loop."""
+
+    __slots__ = ['_loop', '_pool', '_thread']
+
+    def __init__(self, *args, **kwargs):
+
+        super(AsyncioExecutor, self).__init__(*args, **kwargs)
+
+        self._loop = None
+        self._pool = None
+        self._thread = None
+
+    def _map(self, func, items):
+
+        import asyncio
+        from concurrent.futures import Future, ThreadPoolExecutor
+
+        with self._lock:
+            if self._loop is None:
+                self._pool = ThreadPoolExecutor(max_workers=self.workers)
+                self._loop = asyncio.new_event_loop()
+                self._thread = Thread(target=self._loop.run_forever)
+                self._thread.daemon = True
+                self._thread.start()
+
+            loop, pool = self._loop, self._pool
+
+        result = Future()
+
+        def done(gathered):
+
+            error = gathered.exception()
+
+            if error is None:
+                result.set_result(gathered.result())
+
+            else:
+                result.set_exception(error)
+
+        def gather():  # executed in the loop thread
+
+            futures = [
+                loop.run_in_executor(pool, func, item) for item in items
+            ]
+            asyncio.gather(*futures).add_done_callback(done)
+
+        loop.call_soon_threadsafe(gather)
+
+        return result.result()
+
+    def close(self):
+
+        with self._lock:
+            loop, pool, thread = self._loop, self._pool, self._thread
+            self._loop = self._pool = self._thread = None
+
+        if loop is not None:
+            loop.call_soon_threadsafe(loop.stop)
+            thread.join()
+            loop.close()
+            pool.shutdown()
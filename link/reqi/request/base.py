@@ -30,20 +30,40 @@ __all__ = ['Node']
 
 from uuid import uuid4 as uuid
 
+from hashlib import sha1
+
 from inspect import getmembers, isroutine
 
+from weakref import WeakSet
+
+from six.moves import intern
+from six import string_types
+
 
 ALIAS = 'ALIAS'  #: ctx key used to store alias
 
+#: attributes which are not part of the node structure.
+NOSTATE = frozenset(['alias', 'ctx', '_ctxname', '_parents', '__weakref__'])
+
+#: attributes which do not invalidate context names when assigned.
+_UNTRACKED = frozenset(['ctx', '_ctxname', '_parents'])
+
 
 class Node(object):
     """Elementary part of request.
 
     An elementary part is linked to a system and/or a schema.
     For easying its use, it can be referee to an alias, and be refered by
-    another node using the attribute `ref`."""
+    another node using the attribute `ref`.
 
-    __slots__ = ['alias', 'ctx']
+    Without alias, the context name is structural: nodes with the same type
+    and attribute values have the same context name, and therefore share
+    their results in an execution context. Context names are computed once
+    and interned. Assigning an attribute invalidates cached names of the node
+    and of nodes which refer to it, whereas modifying an attribute value in
+    place requires to call ``touch``."""
+
+    __slots__ = ['alias', 'ctx', '_ctxname', '_parents', '__weakref__']
 
     def __init__(self, alias=None, ref=None, ctx=None, *args, **kwargs):
         """
@@ -51,24 +71,135 @@ class Node(object):
         :param dict ctx: node execution context.
         """
 
+        self._ctxname = None  # cached context name
+        self._parents = WeakSet()  # nodes whose attributes refer to this
+
         super(Node, self).__init__(*args, **kwargs)
 
         self.alias = alias
         self.ctx = ctx
 
+    def __setattr__(self, name, value):
+
+        if name not in _UNTRACKED:
+            self.touch()
+
+            for child in _children(value):
+                parents = getattr(child, '_parents', None)
+
+                if parents is not None:
+                    parents.add(self)
+
+        super(Node, self).__setattr__(name, value)
+
+    def __getstate__(self):
+
+        result = dict(getattr(self, '__dict__', ()))
+
+        for cls in type(self).__mro__:
+            slots = cls.__dict__.get('__slots__', ())
+
+            if isinstance(slots, string_types):
+                slots = [slots]
+
+            for name in slots:
+                if name not in ('_ctxname', '_parents', '__weakref__'):
+                    if hasattr(self, name):
+                        result[name] = getattr(self, name)
+
+        return result
+
+    def __setstate__(self, state):
+
+        self._ctxname = None
+        self._parents = WeakSet()
+
+        for name in state:
+            setattr(self, name, state[name])
+
+    def touch(self):
+        """Invalidate cached context names of this and of nodes which refer
+        to this."""
+
+        if getattr(self, '_ctxname', None) is None and not getattr(
+                self, '_parents', None
+        ):
+            return
+
+        tovisit = [self]
+        visited = set()
+
+        while tovisit:
+            node = tovisit.pop()
+
+            if id(node) not in visited:
+                visited.add(id(node))
+                node._ctxname = None
+                tovisit += getattr(node, '_parents', ())
+
     def getctxname(self):
         """Get node context name.
 
         :rtype: str
         """
 
-        result = None
+        result = self._ctxname
 
-        if self.alias:
-            result = self.alias
+        if result is None:
+            if self.alias:
+                result = self.alias
 
-        else:
-            result = str(self)
+            else:
+                result = intern(str(self._structname()))
+
+            self._ctxname = result
+
+        return result
+
+    def _structname(self):
+        """Get the structural context name.
+
+        :rtype: str"""
+
+        return '{0}({1})'.format(type(self).__name__, self._statename())
+
+    def _statename(self, base=object):
+        """Get the structural name of attributes defined by subclasses of
+        input base class (see _state).
+
+        :param type base: base class.
+        :rtype: str"""
+
+        return ','.join(
+            '{0}={1}'.format(name, statename(value))
+            for name, value in self._state(base)
+        )
+
+    def _state(self, base=object):
+        """Get names and values of attributes defined by subclasses of input
+        base class, excepted NOSTATE attributes.
+
+        :param type base: base class.
+        :rtype: list"""
+
+        result = []
+        names = set(NOSTATE)
+
+        for cls in reversed(type(self).__mro__):
+            if cls is not base and issubclass(cls, base):
+                slots = cls.__dict__.get('__slots__', ())
+
+                if isinstance(slots, string_types):
+                    slots = [slots]
+
+                for name in slots:
+                    if name not in names:
+                        names.add(name)
+                        result.append((name, getattr(self, name, None)))
+
+        for name in sorted(getattr(self, '__dict__', ())):
+            if name not in names:
+                result.append((name, self.__dict__[name]))
 
         return result
 
@@ -170,3 +301,67 @@ class Ref(Node):
             result = self.ref.getctxname(*args, **kwargs)
 
         return result
+
+
+def statename(value):
+    """Get a structural name of a node attribute value.
+
+    :param value: attribute value.
+    :rtype: str"""
+
+    if isinstance(value, Node):
+        result = value.getctxname()
+
+    elif isinstance(value, (list, tuple)):
+        result = '[{0}]'.format(','.join(statename(item) for item in value))
+
+    elif isinstance(value, dict):
+        result = '{{{0}}}'.format(
+            ','.join(sorted(
+                '{0}:{1}'.format(statename(key), statename(value[key]))
+                for key in value
+            ))
+        )
+
+    elif isinstance(value, (set, frozenset)):
+        result = '{{{0}}}'.format(
+            ','.join(sorted(statename(item) for item in value))
+        )
+
+    elif isinstance(value, type):
+        result = value.__name__
+
+    elif hasattr(value, 'dtype') and hasattr(value, 'tobytes'):
+        # array representations are truncated
+        result = '{0}({1},{2},{3})'.format(
+            type(value).__name__, value.dtype, getattr(value, 'shape', None),
+            sha1(value.tobytes()).hexdigest()
+        )
+
+    else:
+        result = repr(value)
+
+    return result
+
+
+def _children(value):
+    """Get nodes of a node attribute value (see statename).
+
+    :rtype: list"""
+
+    result = []
+    tovisit = [value]
+
+    while tovisit:
+        value = tovisit.pop()
+
+        if isinstance(value, Node):
+            result.append(value)
+
+        elif isinstance(value, (list, tuple, set, frozenset)):
+            tovisit += value
+
+        elif isinstance(value, dict):
+            tovisit += list(value.keys()) + list(value.values())
+
+    return result
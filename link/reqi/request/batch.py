@@ -0,0 +1,216 @@
+# -*- coding: utf-8 -*-
+
+# --------------------------------------------------------------------
+# The MIT License (MIT)
+#
+# Copyright (c) 2016 Jonathan Labéjof <jonathan.labejof@gmail.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+# --------------------------------------------------------------------
+
+"""Specification of request batching.
+
+Requests of a batch are executed step by step together. At each step, the
+nodes that requests delegate to a same system are given to this system in one
+call to its ``runbatch`` method if it exists. Such a method receives a list of
+(nodes, ctx) and returns a ctx per input couple, so that a backend can serve
+several requests with one query (for example with a mongo ``$facet``
+aggregation) and split results back by request. Systems without ``runbatch``
+are called once per request. Nodes are routed through the dispatcher result
+cache and cost model such as delegated nodes of one request (see
+plan.delegatebatch).
+
+Requests are batched in their order until a request reads or writes a schema
+written by a previous request of the batch, or writes a schema read by it:
+such a request starts a new batch, executed after the previous one, so that
+it sees previous writes."""
+
+__all__ = ['runbatch', 'callbatch']
+
+from b3j0f.utils.version import OrderedDict
+
+from .incremental import writtenschemas
+from .plan import SYSTEM, compileplan, delegatebatch
+
+
+def callbatch(system, batches, dispatcher):
+    """Call input system on a list of (nodes, ctx).
+
+    :param system: system to call.
+    :param list batches: list of (nodes, ctx).
+    :param b3j0f.reqi.dispatch.Dispatcher dispatcher: dispatcher.
+    :return: ctx per batch.
+    :rtype: list"""
+
+    runbatch = getattr(system, 'runbatch', None)
+
+    if runbatch is None:
+        result = [
+            system.run(nodes=nodes, dispatcher=dispatcher, ctx=ctx) or ctx
+            for nodes, ctx in batches
+        ]
+
+    else:
+        result = [
+            sysctx or ctx for sysctx, (_, ctx) in zip(
+                runbatch(batches=batches, dispatcher=dispatcher), batches
+            )
+        ]
+
+    return result
+
+
+class _Run(object):
+    """Execution state of a request in a batch."""
+
+    __slots__ = ['request', 'plan', 'nodes', 'ctx', 'reads', 'writes']
+
+    def __init__(self, request, *args, **kwargs):
+
+        super(_Run, self).__init__(*args, **kwargs)
+
+        self.request = request
+
+        if request.plans is None:
+            self.plan, self.nodes = compileplan(request.nodes)
+
+        else:
+            self.plan, self.nodes = request.plans.get(request.nodes)
+
+        self.ctx = request.initctx()
+
+        from ..cache import readschemas
+
+        self.reads = readschemas(request.nodes)  # None for all schemas
+        self.writes = writtenschemas(request.nodes)
+
+    def conflicts(self, reads, writes):
+        """True if this reads or writes schemas written by previous runs, or
+        writes schemas read by them.
+
+        :param set reads: schemas read by previous runs, None for all.
+        :param set writes: schemas written by previous runs.
+        :rtype: bool"""
+
+        result = False
+
+        if writes:
+            result = self.reads is None or not writes.isdisjoint(
+                self.reads | self.writes
+            )
+
+        if self.writes and not result:
+            result = reads is None or not self.writes.isdisjoint(reads)
+
+        return result
+
+
+def runbatch(requests):
+    """Execute input requests together and set their resctx.
+
+    :param list requests: requests to execute.
+    :return: requests resctx.
+    :rtype: list"""
+
+    result = []
+    runs = []
+    reads, writes = set(), set()  # schemas used by runs
+
+    for request in requests:
+        run = _Run(request)
+
+        if run.conflicts(reads, writes):
+            result += _runbatch(runs)
+            runs = []
+            reads, writes = set(), set()
+
+        runs.append(run)
+        writes |= run.writes
+
+        if reads is not None:
+            reads = None if run.reads is None else reads | run.reads
+
+    result += _runbatch(runs)
+
+    return result
+
+
+def _runbatch(runs):
+    """Execute input runs step by step together.
+
+    :param list runs: runs to execute.
+    :return: runs ctx.
+    :rtype: list"""
+
+    index = 0
+
+    while True:
+        batches = OrderedDict()  # delegated nodes by dispatcher and system
+        stepped = False
+
+        for run in runs:
+            if index >= len(run.plan.steps):
+                continue
+
+            stepped = True
+            step = run.plan.steps[index]
+            dispatcher = run.request.dispatcher
+
+            if step.kind == SYSTEM:
+                run.ctx, torun = run.plan.prepare(
+                    step, run.nodes, dispatcher, run.ctx
+                )
+
+                if torun:
+                    batches.setdefault(
+                        (id(dispatcher), step.system), []
+                    ).append((run, step, torun))
+
+                else:
+                    run.plan.finish(step, run.nodes, run.ctx)
+
+            else:
+                run.ctx = run.plan.runstep(
+                    step, run.nodes, dispatcher, run.ctx
+                )
+
+        if not stepped:
+            break
+
+        for (_, system), items in batches.items():
+            dispatcher = items[0][0].request.dispatcher
+
+            ctxs = delegatebatch(
+                system, [(torun, run.ctx) for run, _, torun in items],
+                dispatcher
+            )
+
+            for (run, step, _), ctx in zip(items, ctxs):
+                run.ctx = ctx
+                run.plan.finish(step, run.nodes, ctx)
+
+        index += 1
+
+    result = []
+
+    for run in runs:
+        run.request.resctx = run.ctx
+        result.append(run.ctx)
+
+    return result
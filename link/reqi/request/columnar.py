@@ -0,0 +1,340 @@
+# -*- coding: utf-8 -*-
+
+# --------------------------------------------------------------------
+# The MIT License (MIT)
+#
+# Copyright (c) 2016 Jonathan Labéjof <jonathan.labejof@gmail.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+# --------------------------------------------------------------------
+
+"""Specification of the columnar execution context representation.
+
+In columnar mode, schema items are stored by property in typed columns instead
+of lists of dicts. Numerical and boolean columns are NumPy arrays if NumPy is
+installed (otherwise standard arrays or lists), and values which can not be
+typed are stored in an object column (a list).
+
+Columns still behave like a list of dicts (length, iteration, indexing and
+slicing give rows) in order to stay compatible with row-oriented code such as
+cursors. Execution plans convert columns to rows before system calls and
+rows to columns after steps, only for names of step nodes, and in-memory
+filters and conversions keep columns."""
+
+__all__ = ['Columns', 'MISSING', 'column', 'tocolumnar', 'torows']
+
+from array import array
+
+from numbers import Integral, Real
+
+from six import string_types
+
+try:
+    import numpy
+
+except ImportError:
+    numpy = None
+
+COLUMNAR = 'COLUMNAR'  #: ctx key used to enable the columnar mode.
+
+
+class _Missing(object):
+    """Marker of missing row properties."""
+
+    __slots__ = []
+
+    def __repr__(self):
+
+        return 'MISSING'
+
+MISSING = _Missing()  #: missing row property value.
+
+
+def column(values):
+    """Get a typed column from input values.
+
+    :param list values: column values.
+    :return: typed array if values are homogeneous numbers or booleans,
+        otherwise the list of values."""
+
+    result = values
+
+    if values and not any(value is MISSING for value in values):
+
+        if all(isinstance(value, bool) for value in values):
+            if numpy is not None:
+                result = numpy.array(values, dtype=bool)
+
+        elif all(
+                isinstance(value, Integral) and not isinstance(value, bool)
+                for value in values
+        ):
+            try:
+                if numpy is None:
+                    result = array('q', values)
+
+                else:
+                    result = numpy.array(values, dtype=numpy.int64)
+
+            except OverflowError:  # keep python long values
+                result = values
+
+        elif all(
+                isinstance(value, Real) and not isinstance(value, bool)
+                for value in values
+        ):
+            if numpy is None:
+                result = array('d', values)
+
+            else:
+                result = numpy.array(values, dtype=numpy.float64)
+
+    return result
+
+
+class Columns(object):
+    """Columnar storage of schema items.
+
+    Index columns with a property name, and rows with an integer or a slice.
+    """
+
+    __slots__ = ['columns', '_len', '_rows']
+
+    def __init__(self, columns=None, length=None, *args, **kwargs):
+        """
+        :param dict columns: columns by property name.
+        :param int length: number of rows. Default is the first column length.
+        """
+
+        super(Columns, self).__init__(*args, **kwargs)
+
+        self.columns = {} if columns is None else columns
+
+        if length is None:
+            length = 0
+
+            for name in self.columns:
+                length = len(self.columns[name])
+                break
+
+        self._len = length
+        self._rows = None  # rows built by the first iteration
+
+    @classmethod
+    def fromrows(cls, rows):
+        """Build columns from input rows.
+
+        :param Iterable rows: dicts by property name.
+        :rtype: Columns"""
+
+        values = {}
+        length = 0
+
+        for row in rows:
+
+            for name in row:
+                if name not in values:
+                    values[name] = [MISSING] * length
+
+            for name in values:
+                values[name].append(row.get(name, MISSING))
+
+            length += 1
+
+        columns = dict((name, column(values[name])) for name in values)
+
+        return cls(columns=columns, length=length)
+
+    def torows(self):
+        """Convert this to a list of dicts.
+
+        :rtype: list"""
+
+        names = list(self.columns)
+        values = [_tolist(self.columns[name]) for name in names]
+
+        return [
+            dict(
+                (name, value) for name, value in zip(names, row)
+                if value is not MISSING
+            )
+            for row in zip(*values)
+        ] if names else [{} for _ in range(self._len)]
+
+    def row(self, index):
+        """Get a row dict.
+
+        :param int index: row index.
+        :rtype: dict"""
+
+        result = {}
+
+        for name in self.columns:
+            value = self.columns[name][index]
+
+            if value is not MISSING:
+                result[name] = _toscalar(value)
+
+        return result
+
+    def select(self, mask):
+        """Get rows where input mask is true.
+
+        :param mask: one boolean per row.
+        :rtype: Columns"""
+
+        indexes = None
+        columns = {}
+
+        for name in self.columns:
+            values = self.columns[name]
+
+            if numpy is not None and isinstance(values, numpy.ndarray):
+                values = values[numpy.asarray(mask, dtype=bool)]
+
+            else:
+                if indexes is None:
+                    indexes = [
+                        index for index, keep in enumerate(mask) if keep
+                    ]
+
+                if isinstance(values, array):
+                    values = array(
+                        values.typecode, (values[index] for index in indexes)
+                    )
+
+                else:
+                    values = [values[index] for index in indexes]
+
+            columns[name] = values
+
+        length = sum(1 for keep in mask if keep)
+
+        return Columns(columns=columns, length=length)
+
+    def __len__(self):
+
+        return self._len
+
+    def __contains__(self, name):
+
+        return name in self.columns
+
+    def __iter__(self):
+
+        if self._rows is None:
+            self._rows = self.torows()
+
+        return iter(self._rows)
+
+    def __getitem__(self, key):
+
+        if isinstance(key, string_types):
+            result = self.columns[key]
+
+        elif isinstance(key, slice):
+            result = Columns(
+                columns=dict(
+                    (name, self.columns[name][key]) for name in self.columns
+                ),
+                length=len(range(*key.indices(self._len)))
+            )
+
+        else:
+            if key < 0:
+                key += self._len
+
+            if not 0 <= key < self._len:
+                raise IndexError(key)
+
+            result = self.row(key)
+
+        return result
+
+    def __setitem__(self, name, values):
+
+        if len(values) != self._len and self.columns:
+            raise ValueError(
+                'Column {0} length must be {1}.'.format(name, self._len)
+            )
+
+        self.columns[name] = values
+        self._len = len(values)
+        self._rows = None
+
+    def __eq__(self, other):
+
+        if isinstance(other, Columns):
+            other = other.torows()
+
+        return self.torows() == other
+
+    def __ne__(self, other):
+
+        return not self == other
+
+    def __repr__(self):
+
+        return 'Columns({0})'.format(list(self.columns))
+
+
+def _tolist(values):
+    """Convert a column to a list of python values."""
+
+    return values.tolist() if hasattr(values, 'tolist') else list(values)
+
+
+def _toscalar(value):
+    """Convert a numpy scalar to a python value."""
+
+    return value.item() if hasattr(value, 'item') else value
+
+
+def tocolumnar(ctx, names=None):
+    """Convert list of dicts values of input ctx to columns.
+
+    :param dict ctx: execution context to update.
+    :param Iterable names: names to convert. Default is all ctx names.
+    :return: ctx."""
+
+    for name in list(ctx) if names is None else names:
+        value = ctx.get(name)
+
+        if isinstance(value, list) and value and all(
+                isinstance(item, dict) for item in value
+        ):
+            ctx[name] = Columns.fromrows(value)
+
+    return ctx
+
+
+def torows(ctx, names=None):
+    """Convert columns values of input ctx to lists of dicts.
+
+    :param dict ctx: execution context to update.
+    :param Iterable names: names to convert. Default is all ctx names.
+    :return: ctx."""
+
+    for name in list(ctx) if names is None else names:
+        value = ctx.get(name)
+
+        if isinstance(value, Columns):
+            ctx[name] = value.torows()
+
+    return ctx
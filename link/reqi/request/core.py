@@ -28,21 +28,54 @@
 
 __all__ = ['Request']
 
+from .plan import PLANS, runplan
+from .utils import LAZY
+from .columnar import COLUMNAR
+from .ctx import layer
+from .incremental import runincremental
+
 
 class Request(object):
     """In charge of executing nodes.
 
-    The result is saved in the attribute ``resctx``
+    The result is saved in the attribute ``resctx``. A history may spill it
+    with the request ctx to a store, from where they are reloaded when read.
+
+    A request save references to nodes, context and a dispatcher.
+
+    Nodes are executed with a plan compiled from their structure. Plans are
+    shared by requests of the same shape thanks to a plan cache.
+
+    In lazy mode, functions chain their filters and conversions on items
+    which are materialized only when read.
 
-    A request save references to nodes, context and a dispatcher."""
+    In columnar mode, schema items are stored in columns by property.
 
-    __slots__ = ['dispatcher', 'nodes', 'ctx', 'resctx']
+    Execution contexts are layered on the default ctx (see the ctx module),
+    so that starting a request does not copy it.
 
-    def __init__(self, dispatcher, nodes, ctx=None, *args, **kwargs):
+    In incremental mode, a forced run only executes again plan steps which
+    depend on names invalidated since the previous run (see the incremental
+    module)."""
+
+    __slots__ = [
+        'dispatcher', 'nodes', '_ctx', 'plans', 'lazy', 'columnar',
+        'incremental', '_resctx', '_history', '_key', '_trace', '_invalid'
+    ]
+
+    def __init__(
+            self, dispatcher, nodes, ctx=None, plans=PLANS, lazy=False,
+            columnar=False, incremental=False, *args, **kwargs
+    ):
         """
         :param Dispatcher dispatcher: dispatcher.
         :param list nodes: nodes to execute.
         :param dict ctx: default expression execution context.
+        :param PlanCache plans: plan cache. If None, plans are not cached.
+        :param bool lazy: enable lazy pipelines (False by default).
+        :param bool columnar: enable the columnar mode (False by default).
+        :param bool incremental: enable the incremental mode (False by
+            default).
         """
 
         super(Request, self).__init__(*args, **kwargs)
@@ -50,7 +83,98 @@ class Request(object):
         self.nodes = nodes
         self.ctx = ctx
         self.dispatcher = dispatcher
-        self.resctx = None
+        self.plans = plans
+        self.lazy = lazy
+        self.columnar = columnar
+        self.incremental = incremental
+        self._resctx = None
+        self._history = None  # history where resctx is spilled
+        self._key = None  # spilled resctx key
+        self._trace = None  # last incremental execution trace
+        self._invalid = set()  # names invalidated since the last run
+
+    @property
+    def ctx(self):
+        """Get the default expression execution context.
+
+        :rtype: dict"""
+
+        if self._history is not None:
+            self._history.reload(self)
+
+        return self._ctx
+
+    @ctx.setter
+    def ctx(self, value):
+
+        self._ctx = value
+
+    @property
+    def resctx(self):
+        """Get the execution result context.
+
+        A spilled context is reloaded from its store at the first access, and
+        is kept in memory by its history again.
+
+        :rtype: dict"""
+
+        if self._history is not None:
+            self._history.reload(self)
+
+        return self._resctx
+
+    @resctx.setter
+    def resctx(self, value):
+
+        if self._history is not None:  # reload the spilled ctx
+            self._history.reload(self)
+
+        self._resctx = value
+
+    @property
+    def executed(self):
+        """True if this has a result context.
+
+        :rtype: bool"""
+
+        return self._resctx is not None or self._history is not None
+
+    def spill(self, history, key):
+        """Release the ctx and result context which are spilled by a
+        history.
+
+        :param History history: history where the contexts are spilled.
+        :param key: spilled contexts key."""
+
+        self._history = history
+        self._key = key
+        self._ctx = self._resctx = None
+
+    def unspill(self):
+        """Forget the spilled contexts.
+
+        :return: spilled contexts key if spilled."""
+
+        result = self._key
+
+        self._history = self._key = None
+
+        return result
+
+    def initctx(self):
+        """Get a new execution context from this ctx and modes.
+
+        :rtype: Context"""
+
+        result = layer(self.ctx)
+
+        if self.lazy:
+            result[LAZY] = True
+
+        if self.columnar:
+            result[COLUMNAR] = True
+
+        return result
 
     def run(self, force=False):
         """Execute this nodes.
@@ -58,15 +182,43 @@ class Request(object):
         :param bool force: force running even if resctx exist already.
         :rtype: dict"""
 
-        if force or self.resctx is None:
+        if force or not self.executed:
 
-            self.resctx = {} if self.ctx is None else self.ctx.copy()
+            if self.incremental:
+                self.resctx, self._trace = runincremental(
+                    self, invalid=self._invalid, trace=self._trace
+                )
+                self._invalid = set()
 
-            for node in self.nodes:
-                self.resctx = node.run(
-                    dispatcher=self.dispatcher, ctx=self.resctx
+            else:
+                self.resctx = runplan(
+                    nodes=self.nodes, dispatcher=self.dispatcher,
+                    ctx=self.initctx(), cache=self.plans
                 )
 
         result = self.resctx
 
         return result
+
+    def invalidate(self, *names):
+        """Invalidate ctx names (node context names or schema names) for the
+        next incremental run.
+
+        :param str names: names to invalidate."""
+
+        self._invalid.update(names)
+
+    def arun(self, force=False, executor=None):
+        """Get a coroutine which executes this nodes (python 3.5+).
+
+        Independent system calls are gathered and synchronous systems are
+        offloaded to input executor.
+
+        :param bool force: force running even if resctx exist already.
+        :param concurrent.futures.Executor executor: executor where offload
+            synchronous calls. Default is the event loop default executor.
+        :return: coroutine which returns resctx."""
+
+        from ..aio import arunrequest
+
+        return arunrequest(self, force=force, executor=executor)
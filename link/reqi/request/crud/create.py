@@ -43,14 +43,30 @@ class Create(Node):
     - ref: referes to a filter for update elements. If None, this is just an
         element creation (and punset is useless)."""
 
-    __slots__ = ['content']
+    __slots__ = ['content', 'schema', 'system']
 
-    def __init__(self, content=None, *args, **kwargs):
+    def __init__(
+            self, content=None, schema=None, system=None, *args, **kwargs
+    ):
         """
         :param dict pset: properties to set. Key are property name, values are
             constant values or
+        :param str schema: written schema name.
+        :param str system: system where write the schema. If given, this is
+            delegated to the system with other writes of the same step.
         """
 
         super(Create, self).__init__(*args, **kwargs)
 
         self.content = content
+        self.schema = schema
+        self.system = system
+
+    def getsystems(self, *args, **kwargs):
+
+        result = super(Create, self).getsystems(*args, **kwargs)
+
+        if self.system:
+            result.append(self.system)
+
+        return result
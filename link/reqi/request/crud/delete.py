@@ -35,3 +35,27 @@ from ..base import Node
 
 class Delete(Node):
     """In charge of deleting data."""
+
+    __slots__ = ['schema', 'system']
+
+    def __init__(self, schema=None, system=None, *args, **kwargs):
+        """
+        :param str schema: written schema name.
+        :param str system: system where the schema is written. Without
+            filter to give to the system, this is executed on the items of
+            the execution context.
+        """
+
+        super(Delete, self).__init__(*args, **kwargs)
+
+        self.schema = schema
+        self.system = system
+
+    def getsystems(self, *args, **kwargs):
+
+        result = super(Delete, self).getsystems(*args, **kwargs)
+
+        if self.system:
+            result.append(self.system)
+
+        return result
@@ -28,25 +28,49 @@
 
 Equivalent to the SELECT statement in SQL."""
 
-__all__ = ['Read', 'Cursor']
+__all__ = ['Read', 'Cursor', 'Row', 'groupitems', 'sortitems']
+
+try:
+    from collections.abc import Mapping
+
+except ImportError:
+    from collections import Mapping
+
+from b3j0f.utils.version import OrderedDict
+
+from heapq import nlargest, nsmallest
+
+from itertools import islice, tee
+
+from operator import itemgetter
 
 from ..base import Node
+from ..extsort import externalsort
+from ..groupby import DEFAULT_MAXGROUPS, getcombiner, hashgroup
+from ..utils import materialize
 
 from six import string_types
+from six.moves import map, zip
 
 from sys import maxsize
 
 ASCENDING = 1  #: ascending sort order.
 DESCENDING = -1  #: descending sort order.
 
+DEFAULT_BATCHSIZE = 1000  #: default number of items pulled from a source.
+
 
 class Read(Node):
     """In charge of selecting data to retrieve."""
 
-    __slots__ = ['exprs', 'offset', 'limit', 'groupby', 'sort']
+    __slots__ = [
+        'exprs', 'offset', 'limit', 'groupby', 'sort', 'batchsize',
+        'aggregates', 'sortbytes'
+    ]
 
     def __init__(
             self, exprs, offset=None, limit=None, groupby=None, sort=None,
+            batchsize=DEFAULT_BATCHSIZE, aggregates=None, sortbytes=None,
             *args, **kwargs
     ):
         """
@@ -57,6 +81,13 @@ class Read(Node):
         :param int limit: maximal number of elements to retrieve.
         :param list groupby: list of expressions to groupy by.
         :param list sort: list of field to sort.
+        :param int batchsize: number of items pulled at once from lazy
+            expression results by cursors.
+        :param dict aggregates: aggregates of grouped rows by name (see
+            Read.aggregatekeys).
+        :param int sortbytes: memory budget in bytes of sorts without limit.
+            Beyond it, rows are sorted with an external merge sort. Default
+            is an in-memory sort.
         """
 
         super(Read, self).__init__(*args, **kwargs)
@@ -66,93 +97,568 @@ class Read(Node):
         self.limit = limit
         self.groupby = groupby
         self.sort = sort
+        self.batchsize = batchsize
+        self.aggregates = aggregates
+        self.sortbytes = sortbytes
 
     def cursor(self, dispatcher, ctx, *args, **kwargs):
         """Process this read method and returns a cursor.
 
+        Expression results are not materialized unless they are sorted: the
+        cursor pulls them by batch when rows are read.
+
+        Rows are grouped with a hash aggregation, then sorted, before
+        applying offset and limit. If all expressions are executed by one
+        system which has a ``rungroup`` (respectively ``runsort``) method,
+        the group-by (respectively the sort, offset and limit) is pushed
+        down to this system, unless the method returns None.
+
         :param dict ctx: execution context.
         :return: read result.
         :rtype: Cursor
         """
 
-        newctx = {}
+        sortkeys = self.sortkeys()
+        groupkeys = self.groupkeys()
+        offset = self.offset or 0
+        newctx = sortsystem = None
 
-        for expr in self.exprs:
+        if groupkeys:
+            system = self._pushsystem(dispatcher, 'rungroup')
+
+            if system is not None:
+                newctx = system.rungroup(
+                    nodes=self.exprs, groupby=groupkeys,
+                    aggregates=self.aggregatekeys(), dispatcher=dispatcher,
+                    ctx=ctx
+                )
 
-            ctxname = expr
+        elif sortkeys:
+            sortsystem = self._pushsystem(dispatcher, 'runsort')
 
-            if isinstance(expr, Node):
+            if sortsystem is not None:
+                sortctx = sortsystem.runsort(
+                    nodes=self.exprs, sort=sortkeys, offset=offset,
+                    limit=self.limit, dispatcher=dispatcher, ctx=ctx
+                )
 
-                ctx = expr.run(dispatcher=dispatcher, ctx=ctx)
-                ctxname = expr.getctxname()
+                if sortctx is None:  # sorted in memory
+                    sortsystem = None
 
-            newctx[ctxname] = ctx[ctxname]
+                else:
+                    ctx = sortctx
 
-        if self.offset or self.limit:
-            offset = self.offset or 0
-            limit = self.limit or maxsize
+        if newctx is None:
+            newctx = OrderedDict()
+
+            for expr in self.exprs:
+
+                ctxname = expr
+
+                if isinstance(expr, Node):
+
+                    ctx = expr.run(dispatcher=dispatcher, ctx=ctx)
+                    ctxname = expr.getctxname()
+
+                newctx[ctxname] = ctx[ctxname]
+
+            if groupkeys:
+                newctx = groupitems(
+                    newctx, groupkeys, self.aggregatekeys()
+                )
+
+        if sortsystem is not None:  # already sorted and sliced
+            pass
+
+        elif sortkeys:
+            newctx = sortitems(
+                newctx, sortkeys, offset, self.limit, self.sortbytes
+            )
+
+        elif offset or self.limit:
+            stop = maxsize if self.limit is None else offset + self.limit
 
             for key in list(newctx):
-                newctx[key] = newctx[key][offset:offset+limit+1]
+                if _issequence(newctx[key]):
+                    newctx[key] = newctx[key][offset:stop]
+
+                else:
+                    newctx[key] = islice(newctx[key], offset, stop)
+
+        result = Cursor(ctx=newctx, batchsize=self.batchsize)
+
+        return result
+
+    def sortkeys(self):
+        """Get normalized sort keys.
+
+        A sort key is a pair of field and direction (ASCENDING by default).
+        A field is an expression (or its ctx name) in which case rows are
+        sorted by the expression items, or a property of items of the first
+        expression.
+
+        :return: list of (field name, direction).
+        :rtype: list"""
+
+        result = []
+
+        for sortp in self.sort or ():
+            if isinstance(sortp, (string_types, Node)):
+                sortp = (sortp, ASCENDING)
+
+            field, direction = sortp
+
+            if isinstance(field, Node):
+                field = field.getctxname()
+
+            result.append((field, direction))
+
+        return result
+
+    def groupkeys(self):
+        """Get names of fields to group by.
+
+        A field is an expression (or its ctx name) or a property of items of
+        the first expression.
+
+        :rtype: list"""
+
+        return [
+            field.getctxname() if isinstance(field, Node) else field
+            for field in self.groupby or ()
+        ]
+
+    def aggregatekeys(self):
+        """Get normalized aggregates.
+
+        An aggregate is a combiner (or a combiner name such as 'count',
+        'sum', 'min', 'max', 'mean', 'first' or 'last'), or a pair of
+        combiner and field. A field is resolved like group-by fields. Without
+        field, the combiner aggregates rows (for counting them).
+
+        :return: list of (aggregate name, Combiner, field name).
+        :rtype: list"""
 
-        if self.groupby:
-            raise NotImplementedError()
+        result = []
+        aggregates = self.aggregates or {}
 
-        if self.sort:
-            for sortp in self.sort:
-                if isinstance(sortp, string_types):
-                    sortp = (sortp, ASCENDING)
+        for name in sorted(aggregates):
+            aggregate = aggregates[name]
 
-                for key in list(newctx):
-                    newctx[key] = sorted(
-                        newctx[key], key=sortp[0], reverse=sortp==DESCENDING
-                    )
+            if isinstance(aggregate, (tuple, list)):
+                combiner, field = aggregate
 
-        result = Cursor(ctx=newctx)
+            else:
+                combiner, field = aggregate, None
+
+            if isinstance(field, Node):
+                field = field.getctxname()
+
+            result.append((name, getcombiner(combiner), field))
 
         return result
 
+    def _pushsystem(self, dispatcher, method):
+        """Get the system which executes all expressions if it has input
+        method."""
+
+        result = None
+
+        systems = set()
+
+        for expr in self.exprs:
+            if not isinstance(expr, Node):
+                break
+
+            systems.update(expr.getsystems())
+
+        else:
+            if len(systems) == 1:
+                system = dispatcher.systems[systems.pop()]
+
+                if hasattr(system, method):
+                    result = system
+
+        return result
+
+
+def groupitems(ctx, groupkeys, aggregates, maxgroups=DEFAULT_MAXGROUPS):
+    """Group and aggregate rows of input ctx items.
+
+    :param dict ctx: items by name. Items of the same index form a row.
+    :param list groupkeys: names of fields to group by (see Read.groupkeys).
+    :param list aggregates: list of (name, Combiner, field) (see
+        Read.aggregatekeys).
+    :param int maxgroups: maximal number of groups in memory.
+    :return: group-by field values and aggregated values by name.
+    :rtype: OrderedDict"""
+
+    names = list(ctx)
+    rows = zip(*[materialize(ctx[name]) for name in names])
+
+    groups = hashgroup(
+        rows, [_getter(names, field) for field in groupkeys],
+        [
+            (
+                combiner,
+                _row if field is None else _getter(names, field)
+            )
+            for _, combiner, field in aggregates
+        ],
+        maxgroups=maxgroups
+    )
+
+    result = OrderedDict(
+        (name, []) for name in groupkeys + [name for name, _, _ in aggregates]
+    )
+    columns = list(result.values())
+
+    for key, values in groups:
+        for column, value in zip(columns, key + tuple(values)):
+            column.append(value)
+
+    return result
+
+
+def _row(row):
+    """Get a row as a value to aggregate."""
+
+    return row
+
+
+def sortitems(ctx, sortkeys, offset=0, limit=None, maxbytes=None):
+    """Sort rows of input ctx items with one composite key.
+
+    With a limit, only the first offset + limit rows are selected with a
+    heap instead of sorting all rows. Otherwise, with a memory budget, rows
+    are sorted with an external merge sort and sorted items are streamed.
+
+    :param dict ctx: items by name. Items of the same index form a row.
+    :param list sortkeys: list of (field, direction) (see Read.sortkeys).
+    :param int offset: number of sorted rows to skip.
+    :param int limit: maximal number of rows.
+    :param int maxbytes: memory budget of the external merge sort. Default
+        is an in-memory sort.
+    :return: sorted items by name.
+    :rtype: OrderedDict"""
+
+    names = list(ctx)
+
+    getters = [_getter(names, field) for field, _ in sortkeys]
+    descending = [direction == DESCENDING for _, direction in sortkeys]
+
+    def key(row):
+        return tuple(
+            _value(getter(row), reverse=reverse, wrap=reverse)
+            for getter, reverse in zip(getters, descending)
+        )
+
+    if maxbytes is not None and limit is None:
+        rows = zip(*[iter(ctx[name]) for name in names])
+        rows = islice(externalsort(rows, key, maxbytes), offset, None)
+
+        result = OrderedDict(
+            (name, map(itemgetter(index), column)) for index, (name, column)
+            in enumerate(zip(names, tee(rows, len(names))))
+        )
+
+    else:
+        rows = zip(*[materialize(ctx[name]) for name in names])
+
+        if all(descending):  # natural order of values and reversed selection
+            def key(row):
+                return tuple(
+                    _value(getter(row), reverse=True) for getter in getters
+                )
+
+            if limit is None:
+                rows = sorted(rows, key=key, reverse=True)
+
+            else:
+                rows = nlargest(offset + limit, rows, key=key)
+
+        elif limit is None:
+            rows = sorted(rows, key=key)
+
+        else:
+            rows = nsmallest(offset + limit, rows, key=key)
+
+        columns = list(zip(*rows[offset:])) or [()] * len(names)
+
+        result = OrderedDict(
+            (name, list(column)) for name, column in zip(names, columns)
+        )
+
+    return result
+
+
+def _getter(names, field):
+    """Get a function which returns the value of input field in a row."""
+
+    if field in names:
+        result = itemgetter(names.index(field))
+
+    else:
+        def result(row):
+            item = row[0]
+
+            if isinstance(item, Mapping):
+                value = item.get(field)
+
+            else:
+                value = getattr(item, field, None)
+
+            return value
+
+    return result
+
+
+def _value(value, reverse=False, wrap=False):
+    """Get a comparable value where None is sorted after other values.
+
+    :param bool reverse: values are sorted in descending order.
+    :param bool wrap: reverse the order of not None values.
+    :rtype: tuple"""
+
+    if wrap:
+        result = value is None, _Reversed(value)
+
+    else:
+        result = (value is not None) if reverse else (value is None), value
+
+    return result
+
+
+class _Reversed(object):
+    """Value with a reversed order."""
+
+    __slots__ = ['value']
+
+    def __init__(self, value, *args, **kwargs):
+
+        super(_Reversed, self).__init__(*args, **kwargs)
+
+        self.value = value
+
+    def __lt__(self, other):
+
+        return other.value < self.value
+
+    def __eq__(self, other):
+
+        return self.value == other.value
+
+    def __ne__(self, other):
+
+        return not self == other
+
+
+def _issequence(items):
+    """True if input items are sized and indexable."""
+
+    return (
+        hasattr(items, '__len__') and hasattr(items, '__getitem__') and
+        not isinstance(items, (Mapping, string_types))
+    )
+
 
 class Cursor(object):
-    """Read object processing result."""
+    """Read object processing result.
+
+    Rows are read views on items of the same index in ctx values. Values
+    which are not sequences (lazy pipelines, iterators) are streamed in
+    buffers, by batch of items and only when rows are read. The length is
+    computed once.
+
+    While rows are iterated, buffers only keep items from the current row:
+    previous rows keep their own items. Buffers keep all pulled items once
+    rows are read by index or the length is requested, and rows released
+    before can not be read by index anymore."""
 
-    __slots__ = ['_ctx', '_index', '_len']
+    __slots__ = [
+        'batchsize', '_columns', '_offsets', '_sources', '_index', '_len',
+        '_buffered'
+    ]
 
-    def __init__(self, ctx, *args, **kwargs):
+    def __init__(self, ctx, batchsize=DEFAULT_BATCHSIZE, *args, **kwargs):
+        """
+        :param dict ctx: items by name.
+        :param int batchsize: number of items pulled at once from sources
+            which are not sequences. If None, sources are pulled item by item.
+        """
 
         super(Cursor, self).__init__(*args, **kwargs)
 
-        self._ctx = ctx
+        self.batchsize = batchsize
+        self._columns = {}  # readable items by name
+        self._offsets = {}  # row index of first buffered items by name
+        self._sources = {}  # iterators of streamed items by name
         self._index = 0
         self._len = None
+        self._buffered = False  # True if buffers keep all pulled items
 
-    def __len__(self):
+        for name in ctx:
+            items = ctx[name]
+
+            if _issequence(items):
+                self._columns[name] = items
+
+            else:
+                self._columns[name] = []
+                self._offsets[name] = 0
+                self._sources[name] = iter(items)
+
+        if not self._sources:
+            self._setlen()
+
+    def _count(self, name):
+        """Get the number of items read of input name."""
+
+        return self._offsets.get(name, 0) + len(self._columns[name])
+
+    def _setlen(self):
+        """Set the length if all sources are consumed."""
+
+        lengths = [self._count(name) for name in self._columns]
 
-        result = self._len
+        self._len = min(lengths) if lengths else 0
 
-        if result is None:
-            result = maxsize if self._ctx else 0
+    def _release(self):
+        """Release buffered items of rows before the current row.
 
-            for key in self._ctx:
-                result = min(result, len(self._ctx[key]))
+        Buffers are replaced, so that rows read before keep their items."""
+
+        columns = dict(self._columns)
+        offsets = {}
+
+        for name, offset in self._offsets.items():
+            columns[name] = columns[name][self._index - offset:]
+            offsets[name] = self._index
+
+        self._columns, self._offsets = columns, offsets
+
+    def _fetch(self, count):
+        """Pull source items until all columns have input count of items or
+        a source is consumed.
+
+        :param int count: number of items to read.
+        :return: True if all columns have input count of items.
+        :rtype: bool"""
+
+        result = True
+
+        if self._len is not None:
+            result = count <= self._len
+
+        else:
+            if not self._buffered and any(
+                    self._count(name) < count for name in self._sources
+            ):
+                self._release()
+
+            for name in list(self._sources):
+                items = self._columns[name]
+                needed = count - self._count(name)
+
+                if needed > 0:
+                    if self.batchsize:  # round up to a batch number
+                        needed = -(-needed // self.batchsize) * self.batchsize
+
+                    pulled = len(items)
+                    items.extend(islice(self._sources[name], needed))
+
+                    if len(items) - pulled < needed:  # source consumed
+                        del self._sources[name]
+                        result = result and self._count(name) >= count
+
+            if not self._sources:
+                self._setlen()
+                result = count <= self._len
+
+            elif result:
+                result = all(
+                    self._count(name) >= count for name in self._columns
+                )
+
+                if not result:  # a sequence is shorter than count
+                    self._setlen()
 
         return result
 
+    def __len__(self):
+
+        if self._len is None:
+            self._buffered = True
+            size = self.batchsize or 1
+
+            while self._len is None and self._fetch(size):
+                size *= 2
+
+            if self._len is None:
+                self._setlen()
+
+        return self._len
+
     def __getitem__(self, key):
 
-        result = {}
+        self._buffered = True
 
-        for name in self._ctx:
-            result[name] = self._ctx[name][key]
+        if isinstance(key, slice):
+            result = [self[index] for index in range(*key.indices(len(self)))]
+
+        else:
+            if key < 0:
+                key += len(self)
+
+            if (
+                    key < max(self._offsets.values() or [0]) or
+                    not self._fetch(key + 1)
+            ):
+                raise IndexError(key)
+
+            result = Row(self._columns, key, self._offsets)
 
         return result
 
     def __iter__(self):
 
-        while self._index < len(self):
+        while self._fetch(self._index + 1):
 
-            yield self.__getitem__(self._index)
+            yield Row(self._columns, self._index, self._offsets)
 
             self._index += 1
 
-        raise StopIteration()
+
+class Row(Mapping):
+    """Read view on items of a cursor row."""
+
+    __slots__ = ['_columns', '_index', '_offsets']
+
+    def __init__(self, columns, index, offsets=None, *args, **kwargs):
+        """
+        :param dict columns: items by name.
+        :param int index: row index.
+        :param dict offsets: row index of first items by name. Default is 0.
+        """
+
+        super(Row, self).__init__(*args, **kwargs)
+
+        self._columns = columns
+        self._index = index
+        self._offsets = {} if offsets is None else offsets
+
+    def __getitem__(self, name):
+
+        return self._columns[name][self._index - self._offsets.get(name, 0)]
+
+    def __iter__(self):
+
+        return iter(self._columns)
+
+    def __len__(self):
+
+        return len(self._columns)
+
+    def __repr__(self):
+
+        return repr(dict(self))
@@ -30,7 +30,8 @@ from unittest import main
 
 from b3j0f.utils.ut import UTCase
 
-from ..read import Read
+from ..read import Read, Cursor, Row, ASCENDING, DESCENDING
+from ...expr.base import Expression
 from ...base import Node
 from ...test.base import TestNode
 
@@ -76,25 +77,275 @@ class TestRead(UTCase):
 
     def test_offset_limit(self):
 
-        nodes = [TestNode(alias='test') for i in range(5)]
-
-        ctx = {}
-
-        for node in nodes:
-            node.run(ctx=ctx, dispatcher=None)
+        ctx = {'test': [{'count': i} for i in range(5)]}
 
         read = Read(exprs=['test'], offset=1, limit=2)
 
         cursor = read.cursor(ctx=ctx, dispatcher=None)
 
-        self.assertEqual(len(cursor), 3)
+        self.assertEqual(len(cursor), 2)
 
         items = iter(cursor)
 
-        for i in range(1, 4):
+        for i in range(1, 3):
             item = next(items)
 
             self.assertEqual(item['test']['count'], i)
 
+    def test_sort(self):
+
+        ctx = {
+            'a': [{'x': 1, 'y': 2}, {'x': 0, 'y': 1}, {'x': 1, 'y': 3}],
+            'b': ['first', 'second', 'third']
+        }
+
+        read = Read(exprs=['a', 'b'], sort=['x', ('y', DESCENDING)])
+
+        cursor = read.cursor(ctx=ctx, dispatcher=None)
+
+        self.assertEqual(
+            [row['b'] for row in cursor], ['second', 'third', 'first']
+        )
+
+    def test_topk(self):
+
+        ctx = {'a': [5, 3, None, 1, 4, 2]}
+
+        for sort, expected in [
+                (['a'], [2, 3]), ([('a', DESCENDING)], [4, 3])
+        ]:
+            read = Read(exprs=['a'], sort=sort, offset=1, limit=2)
+
+            cursor = read.cursor(ctx=ctx, dispatcher=None)
+
+            self.assertEqual([row['a'] for row in cursor], expected)
+
+    def test_externalsort(self):
+
+        ctx = {
+            'a': iter([{'x': 3}, {'x': 1}, {'x': 2}, {'x': None}]),
+            'b': ['c', 'a', 'b', 'none']
+        }
+
+        read = Read(
+            exprs=['a', 'b'], sort=[('x', DESCENDING)], offset=1,
+            sortbytes=10
+        )
+
+        cursor = read.cursor(ctx=ctx, dispatcher=None)
+
+        self.assertEqual([row['b'] for row in cursor], ['b', 'a', 'none'])
+
+    def test_nonelast(self):
+
+        read = Read(exprs=['a'], sort=['a'])
+
+        cursor = read.cursor(ctx={'a': [None, 1, 0]}, dispatcher=None)
+
+        self.assertEqual([row['a'] for row in cursor], [0, 1, None])
+
+    def test_groupby(self):
+
+        ctx = {
+            'a': [
+                {'k': 'x', 'v': 1}, {'k': 'y', 'v': 2}, {'k': 'x', 'v': 3},
+                {'k': 'y', 'v': None}
+            ]
+        }
+
+        read = Read(
+            exprs=['a'], groupby=['k'], sort=[('total', DESCENDING)],
+            aggregates={
+                'n': 'count', 'total': ('sum', 'v'), 'mean': ('mean', 'v'),
+                'first': ('first', 'v'), 'last': ('last', 'v')
+            }
+        )
+
+        cursor = read.cursor(ctx=ctx, dispatcher=None)
+
+        self.assertEqual(
+            list(map(dict, cursor)),
+            [
+                {
+                    'k': 'x', 'n': 2, 'total': 4, 'mean': 2., 'first': 1,
+                    'last': 3
+                },
+                {
+                    'k': 'y', 'n': 2, 'total': 2, 'mean': 2., 'first': 2,
+                    'last': 2
+                }
+            ]
+        )
+
+    def test_grouppushdown(self):
+
+        class GroupSystem(object):
+
+            def rungroup(self, nodes, groupby, aggregates, dispatcher, ctx):
+                self.args = groupby, [
+                    (name, combiner.name, field)
+                    for name, combiner, field in aggregates
+                ]
+                return {'k': ['x'], 'n': [2]}
+
+        class GroupDispatcher(object):
+            systems = {'s': GroupSystem()}
+
+        read = Read(
+            exprs=[Expression(system='s', schema='a')], groupby=['k'],
+            aggregates={'n': 'count'}
+        )
+
+        dispatcher = GroupDispatcher()
+        cursor = read.cursor(ctx={}, dispatcher=dispatcher)
+
+        self.assertEqual(list(map(dict, cursor)), [{'k': 'x', 'n': 2}])
+        self.assertEqual(
+            dispatcher.systems['s'].args, (['k'], [('n', 'count', None)])
+        )
+
+    def test_pushdown(self):
+
+        class SortSystem(object):
+
+            def runsort(self, nodes, sort, offset, limit, dispatcher, ctx):
+                self.args = sort, offset, limit
+                ctx[nodes[0].getctxname()] = [2, 1]
+                return ctx
+
+        class SortDispatcher(object):
+            systems = {'s': SortSystem()}
+
+        expr = Expression(system='s', schema='a')
+        read = Read(exprs=[expr], sort=[expr], offset=1, limit=2)
+
+        dispatcher = SortDispatcher()
+        cursor = read.cursor(ctx={}, dispatcher=dispatcher)
+
+        self.assertEqual([row[expr.getctxname()] for row in cursor], [2, 1])
+        self.assertEqual(
+            dispatcher.systems['s'].args,
+            ([(expr.getctxname(), ASCENDING)], 1, 2)
+        )
+
+    def test_pushdownfallback(self):
+
+        class MemorySystem(object):
+
+            def runsort(self, nodes, sort, offset, limit, dispatcher, ctx):
+                return None
+
+        class SortDispatcher(object):
+            systems = {'s': MemorySystem()}
+
+        expr = Expression(system='s', schema='a')
+        read = Read(exprs=[expr], sort=[expr], offset=1, limit=2)
+
+        cursor = read.cursor(
+            ctx={expr.getctxname(): [3, 1, 4, 2]}, dispatcher=SortDispatcher()
+        )
+
+        self.assertEqual([row[expr.getctxname()] for row in cursor], [2, 3])
+
+    def test_stream(self):
+
+        pulled = []
+
+        def source():
+            for i in range(10):
+                pulled.append(i)
+                yield i
+
+        read = Read(exprs=['items'], limit=2, batchsize=2)
+
+        cursor = read.cursor(ctx={'items': source()}, dispatcher=None)
+
+        self.assertEqual(cursor[0], {'items': 0})
+        self.assertEqual(pulled, [0, 1])
+
+
+class CursorTest(UTCase):
+
+    def counter(self, count):
+
+        self.pulled = 0
+
+        for i in range(count):
+            self.pulled += 1
+            yield i
+
+    def test_iter(self):
+
+        cursor = Cursor(ctx={'a': [1, 2], 'b': [3, 4, 5]})
+
+        self.assertEqual(
+            list(map(dict, cursor)), [{'a': 1, 'b': 3}, {'a': 2, 'b': 4}]
+        )
+        self.assertEqual(list(cursor), [])
+
+    def test_len(self):
+
+        cursor = Cursor(ctx={'a': [1, 2], 'b': self.counter(10)}, batchsize=4)
+
+        self.assertEqual(len(cursor), 2)
+        self.assertEqual(self.pulled, 4)
+
+    def test_lenstream(self):
+
+        cursor = Cursor(ctx={'a': self.counter(10)}, batchsize=4)
+
+        self.assertEqual(len(cursor), 10)
+        self.assertEqual(len(cursor), 10)
+        self.assertEqual(cursor[-1], {'a': 9})
+
+    def test_batch(self):
+
+        cursor = Cursor(ctx={'a': self.counter(100)}, batchsize=10)
+
+        self.assertEqual(cursor[4]['a'], 4)
+        self.assertEqual(self.pulled, 10)
+        self.assertEqual(cursor[15]['a'], 15)
+        self.assertEqual(self.pulled, 20)
+
+    def test_release(self):
+
+        cursor = Cursor(ctx={'a': self.counter(100)}, batchsize=10)
+        rows = []
+
+        for row in cursor:
+            rows.append(row)
+            # only the current batch is buffered
+            self.assertLessEqual(len(cursor._columns['a']), 10)
+
+            if len(rows) == 25:
+                break
+
+        self.assertEqual([row['a'] for row in rows], list(range(25)))
+        self.assertRaises(IndexError, cursor.__getitem__, 0)
+        self.assertEqual(cursor[24]['a'], 24)
+        self.assertEqual(len(cursor), 100)
+        self.assertEqual(cursor[99]['a'], 99)
+
+    def test_index(self):
+
+        cursor = Cursor(ctx={'a': self.counter(3)})
+
+        self.assertRaises(IndexError, cursor.__getitem__, 3)
+        self.assertEqual([row['a'] for row in cursor[1:]], [1, 2])
+
+    def test_row(self):
+
+        items = [{'count': 0}]
+        row = Cursor(ctx={'a': items})[0]
+
+        self.assertIsInstance(row, Row)
+        self.assertIs(row['a'], items[0])
+        self.assertEqual(list(row), ['a'])
+
+    def test_empty(self):
+
+        self.assertEqual(len(Cursor(ctx={})), 0)
+
+
 if __name__ == '__main__':
     main()
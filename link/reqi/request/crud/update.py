@@ -45,13 +45,20 @@ class Update(Node):
     - ref: referes to a filter for update elements. If None, this is just an
         element creation (and punset is useless)."""
 
-    __slots__ = ['pset', 'punset']
+    __slots__ = ['pset', 'punset', 'schema', 'system']
 
-    def __init__(self, pset=None, punset=None, *args, **kwargs):
+    def __init__(
+            self, pset=None, punset=None, schema=None, system=None,
+            *args, **kwargs
+    ):
         """
         :param dict pset: properties to set. Key are property name, values are
             constant values or
         :param list punset: property names to unset.
+        :param str schema: written schema name.
+        :param str system: system where the schema is written. Without
+            filter to give to the system, this is executed on the items of
+            the execution context.
         :param ref: refers to a filter (function) or an alias of a filter.
         """
 
@@ -59,6 +66,17 @@ class Update(Node):
 
         self.pset = pset or {}
         self.punset = punset or {}
+        self.schema = schema
+        self.system = system
+
+    def getsystems(self, *args, **kwargs):
+
+        result = super(Update, self).getsystems(*args, **kwargs)
+
+        if self.system:
+            result.append(self.system)
+
+        return result
 
     @property
     def create(self):
@@ -0,0 +1,293 @@
+# -*- coding: utf-8 -*-
+
+# --------------------------------------------------------------------
+# The MIT License (MIT)
+#
+# Copyright (c) 2016 Jonathan Labéjof <jonathan.labejof@gmail.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+# --------------------------------------------------------------------
+
+"""Specification of layered execution contexts.
+
+A context is a chain of layers where the first layer is the only one to be
+written. Copying a context freezes its written layer and shares the frozen
+layers with the copy, in O(1) instead of O(context size). Values are shared
+such as with dict.copy, so values are replaced rather than mutated."""
+
+__all__ = ['Context', 'TrackingContext', 'layer', 'written']
+
+try:
+    from collections.abc import Mapping, MutableMapping
+
+except ImportError:
+    from collections import Mapping, MutableMapping
+
+MAXDEPTH = 32  #: maximal number of layers before flattening a copy.
+
+_DELETED = object()  #: tombstone of deleted names in a layer.
+
+
+class Context(MutableMapping):
+    """Layered execution context."""
+
+    __slots__ = ['maps']
+
+    def __init__(self, data=None, maps=None, *args, **kwargs):
+        """
+        :param dict data: initial values.
+        :param list maps: layers where the first one is written. Other layers
+            must not be modified.
+        """
+
+        super(Context, self).__init__(*args, **kwargs)
+
+        self.maps = [{}] if maps is None else maps
+
+        if data is not None:
+            self.update(data)
+
+    def __getitem__(self, key):
+
+        for layer in self.maps:
+            if key in layer:
+                result = layer[key]
+
+                if result is _DELETED:
+                    break
+
+                return result
+
+        raise KeyError(key)
+
+    def __contains__(self, key):
+
+        result = False
+
+        for layer in self.maps:
+            if key in layer:
+                result = layer[key] is not _DELETED
+                break
+
+        return result
+
+    def get(self, key, default=None):
+
+        return self[key] if key in self else default
+
+    def __setitem__(self, key, value):
+
+        self.maps[0][key] = value
+
+    def __delitem__(self, key):
+
+        if key not in self:
+            raise KeyError(key)
+
+        if len(self.maps) == 1:
+            del self.maps[0][key]
+
+        else:
+            self.maps[0][key] = _DELETED
+
+    def __iter__(self):
+
+        found = set()
+
+        for layer in self.maps:
+            for key in layer:
+                if key not in found:
+                    found.add(key)
+
+                    if layer[key] is not _DELETED:
+                        yield key
+
+    def __len__(self):
+
+        return sum(1 for _ in self)
+
+    def __repr__(self):
+
+        return 'Context({0})'.format(dict(self))
+
+    def local(self):
+        """Get names and values written in this context since its last copy.
+
+        Deleted names are not returned.
+
+        :rtype: dict"""
+
+        return dict(
+            (key, value) for key, value in self.maps[0].items()
+            if value is not _DELETED
+        )
+
+    def freeze(self):
+        """Freeze written values and get layers to share.
+
+        :rtype: list"""
+
+        if self.maps[0]:
+            self.maps.insert(0, {})
+
+        if len(self.maps) > MAXDEPTH:  # flatten frozen layers
+            self.maps[1:] = [dict(Context(maps=[{}] + self.maps[1:]))]
+
+        return self.maps[1:]
+
+    def copy(self):
+        """Get a copy in O(1) time which shares frozen layers with this.
+
+        :rtype: Context"""
+
+        return Context(maps=[{}] + self.freeze())
+
+
+class TrackingContext(Context):
+    """Context which records names read and written between two commits.
+
+    Copies share records of this."""
+
+    __slots__ = ['reads', 'writes']
+
+    def __init__(
+            self, data=None, maps=None, reads=None, writes=None,
+            *args, **kwargs
+    ):
+        """
+        :param set reads: read names.
+        :param set writes: written names.
+        """
+
+        self.reads = set() if reads is None else reads
+        self.writes = set() if writes is None else writes
+
+        super(TrackingContext, self).__init__(
+            data=data, maps=maps, *args, **kwargs
+        )
+
+    def __getitem__(self, key):
+
+        self.reads.add(key)
+
+        return super(TrackingContext, self).__getitem__(key)
+
+    def __contains__(self, key):
+
+        self.reads.add(key)
+
+        return super(TrackingContext, self).__contains__(key)
+
+    def __setitem__(self, key, value):
+
+        self.writes.add(key)
+
+        super(TrackingContext, self).__setitem__(key, value)
+
+    def __delitem__(self, key):
+
+        self.writes.add(key)
+
+        super(TrackingContext, self).__delitem__(key)
+
+    def copy(self):
+
+        return TrackingContext(
+            maps=[{}] + self.freeze(), reads=self.reads, writes=self.writes
+        )
+
+    def commit(self):
+        """Get and reset names read and written since the last commit.
+
+        :return: read and written names.
+        :rtype: tuple"""
+
+        result = frozenset(self.reads), frozenset(self.writes)
+
+        self.reads.clear()
+        self.writes.clear()
+
+        return result
+
+
+def layer(*ctxs):
+    """Get a new context which reads input ctxs in order.
+
+    :param ctxs: contexts or mappings. The first one has the priority.
+    :rtype: Context"""
+
+    maps = [{}]
+
+    for ctx in ctxs:
+        if isinstance(ctx, Context):
+            maps += ctx.freeze()
+
+        elif ctx is not None:
+            maps.append(ctx)
+
+    return Context(maps=maps)
+
+
+def written(ctx, pctx):
+    """Get names and values written in pctx since it was copied from ctx.
+
+    Layers of a Context copy are read until the first layer frozen by ctx,
+    so that layers pushed by inner copies of pctx are written values too.
+    Other contexts are compared by value identity. Deleted names are not
+    returned.
+
+    :param dict ctx: copied context. It must not be written since the copy.
+    :param dict pctx: copy of ctx.
+    :return: written names and values.
+    :rtype: list"""
+
+    result = None
+
+    if isinstance(ctx, Context) and isinstance(pctx, Context):
+        base = ctx.maps[1] if len(ctx.maps) > 1 else None
+        layers = []
+
+        for _layer in pctx.maps:
+            if _layer is base:
+                break
+
+            layers.append(_layer)
+
+        else:  # layers of ctx have been flattened in pctx
+            if base is not None:
+                layers = None
+
+        if layers is not None:
+            values = {}
+
+            for _layer in reversed(layers):
+                values.update(_layer)
+
+            result = [
+                (name, value) for name, value in values.items()
+                if value is not _DELETED
+            ]
+
+    if result is None:
+        result = [
+            (name, value) for name, value in pctx.items()
+            if name not in ctx or ctx[name] is not value
+        ]
+
+    return result
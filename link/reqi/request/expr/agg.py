@@ -0,0 +1,260 @@
+# -*- coding: utf-8 -*-
+
+# --------------------------------------------------------------------
+# The MIT License (MIT)
+#
+# Copyright (c) 2016 Jonathan Labéjof <jonathan.labejof@gmail.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+# --------------------------------------------------------------------
+
+"""Specification of aggregate functions.
+
+An aggregate function reduces values of its expression parameter to one
+value with a mergeable combiner (see the groupby module) in two phases:
+
+- a partial state is computed by systems hosting the expression schema. If
+  the schema is partitioned (see the dispatcher ``partitioned`` schemas),
+  each system computes the state of its partition, with the dispatcher
+  executor. Otherwise systems are replicas, so the cheapest one is called if
+  the dispatcher has a cost model, and others are tried if it fails. A
+  system which has a ``runpartial`` method computes the state itself (for
+  example with a mongo $group stage), otherwise its items are fetched and
+  reduced locally.
+- partial states are merged in the system order and the aggregated value is
+  saved in the execution context under the function context name.
+
+If schema items are already in the execution context, they are reduced
+without system calls."""
+
+__all__ = [
+    'Aggregate', 'Count', 'Sum', 'Min', 'Max', 'Mean', 'First', 'Last'
+]
+
+from .base import Expression
+from .func import Function
+
+from ..base import Ref
+from ..groupby import COMBINERS
+from ..utils import materialize
+
+
+class Aggregate(Function):
+    """Aggregate function of the items of its expression parameter.
+
+    Values are item properties named by the expression property, or items
+    themselves if the expression has no property."""
+
+    combiner = None  #: groupby Combiner.
+
+    pure = True
+
+    def _expr(self):
+        """Get the expression param (resolved if it is a reference).
+
+        :rtype: Expression"""
+
+        result = self.params[0]
+
+        if isinstance(result, Ref):
+            result = result.ref
+
+        return result
+
+    def values(self, items, expr=None):
+        """Get values to aggregate from input items.
+
+        :param Iterable items: schema items.
+        :param Expression expr: expression param. Default is resolved.
+        :rtype: Iterable"""
+
+        if expr is None:
+            expr = self._expr()
+
+        prop = expr.prop
+
+        if prop == type(expr).__name__:  # default property
+            result = items
+
+        else:
+            result = (item.get(prop) for item in items)
+
+        return result
+
+    def partial(self, items, expr=None):
+        """Get the partial state of input items.
+
+        :param Iterable items: schema items.
+        :param Expression expr: expression param. Default is resolved.
+        :return: combiner state."""
+
+        combiner = self.combiner
+        result = combiner.init()
+
+        for value in self.values(items, expr):
+            result = combiner.add(result, value)
+
+        return result
+
+    def merge(self, states):
+        """Merge partial states in order.
+
+        :param list states: partial states.
+        :return: combiner state."""
+
+        combiner = self.combiner
+        result = combiner.init()
+
+        for state in states:
+            result = combiner.merge(result, state)
+
+        return result
+
+    def result(self, state):
+        """Get the aggregated value of a state."""
+
+        return self.combiner.result(state)
+
+    def _run(self, dispatcher, ctx):
+
+        if isinstance(self.params[0], Ref):
+            ctx = self.params[0].run(dispatcher=dispatcher, ctx=ctx)
+
+        expr = self._expr()
+
+        if expr.schema in ctx or dispatcher is None:
+            states = [
+                self.partial(materialize(ctx.get(expr.schema) or ()), expr)
+            ]
+
+        else:
+            if expr.system is None:
+                systems, _ = dispatcher.getsystemswithschemas(
+                    schema=expr.schema
+                )
+
+            else:
+                systems = [expr.system]
+
+            def partial(name):  # on a ctx copy, without writing items
+                return self._syspartial(name, expr, dispatcher, ctx.copy())
+
+            cost = getattr(dispatcher, 'cost', None)
+            executor = getattr(dispatcher, 'executor', None)
+            partitioned = expr.system is None and expr.schema in (
+                getattr(dispatcher, 'partitioned', None) or ()
+            )
+
+            if not systems:
+                states = []
+
+            elif partitioned and executor is not None:
+                states = executor.map(partial, systems)
+
+            elif partitioned:
+                states = [partial(name) for name in systems]
+
+            elif cost is None:
+                states = [partial(systems[0])]
+
+            else:
+                states = [cost.call(systems, partial, names=[])]
+
+        ctx[self.getctxname()] = self.result(self.merge(states))
+
+        return ctx
+
+    def _syspartial(self, name, expr, dispatcher, ctx):
+        """Get the partial state computed with one system.
+
+        :param str name: system name.
+        :param Expression expr: expression param.
+        :param b3j0f.reqi.dispatch.Dispatcher dispatcher: dispatcher.
+        :param dict ctx: execution context copy for this call.
+        :return: combiner state."""
+
+        system = dispatcher.systems[name]
+        sysexpr = Expression(system=name, schema=expr.schema, prop=expr.prop)
+
+        if hasattr(system, 'runpartial'):
+            result = system.runpartial(
+                node=self, expr=sysexpr, dispatcher=dispatcher, ctx=ctx
+            )
+
+        else:
+            def run(ctx):
+                return system.run(
+                    nodes=[sysexpr], dispatcher=dispatcher, ctx=ctx
+                )
+
+            cache = getattr(dispatcher, 'cache', None)
+
+            if cache is None:
+                ctx = run(ctx) or ctx
+
+            else:
+                ctx = cache.call(name, [sysexpr], ctx, run)
+
+            result = self.partial(
+                materialize(ctx.get(expr.schema) or ()), expr
+            )
+
+        return result
+
+
+class Count(Aggregate):
+    """Count not None values."""
+
+    combiner = COMBINERS['count']
+
+
+class Sum(Aggregate):
+    """Sum values."""
+
+    combiner = COMBINERS['sum']
+
+
+class Min(Aggregate):
+    """Minimal value."""
+
+    combiner = COMBINERS['min']
+
+
+class Max(Aggregate):
+    """Maximal value."""
+
+    combiner = COMBINERS['max']
+
+
+class Mean(Aggregate):
+    """Mean of values."""
+
+    combiner = COMBINERS['mean']
+
+
+class First(Aggregate):
+    """First value."""
+
+    combiner = COMBINERS['first']
+
+
+class Last(Aggregate):
+    """Last value."""
+
+    combiner = COMBINERS['last']
@@ -51,14 +51,16 @@ class Expression(Node):
         self.schema = schema
         self.prop = prop or type(self).__name__
 
-    def getctxname(self, *args, **kwargs):
+    def _structname(self):
 
-        result = super(Expression, self).getctxname(*args, **kwargs)
+        result = getctxname(
+            system=self.system, schema=self.schema, prop=self.prop
+        )
 
-        if self.alias is None:
-            result = getctxname(
-                system=self.system, schema=self.schema, prop=self.prop
-            )
+        state = self._statename(Expression)
+
+        if state:
+            result = '{0}[{1}]'.format(result, state)
 
         return result
 
@@ -29,19 +29,28 @@
 __all__ = ['Function', 'PropertyFunction']
 
 from .base import Expression
-from ..base import Node
+from .utils import getctxname
+from ..base import Node, statename
 from ..utils import updateitems
-
-__STACK__ = '__STACK__'  #: stack of function by parents
+from ..plan import runplan
 
 
 class Function(Expression):
     """Function request object.
 
-    The function name is the expression property name."""
+    The function name is the expression property name.
+
+    Functions with an operator name are predicates that the execution plan
+    pushes down to a system when all their inputs come from this system."""
 
     __slots__ = ['params', 'rtype']
 
+    opname = None  #: predicate operator name.
+
+    #: True if the result is only written under the context name, so that
+    #: equal functions are executed once (see plan common subexpressions).
+    pure = False
+
     def __init__(self, params=None, rtype=None, *args, **kwargs):
         """
         :param list params: list of values.
@@ -67,94 +76,35 @@ class Function(Expression):
 
     def _run(self, dispatcher, ctx, *args, **kwargs):
 
-        result = super(Function, self)._run(
-            dispatcher=dispatcher, ctx=ctx, *args, **kwargs
-        )
-
-        systems = self.getsystems()
-
-        selfsystem = self.system
-        __stack__ = ctx.setdefault(__STACK__, [])
-
-        if not __stack__:
-            __stack__.append(self)
-
-        elif __stack__[-1].system != selfsystem:
-            if selfsystem is None:
-                __stack__.append(self)
-
-            elif len(__stack__) > 1 and __stack__[-2] != selfsystem:
-                __stack__.append(self)
-
-        if systems:  # if execution might be delegated to a system
-
-            ssys = set(systems)
-            _systems = systems
-            if len(ssys) > 1:
-
-                for param in self.params:
+        return runplan(nodes=[self], dispatcher=dispatcher, ctx=ctx)
 
-                    if isinstance(param, Node):
-
-                            # stop execution when systems is unique
-                            if len(set(_systems)) <= 1:
-
-                                if _systems:
-                                    laststack = __stack__[-1]
-
-                                    if (
-                                            laststack.system is not None
-                                            and laststack.system != systocall
-                                    ):
-                                        result = param.run(
-                                            dispatcher=dispatcher, ctx=result
-                                        )
-
-                                break
-
-                            else:
-                                psystems = param.getsystems()
-                                print('param', param.alias)
-                                _systems = _systems[len(psystems):]
-                                result = param.run(
-                                    dispatcher=dispatcher, ctx=result
-                                )
-
-        if self is __stack__[-1]:
-            __stack__.pop()
-
-            if selfsystem is None:
-                sname = systems[-1] if systems else None
-
-            else:
-                sname = selfsystem
-            print(self.alias)
-            if sname is None:
-                result = self._prun(dispatcher=dispatcher, ctx=result)
+    def _prun(self, dispatcher, ctx):
+        """Function behavior when executed locally.
 
-            else:
-                system = dispatcher.systems[sname]
-                result = system.run(
-                    nodes=[self], dispatcher=dispatcher, ctx=result
-                )
+        Params which are not delegated to systems are processed here."""
 
-        return result
+    def _structname(self):
 
-    def _prun(self, dispatcher, ctx):
-        """Function behavior."""
+        result = [
+            '(', getctxname(
+                system=self.system, schema=self.schema, prop=self.prop
+            )
+        ]
 
-    def getctxname(self, *args, **kwargs):
+        for param in self.params:
+            result += [',', statename(param)]
 
-        result = super(Function, self).getctxname(*args, **kwargs)
+        result.append(')')
 
-        if self.alias is None:
+        if self.rtype is not None:
+            result += [':', statename(self.rtype)]
 
-            for param in self.params:
-                result = ''.join([result, ',', str(param)])
+        state = self._statename(Function)
 
-            result = ''.join(['(', result, ')'])
+        if state:
+            result += ['[', state, ']']
 
-        return result
+        return ''.join(result)
 
 
 class PropertyFunction(Function):
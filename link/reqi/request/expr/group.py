@@ -28,60 +28,132 @@
 
 __all__ = ['And', 'Or']
 
+try:
+    from collections.abc import Mapping
+
+except ImportError:
+    from collections import Mapping
+
+from b3j0f.utils.version import OrderedDict
+
 from ..base import Node
+from ..columnar import COLUMNAR, torows
+from ..ctx import written
+from ..utils import materialize
 from .base import Expression
 from .func import Function
 
 
 class And(Function):
-    """Function dedicated to process conjonction of expressions."""
-
-    def _run(self, dispatcher, ctx, *args, **kwargs):
-
-        super(And, self)._run(dispatcher=dispatcher, ctx=ctx, *args, **kwargs)
-
-        systems = self.getsystems()
-
-        for sysname in systems:
-
-            system = dispatcher.systems[sysname]
+    """Function dedicated to process conjonction of expressions.
 
-            cnode = self.copy(system=system)
+    Conjunction params filter the execution context one after the other. The
+    execution plan pushes params down by system, so nothing remains to do
+    locally."""
 
-            ctx = system.run(node=cnode, dispatcher=dispatcher, ctx=ctx)
+    opname = 'and'
 
-        self.ctx = ctx
+    def _prun(self, dispatcher, ctx):
 
-        return self.ctx
+        return ctx
 
 Expression.__and__ = lambda self, value: And(params=[self, value])
 Expression.__rand__ = lambda self, value: And(params=[value, self])
 
 
 class Or(Function):
-    """Function dedicated to process union of expressions."""
+    """Function dedicated to process union of expressions.
+
+    Params are executed on copies of the execution context, and their new
+    values are merged by name. Item lists are united in their order without
+    duplicate documents, so columns of params schemas are converted to rows
+    first."""
+
+    opname = 'or'
 
     def _run(self, dispatcher, ctx, *args, **kwargs):
 
         params = list(self.params)
+        unions = OrderedDict()
 
-        while params:
-            param = params.pop(params)
+        if ctx.get(COLUMNAR):  # unite rows by document key
+            from ...cache import readschemas
+
+            torows(ctx, readschemas(params))
 
-            if isinstance(param, Function):
+        while params:
+            param = params.pop(0)
 
-                if isinstance(param, Or):
-                    params = params[0:1] + param.params + params[1:]
+            if isinstance(param, Or):  # flatten nested unions
+                params = list(param.params) + params
 
+            elif isinstance(param, Node):
                 pctx = ctx.copy()
-                param.run(dispatcher=dispatcher, ctx=pctx)
+                pctx = param.run(dispatcher=dispatcher, ctx=pctx) or pctx
+
+                for name, value in written(ctx, pctx):
+                    unions.setdefault(name, []).append(value)
+
+        for name in unions:
+            ctx[name] = _union(unions[name])
+
+        return ctx
+
+
+def _union(values):
+    """Unite values written by union params.
+
+    :param list values: values of a same name.
+    :return: united item lists or the last value."""
+
+    values = [materialize(value) for value in values]
+
+    if all(isinstance(value, list) for value in values):
+        result = []
+        found = set()
+
+        for value in values:
+            for item in value:
+                key = _itemkey(item)
+
+                if key not in found:
+                    found.add(key)
+                    result.append(item)
+
+    else:
+        result = values[-1]
+
+    return result
+
+
+def _itemkey(item):
+    """Get the key of a united item.
+
+    Items read by several params are different objects for a same document,
+    so documents are identified by their ``_id``, or by their content if they
+    do not have one.
+
+    :param item: item to identify.
+    :return: hashable key. The item identity if its content is not hashable.
+    """
+
+    try:
+        if isinstance(item, Mapping):
+            if '_id' in item:
+                result = ('_id', item['_id'])
+
+            else:
+                result = ('items', frozenset(item.items()))
+
+        else:
+            result = ('item', item)
+
+        hash(result)
 
-            for mname in pctx:
-                if mname in self.ctx:
-                    self.ctx[mname] += pctx[mname]
+    except TypeError:  # unhashable content
+        result = ('id', id(item))
 
-                else:
-                    self.ctx[mname] = pctx[mname]
+    return result
 
 Expression.__or__ = lambda self, value: Or(params=[self, value])
 Expression.__ror__ = lambda self, value: Or(params=[value, self])
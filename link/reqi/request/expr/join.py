@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+
+# --------------------------------------------------------------------
+# The MIT License (MIT)
+#
+# Copyright (c) 2016 Jonathan Labéjof <jonathan.labejof@gmail.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+# --------------------------------------------------------------------
+
+"""Specification of join functions."""
+
+__all__ = ['Join', 'In']
+
+from .func import Function
+
+from ..join import INNER, runjoin
+from ..utils import updatecond
+
+
+class Join(Function):
+    """Join items of two expressions from different systems.
+
+    Params are the left and right key expressions. Joined rows are saved in
+    the execution context under this context name."""
+
+    __slots__ = ['how']
+
+    def __init__(self, how=INNER, *args, **kwargs):
+        """
+        :param str how: join type (INNER, LEFT, SEMI or ANTI).
+        """
+
+        super(Join, self).__init__(*args, **kwargs)
+
+        self.how = how
+
+    def _run(self, dispatcher, ctx):
+
+        return runjoin(self, dispatcher=dispatcher, ctx=ctx, how=self.how)
+
+
+class In(Function):
+    """Membership predicate.
+
+    Params are an expression and a collection of values. Joins use it in
+    order to send join keys to a system."""
+
+    opname = 'in'
+
+    def _run(self, dispatcher, ctx):
+
+        values = set(self.params[1])
+
+        updatecond(
+            ctx, self.params[0],
+            lambda item, node, ctx: item.get(node.prop) in values
+        )
+
+        return ctx
@@ -24,35 +24,243 @@
 # SOFTWARE.
 # --------------------------------------------------------------------
 
-"""Specification of the request object."""
+"""Specification of the request object.
+
+Numerical functions convert the property of their expression parameter with a
+scalar operator, except comparisons which keep items whose comparison is true,
+such as a system where they are pushed down. When items are stored in a typed
+column (see the columnar execution context), the conversion is done on the
+whole column at once with a batch kernel (NumPy ufunc, or a standard array
+loop without NumPy). The per-item path is used on heterogeneous (object)
+columns and on row items."""
 
 from numbers import Number
 
+from operator import (
+    add, sub, mul, truediv, mod, pow, lshift, rshift, lt, le, eq, ne, gt, ge,
+    neg, pos
+)
+
 from .base import Expression
 from .func import Function
 
 from .re import Re
 
-from ..utils import updateitems
+from ..utils import updatecond, updateitems
+from ..columnar import Columns, column, numpy
+
+INTMAX = 2 ** 62  #: bound of int64 kernel results estimated in float64.
 
 
 class Numerical(Function):
     """Base class for all numerical expressions."""
 
-    def _convert(self, item):
+    op = None  #: scalar operator.
+    ufunc = None  #: NumPy ufunc name of the batch kernel.
+    dtype = None  #: NumPy dtype name of the batch kernel if it is a cast.
+    estimate = None  #: float64 ufunc name estimating int64 kernel results.
+
+    def _operands(self):
+        """Get the expression param, the operand and True if the expression
+        is the right operand.
+
+        :rtype: tuple"""
+
+        expr = self.params[0]
+        operand = self.params[1] if len(self.params) > 1 else None
+        reverse = False
+
+        if isinstance(operand, Expression):
+            if not isinstance(expr, Expression):
+                expr, operand, reverse = operand, expr, True
+
+        return expr, operand, reverse
+
+    def _scalar(self, value, operand=None, reverse=False):
+        """Apply this operator on one value.
+
+        :param value: expression value.
+        :param operand: other operand value.
+        :param bool reverse: if True, value is the right operand."""
+
+        if len(self.params) == 1:
+            result = self.op(value)
+
+        elif reverse:
+            result = self.op(operand, value)
+
+        else:
+            result = self.op(value, operand)
+
+        return result
+
+    def _convert(self, item, node, ctx):
+
+        prop = node.prop
+
+        if prop in item:
+            _, operand, reverse = self._operands()
+
+            if isinstance(operand, Expression):
+                operand = item.get(operand.prop)
+
+            item[prop] = self._scalar(item[prop], operand, reverse)
+
+        return item
+
+    def _kernel(self, values, operand=None, reverse=False):
+        """Apply this operator on a typed column.
+
+        :param values: typed column.
+        :param operand: other operand value or typed column.
+        :param bool reverse: if True, values are the right operand.
+        :return: new typed column."""
+
+        if numpy is None or (self.ufunc is None and self.dtype is None):
+            if isinstance(operand, Number) or operand is None:
+                result = [
+                    self._scalar(value, operand, reverse) for value in values
+                ]
+
+            else:
+                result = [
+                    self._scalar(value, other, reverse)
+                    for value, other in zip(values, operand)
+                ]
+
+            result = column(result)
+
+        elif self.dtype is not None:
+            result = numpy.asarray(values).astype(self.dtype)
+
+        else:
+            if self.estimate is not None and _isint(values) and (
+                    operand is None or _isint(operand)
+            ):
+                self._checkrange(values, operand, reverse)
+
+            ufunc = getattr(numpy, self.ufunc)
+
+            with numpy.errstate(all='raise'):  # same errors as python
+
+                if len(self.params) == 1:
+                    result = ufunc(values)
+
+                elif reverse:
+                    result = ufunc(operand, values)
+
+                else:
+                    result = ufunc(values, operand)
+
+        return result
+
+    def _checkrange(self, values, operand=None, reverse=False):
+        """Check that the int64 kernel does not wrap around, as NumPy integer
+        ufuncs do silently on overflow.
+
+        :raises: OverflowError if float64 estimated results are out of the
+            int64 range, so that python integers are used instead."""
+
+        estimate = getattr(numpy, self.estimate)
+        values = numpy.asarray(values, dtype=numpy.float64)
+
+        if isinstance(operand, Number):
+            operand = float(operand)
+
+        elif operand is not None:
+            operand = numpy.asarray(operand, dtype=numpy.float64)
+
+        if self.estimate == 'ldexp':  # exponents stay integers
+            if reverse:
+                values = values.astype(numpy.int64)
+
+            else:
+                operand = numpy.asarray(operand).astype(numpy.int64)
+
+        with numpy.errstate(all='ignore'):
+
+            if len(self.params) == 1:
+                result = estimate(values)
+
+            elif reverse:
+                result = estimate(operand, values)
+
+            else:
+                result = estimate(values, operand)
+
+        if not (numpy.abs(result) < INTMAX).all():
+            raise OverflowError('Int64 kernel overflow.')
+
+    def _batch(self, items, prop, operand, reverse):
+        """Try to apply the batch kernel on typed columns.
+
+        :param Columns items: schema items.
+        :return: new typed column, or None if columns are not typed."""
+
+        values = items.columns.get(prop)
+
+        if isinstance(operand, Expression):
+            operand = items.columns.get(operand.prop)
+            typed = _istyped(operand)
+
+        else:
+            typed = operand is None or (
+                isinstance(operand, Number) and not isinstance(operand, bool)
+            )
+
+        result = None
+
+        if typed and _istyped(values):
+            try:
+                result = self._kernel(values, operand, reverse)
+
+            except (ArithmeticError, TypeError, ValueError):
+                pass
 
-        raise NotImplementedError()
+        return result
 
     def _run(self, dispatcher, ctx):
 
-        updateitems(ctx, self.params[0], self._convert)
+        expr, operand, reverse = self._operands()
 
+        items = ctx.get(expr.schema)
+        values = None
 
-class Add(Numerical):
+        if isinstance(items, Columns):
+            values = self._batch(items, expr.prop, operand, reverse)
+
+        if values is None:
+            updateitems(ctx, expr, self._convert)
+
+        else:
+            items[expr.prop] = values
+
+        return ctx
+
+
+def _istyped(values):
+    """True if input values are a typed column."""
+
+    return values is not None and not isinstance(values, list)
 
-    def _convert(self, item):
 
-        item[self.params[0]] += self.params[1]
+def _isint(value):
+    """True if input value is an integer or an integer typed column."""
+
+    if isinstance(value, Number):
+        result = not isinstance(value, (bool, float))
+
+    else:
+        result = numpy.asarray(value).dtype.kind in 'iu'
+
+    return result
+
+
+class Add(Numerical):
+
+    op = add
+    ufunc = 'add'
+    estimate = 'add'
 
 Expression.__add__ = lambda self, value: Add(params=[self, value])
 
@@ -61,9 +269,9 @@ Expression.__radd__ = lambda self, value: Add(params=[value, self])
 
 class Sub(Numerical):
 
-    def _convert(self, item):
-
-        item[self.params[0]] -= self.params[1]
+    op = sub
+    ufunc = 'subtract'
+    estimate = 'subtract'
 
 Expression.__sub__ = lambda self, value: Sub(params=[self, value])
 Expression.__rsub__ = lambda self, value: Sub(params=[value, self])
@@ -71,9 +279,9 @@ Expression.__rsub__ = lambda self, value: Sub(params=[value, self])
 
 class Mul(Numerical):
 
-    def _convert(self, item):
-
-        item[self.params[0]] *= self.params[1]
+    op = mul
+    ufunc = 'multiply'
+    estimate = 'multiply'
 
 Expression.__mul__ = lambda self, value: Mul(params=[self, value])
 Expression.__rmul__ = lambda self, value: Mul(params=[value, self])
@@ -81,19 +289,19 @@ Expression.__rmul__ = lambda self, value: Mul(params=[value, self])
 
 class Div(Numerical):
 
-    def _convert(self, item):
-
-        item[self.params[0]] /= self.params[1]
+    op = truediv
+    ufunc = 'true_divide'
 
 Expression.__div__ = lambda self, value: Div(params=[self, value])
 Expression.__rdiv__ = lambda self, value: Div(params=[value, self])
+Expression.__truediv__ = Expression.__div__
+Expression.__rtruediv__ = Expression.__rdiv__
 
 
 class Mod(Numerical):
 
-    def _convert(self, item):
-
-        item[self.params[0]] %= self.params[1]
+    op = mod
+    ufunc = 'remainder'
 
 Expression.__mod__ = lambda self, value: \
     (Mod if isinstance(value, Number) else Re)(params=[self, value])
@@ -103,9 +311,9 @@ Expression.__rmod__ = lambda self, value: \
 
 class Pow(Numerical):
 
-    def _convert(self, item):
-
-        item[self.params[0]] **= self.params[1]
+    op = pow
+    ufunc = 'power'
+    estimate = 'power'
 
 Expression.__pow__ = lambda self, value: Pow(params=[self, value])
 Expression.__rpow__ = lambda self, value: Pow(params=[value, self])
@@ -113,9 +321,9 @@ Expression.__rpow__ = lambda self, value: Pow(params=[value, self])
 
 class LShift(Numerical):
 
-    def _convert(self, item):
-
-        item[self.params[0]] <<= self.params[1]
+    op = lshift
+    ufunc = 'left_shift'
+    estimate = 'ldexp'
 
 Expression.__lshift__ = lambda self, value: LShift(params=[self, value])
 
@@ -124,72 +332,123 @@ Expression.__rlshift__ = lambda self, value: LShift(params=[value, self])
 
 class RShift(Numerical):
 
-    def _convert(self, item):
-
-        item[self.params[0]] >>= self.params[1]
+    op = rshift
+    ufunc = 'right_shift'
 
 Expression.__rshift__ = lambda self, value: RShift(params=[self, value])
 Expression.__rrshift__ = lambda self, value: RShift(params=[value, self])
 
 
-class LT(Numerical):
+class Comparison(Numerical):
+    """Numerical predicate which keeps items whose comparison is true.
 
-    def _convert(self, item):
+    Items without the expression property, or whose values can not be
+    compared, are kept only by the inequality."""
 
-        item[self.params[0]] = item[self.params[0]] < self.params[1]
+    missing = False  #: True if items which can not be compared are kept.
 
+    def _cond(self, item, node, ctx):
 
-class LTE(Numerical):
+        result = self.missing
+        prop = node.prop
 
-    def _convert(self, item):
+        if prop in item:
+            _, operand, reverse = self._operands()
+
+            if isinstance(operand, Expression):
+                operand = item.get(operand.prop)
+
+            try:
+                result = bool(self._scalar(item[prop], operand, reverse))
+
+            except TypeError:
+                pass
+
+        return result
+
+    def _run(self, dispatcher, ctx):
 
-        item[self.params[0]] = item[self.params[0]] <= self.params[1]
+        expr, operand, reverse = self._operands()
+
+        items = ctx.get(expr.schema)
+        mask = None
+
+        if isinstance(items, Columns):
+            mask = self._batch(items, expr.prop, operand, reverse)
+
+        if mask is None:
+            updatecond(ctx, expr, self._cond)
+
+        else:
+            ctx[expr.schema] = items.select(mask)
+
+        return ctx
+
+
+class LT(Comparison):
+
+    opname = 'lt'
+
+    op = lt
+    ufunc = 'less'
+
+
+class LTE(Comparison):
+
+    opname = 'lte'
+
+    op = le
+    ufunc = 'less_equal'
 
 Expression.__lt__ = lambda self, value: LT(params=[self, value])
 Expression.__le__ = lambda self, value: LTE(params=[self, value])
 
 
-class EQ(Numerical):
+class EQ(Comparison):
 
-    def _convert(self, item):
+    opname = 'eq'
 
-        item[self.params[0]] = item[self.params[0]] == self.params[1]
+    op = eq
+    ufunc = 'equal'
 
 
 Expression.__eq__ = lambda self, value: EQ(params=[self, value])
 
-class NEQ(Numerical):
+class NEQ(Comparison):
 
-    def _convert(self, item):
+    opname = 'ne'
+    missing = True
 
-        item[self.params[0]] = item[self.params[0]] != self.params[1]
+    op = ne
+    ufunc = 'not_equal'
 
 Expression.__ne__ = lambda self, value: NEQ(params=[self, value])
 
 
-class GT(Numerical):
+class GT(Comparison):
 
-    def _convert(self, item):
+    opname = 'gt'
 
-        item[self.params[0]] = item[self.params[0]] > self.params[1]
+    op = gt
+    ufunc = 'greater'
 
 Expression.__gt__ = lambda self, value: GT(params=[self, value])
 
 
-class GTE(Numerical):
+class GTE(Comparison):
 
-    def _convert(self, item):
+    opname = 'gte'
 
-        item[self.params[0]] = item[self.params[0]] >= self.params[1]
+    op = ge
+    ufunc = 'greater_equal'
 
 Expression.__ge__ = lambda self, value: GTE(params=[self, value])
 
 
 class Bool(Numerical):
 
-    def _convert(self, item):
-
-        item[self.params[0]] = bool(item[self.params[0]])
+    op = bool
+    dtype = 'bool'
 
 Expression.__nonzero__ = lambda self: Bool(params=[self])
 Expression.__bool__ = lambda self: Bool(params=[self])
@@ -197,75 +456,81 @@ Expression.__bool__ = lambda self: Bool(params=[self])
 
 class Oct(Numerical):
 
-    def _convert(self, item):
-
-        item[self.params[0]] = oct(item[self.params[0]])
+    op = oct
 
 Expression.__oct__ = lambda self: Oct(params=[self])
 
 
 class Hex(Numerical):
 
-    def _convert(self, item):
-
-        item[self.params[0]] = hex(item[self.params[0]])
+    op = hex
 
 Expression.__hex__ = lambda self: Hex(params=[self])
 
 
 class Int(Numerical):
 
-    def _convert(self, item):
+    op = int
+    dtype = 'int64'
+
+    def _kernel(self, values, *args, **kwargs):
 
-        item[self.params[0]] = int(item[self.params[0]])
+        if numpy is not None:
+            floats = numpy.asarray(values)
+
+            if floats.dtype.kind == 'f' and not (
+                    numpy.abs(floats) < INTMAX
+            ).all():  # nan, inf and out of int64 range values
+                raise OverflowError('Int64 cast overflow.')
+
+        return super(Int, self)._kernel(values, *args, **kwargs)
 
 Expression.__int__ = lambda self: Int(params=[self])
 
 
 class Float(Numerical):
 
-    def _convert(self, item):
-
-        item[self.params[0]] = float(item[self.params[0]])
+    op = float
+    dtype = 'float64'
 
 Expression.__float__ = lambda self: Float(params=[self])
 
 
 class NEG(Numerical):
 
-    def _convert(self, item):
-
-        item[self.params[0]] = -item[self.params[0]]
+    op = neg
+    ufunc = 'negative'
+    estimate = 'negative'
 
 Expression.__neg__ = lambda self: NEG(params=[self])
 
 
 class Pos(Numerical):
 
-    def _convert(self, item):
-
-        item[self.params[0]] = +item[self.params[0]]
+    op = pos
+    ufunc = 'positive'
 
 Expression.__pos__ = lambda self: Pos(params=[self])
 
 
 class Abs(Numerical):
 
-    def _convert(self, item):
-
-        item[self.params[0]] = abs(item[self.params[0]])
+    op = abs
+    ufunc = 'absolute'
+    estimate = 'absolute'
 
 Expression.__abs__ = lambda self: Abs(params=[self])
 
 
-class Invert(Numerical):
+def _invert(value):
+    """Invert a boolean (logical not) or an integer (bitwise not)."""
+
+    return not value if isinstance(value, bool) else ~value
 
-    def _convert(self, item):
 
-        if isinstance(item[self.params[0]], Number):
-            item[self.params[0]] = ~item[self.params[0]]
+class Invert(Numerical):
 
-        elif isinstance(item[self.params[0]], bool):
-            item[self.params[0]] = not item[self.params[0]]
+    op = staticmethod(_invert)
+    ufunc = 'invert'
 
 Expression.__invert__ = lambda self: Invert(params=[self])
@@ -35,6 +35,8 @@ from re import match
 
 class Re(Function):
 
+    opname = 'regex'
+
     def _run(self, dispatcher, ctx):
 
         updatecond(
@@ -0,0 +1,178 @@
+# -*- coding: utf-8 -*-
+
+# --------------------------------------------------------------------
+# The MIT License (MIT)
+#
+# Copyright (c) 2016 Jonathan Labéjof <jonathan.labejof@gmail.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+# --------------------------------------------------------------------
+
+
+
+from unittest import main
+
+from b3j0f.utils.ut import UTCase
+
+from ..agg import Count, Sum, Mean, Max, First
+from ..base import Expression
+from ...base import Ref
+from ...plan import runplan
+from ....cost import CostModel
+
+
+ITEMS = [{'v': 1}, {'v': 2}, {'v': 3}, {'v': None}, {}]
+
+
+class ItemSystem(object):
+
+    def __init__(self, items):
+
+        self.items = items
+        self.calls = 0
+
+    def run(self, nodes, dispatcher, ctx):
+
+        self.calls += 1
+
+        for node in nodes:
+            ctx[node.schema] = list(self.items)
+
+        return ctx
+
+
+class FailSystem(ItemSystem):
+
+    def run(self, nodes, dispatcher, ctx):
+
+        raise IOError()
+
+
+class PartialSystem(ItemSystem):
+
+    def runpartial(self, node, expr, dispatcher, ctx):
+
+        self.calls += 1
+
+        return node.partial(self.items, expr)
+
+
+class AggDispatcher(object):
+
+    def __init__(self, partitioned=(), **systems):
+
+        self.systems = systems
+        self.partitioned = partitioned
+
+    def getsystemswithschemas(self, schema, system=None):
+
+        return sorted(self.systems), [schema]
+
+
+class AggregateTest(UTCase):
+
+    def setUp(self):
+
+        # replicas of the same items
+        self.dispatcher = AggDispatcher(
+            s0=ItemSystem(ITEMS), s1=PartialSystem(ITEMS)
+        )
+
+    def aggregate(self, cls, prop='v', **kwargs):
+
+        node = cls(params=[Expression(schema='a', prop=prop, **kwargs)])
+
+        ctx = runplan([node], dispatcher=self.dispatcher, ctx={})
+
+        return ctx[node.getctxname()]
+
+    def test_systems(self):
+
+        self.assertEqual(self.aggregate(Sum), 6)
+        self.assertEqual(self.aggregate(Mean), 2.)
+        self.assertEqual(self.aggregate(Max), 3)
+        self.assertEqual(self.aggregate(First), 1)
+        self.assertEqual(self.aggregate(Count), 3)
+        self.assertEqual(self.aggregate(Count, prop=None), 5)
+
+    def test_replica(self):
+
+        self.aggregate(Sum)
+
+        self.assertEqual(self.dispatcher.systems['s0'].calls, 1)
+        self.assertEqual(self.dispatcher.systems['s1'].calls, 0)
+
+    def test_system(self):
+
+        self.assertEqual(self.aggregate(Sum, system='s1'), 6)
+        self.assertEqual(self.dispatcher.systems['s1'].calls, 1)
+        self.assertEqual(self.dispatcher.systems['s0'].calls, 0)
+
+    def test_failover(self):
+
+        self.dispatcher.systems['s0'] = FailSystem(ITEMS)
+        self.dispatcher.cost = CostModel()
+
+        self.assertEqual(self.aggregate(Sum), 6)
+        self.assertEqual(self.dispatcher.systems['s1'].calls, 1)
+
+    def test_partitions(self):
+
+        self.dispatcher = AggDispatcher(
+            partitioned=['a'], s0=ItemSystem(ITEMS[:2]),
+            s1=PartialSystem(ITEMS[2:])
+        )
+
+        self.assertEqual(self.aggregate(Sum), 6)
+        self.assertEqual(self.aggregate(Mean), 2.)
+        self.assertEqual(self.aggregate(First), 1)
+        self.assertEqual(self.aggregate(Count, prop=None), 5)
+        self.assertEqual(self.dispatcher.systems['s0'].calls, 4)
+        self.assertEqual(self.dispatcher.systems['s1'].calls, 4)
+
+    def test_ctx(self):
+
+        node = Sum(params=[Expression(schema='a', prop='v')])
+
+        ctx = node.run(dispatcher=None, ctx={'a': [{'v': 4}, {'v': 5}]})
+
+        self.assertEqual(ctx[node.getctxname()], 9)
+
+    def test_ref(self):
+
+        expr = Expression(alias='expr', schema='a', prop='v')
+        node = Sum(params=[Ref(ref=expr)])
+
+        ctx = node.run(dispatcher=self.dispatcher, ctx={'a': [{'v': 1}]})
+
+        self.assertEqual(ctx[node.getctxname()], 1)
+
+    def test_merge(self):
+
+        node = Mean(params=[Expression(schema='a', prop='v')])
+
+        states = [
+            node.partial([{'v': 1}, {'v': 2}]), node.partial([{'v': 6}])
+        ]
+
+        self.assertEqual(node.result(node.merge(states)), 3.)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,137 @@
+# -*- coding: utf-8 -*-
+
+# --------------------------------------------------------------------
+# The MIT License (MIT)
+#
+# Copyright (c) 2016 Jonathan Labéjof <jonathan.labejof@gmail.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+# --------------------------------------------------------------------
+
+
+
+from unittest import main
+
+from b3j0f.utils.ut import UTCase
+
+from ..group import Or
+from ..func import Function
+from ...ctx import Context
+
+ITEMS = [{'a': 0}, {'a': 1}, {'a': 2}]
+
+
+class Filter(Function):
+
+    def _run(self, dispatcher, ctx):
+
+        ctx['schema'] = [
+            item for item in ctx['schema'] if item['a'] in self.params
+        ]
+        ctx[self.getctxname()] = True
+
+        return ctx
+
+
+class CopyFilter(Filter):
+    """Filter which copies the ctx before its last write, as aggregates,
+    joins and unions do."""
+
+    def _run(self, dispatcher, ctx):
+
+        ctx = super(CopyFilter, self)._run(dispatcher=dispatcher, ctx=ctx)
+
+        ctx.copy()
+        ctx['copied'] = True
+
+        return ctx
+
+
+class ReadFilter(Filter):
+    """Filter which reads new copies of documents."""
+
+    def _run(self, dispatcher, ctx):
+
+        ctx = super(ReadFilter, self)._run(dispatcher=dispatcher, ctx=ctx)
+        ctx['schema'] = [dict(item) for item in ctx['schema']]
+
+        return ctx
+
+
+class OrTest(UTCase):
+
+    def test_union(self):
+
+        for ctx in [{'schema': ITEMS}, Context({'schema': ITEMS})]:
+
+            union = Or(
+                params=[
+                    Filter(alias='0', params=[0, 1]),
+                    Or(params=[Filter(alias='1', params=[2, 1])])
+                ]
+            )
+
+            ctx = union.run(dispatcher=None, ctx=ctx)
+
+            self.assertEqual(ctx['schema'], [ITEMS[0], ITEMS[1], ITEMS[2]])
+            self.assertTrue(ctx['0'])
+            self.assertTrue(ctx['1'])
+
+    def test_documents(self):
+
+        items = ITEMS + [{'_id': 3, 'a': 3, 'l': [3]}, {'a': 4, 'l': [4]}]
+
+        ctx = Or(
+            params=[
+                ReadFilter(alias='0', params=[0, 1, 3, 4]),
+                ReadFilter(alias='1', params=[1, 2, 3])
+            ]
+        ).run(dispatcher=None, ctx={'schema': items})
+
+        self.assertEqual(ctx['schema'], items[:2] + items[3:] + items[2:3])
+
+    def test_innercopy(self):
+
+        ctx = Context({'schema': ITEMS})
+
+        Or(
+            params=[
+                CopyFilter(alias='0', params=[0]),
+                Filter(alias='1', params=[2])
+            ]
+        ).run(dispatcher=None, ctx=ctx)
+
+        self.assertEqual(ctx['schema'], [ITEMS[0], ITEMS[2]])
+        self.assertTrue(ctx['0'])
+        self.assertTrue(ctx['copied'])
+
+    def test_isolation(self):
+
+        ctx = Context({'schema': ITEMS})
+
+        Or(params=[Filter(alias='0', params=[0])]).run(
+            dispatcher=None, ctx=ctx
+        )
+
+        self.assertEqual(ctx['schema'], [ITEMS[0]])
+        self.assertEqual(len(ctx.maps), 2)
+
+
+if __name__ == '__main__':
+    main()
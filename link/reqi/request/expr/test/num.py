@@ -0,0 +1,202 @@
+# -*- coding: utf-8 -*-
+
+# --------------------------------------------------------------------
+# The MIT License (MIT)
+#
+# Copyright (c) 2016 Jonathan Labéjof <jonathan.labejof@gmail.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+# --------------------------------------------------------------------
+
+
+
+from unittest import main
+
+from b3j0f.utils.ut import UTCase
+
+from ..base import Expression
+from ..num import (
+    Add, Sub, Mul, Div, Pow, LShift, LT, EQ, NEQ, GT, Bool, Hex, Int, NEG,
+    Abs, Invert
+)
+from ...columnar import Columns
+from ...utils import LAZY
+
+
+class NumericalTest(UTCase):
+
+    def setUp(self):
+
+        self.expr = Expression(schema='schema', prop='prop')
+        self.other = Expression(schema='schema', prop='other')
+
+    def run_func(self, func, values, columnar=False, lazy=False, **props):
+
+        rows = [{'prop': value} for value in values]
+
+        for name in props:
+            for row, value in zip(rows, props[name]):
+                row[name] = value
+
+        ctx = {'schema': Columns.fromrows(rows) if columnar else rows}
+
+        if lazy:
+            ctx[LAZY] = True
+
+        func.run(dispatcher=None, ctx=ctx)
+
+        return [row.get('prop') for row in ctx['schema']]
+
+    def assert_func(self, func, values, expected, **props):
+
+        for columnar in (False, True):
+            for lazy in (False, True):
+                self.assertEqual(
+                    self.run_func(
+                        func, values, columnar=columnar, lazy=lazy, **props
+                    ),
+                    expected
+                )
+
+    def test_add(self):
+
+        self.assert_func(self.expr + 1, [1, 2], [2, 3])
+
+    def test_radd(self):
+
+        self.assert_func(Sub(params=[10, self.expr]), [1, 2], [9, 8])
+
+    def test_heterogeneous(self):
+
+        self.assert_func(
+            Add(params=[self.expr, 'b']), ['a', 'b'], ['ab', 'bb']
+        )
+
+    def test_float(self):
+
+        self.assert_func(Div(params=[self.expr, 2]), [1, 3.], [0.5, 1.5])
+
+    def test_pow(self):
+
+        self.assert_func(Pow(params=[self.expr, 2]), [2, 3], [4, 9])
+
+    def test_zerodivision(self):
+
+        for columnar in (False, True):
+            self.assertRaises(
+                ZeroDivisionError, self.run_func,
+                Div(params=[self.expr, 0]), [1, 2], columnar
+            )
+
+    def test_overflow(self):
+
+        big = 2 ** 63 - 1
+
+        self.assert_func(Add(params=[self.expr, 1]), [big, 1], [big + 1, 2])
+        self.assert_func(
+            Mul(params=[self.expr, big]), [2, 1], [2 * big, big]
+        )
+        self.assert_func(Pow(params=[self.expr, 30]), [10, 1], [10 ** 30, 1])
+        self.assert_func(
+            LShift(params=[self.expr, 70]), [1, 0], [1 << 70, 0]
+        )
+        self.assert_func(
+            LShift(params=[1, self.expr]), [70, 1], [1 << 70, 2]
+        )
+        self.assert_func(NEG(params=[self.expr]), [-big - 1], [big + 1])
+
+    def test_intcast(self):
+
+        self.assert_func(Int(params=[self.expr]), [1e19, 1.5], [10 ** 19, 1])
+
+        for columnar in (False, True):
+            for value in (float('nan'), float('inf')):
+                self.assertRaises(
+                    (ValueError, OverflowError), self.run_func,
+                    Int(params=[self.expr]), [value, 1.], columnar
+                )
+
+    def test_compare(self):
+
+        self.assert_func(LT(params=[self.expr, 2]), [1, 2, 3], [1])
+        self.assert_func(EQ(params=[self.expr, 2]), [1, 2], [2])
+        self.assert_func(GT(params=[2, self.expr]), [1, 2, 3], [1])
+
+    def test_compareexpression(self):
+
+        self.assert_func(
+            GT(params=[self.expr, self.other]), [1, 2, 3], [3],
+            other=[2, 2, 2]
+        )
+
+    def test_comparemissing(self):
+
+        ctx = {'schema': [{'prop': 1}, {}, {'prop': 'a'}]}
+
+        LT(params=[self.expr, 2]).run(dispatcher=None, ctx=ctx)
+
+        self.assertEqual(ctx['schema'], [{'prop': 1}])
+
+        ctx = {'schema': [{'prop': 1}, {}]}
+
+        NEQ(params=[self.expr, 1]).run(dispatcher=None, ctx=ctx)
+
+        self.assertEqual(ctx['schema'], [{}])
+
+    def test_expression(self):
+
+        self.assert_func(
+            Add(params=[self.expr, self.other]), [1, 2], [11, 22],
+            other=[10, 20]
+        )
+
+    def test_unary(self):
+
+        self.assert_func(NEG(params=[self.expr]), [1, -2], [-1, 2])
+        self.assert_func(Abs(params=[self.expr]), [1, -2.5], [1, 2.5])
+        self.assert_func(Int(params=[self.expr]), [1.5, 2.], [1, 2])
+        self.assert_func(Bool(params=[self.expr]), [0, 2], [False, True])
+        self.assert_func(Hex(params=[self.expr]), [10], ['0xa'])
+
+    def test_invert(self):
+
+        self.assert_func(Invert(params=[self.expr]), [1, -1], [-2, 0])
+        self.assert_func(Invert(params=[self.expr]), [True], [False])
+
+    def test_missing(self):
+
+        func = Add(params=[self.expr, 1])
+
+        ctx = {'schema': [{'prop': 1}, {}]}
+
+        func.run(dispatcher=None, ctx=ctx)
+
+        self.assertEqual(ctx['schema'], [{'prop': 2}, {}])
+
+    def test_noitems(self):
+
+        ctx = {}
+
+        Add(params=[self.expr, 1]).run(dispatcher=None, ctx=ctx)
+
+        self.assertFalse(ctx)
+
+
+if __name__ == '__main__':
+    main()
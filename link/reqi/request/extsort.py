@@ -0,0 +1,169 @@
+# -*- coding: utf-8 -*-
+
+# --------------------------------------------------------------------
+# The MIT License (MIT)
+#
+# Copyright (c) 2016 Jonathan Labéjof <jonathan.labejof@gmail.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+# --------------------------------------------------------------------
+
+"""Specification of the external merge sort.
+
+Items are pickled as they are read, and buffered with their sort key until
+the pickled size of keys and items in the buffer exceeds a memory budget.
+Then the buffer is sorted and written to a temporary file (a run). Runs are
+merged lazily with a k-way merge, so that only one record per run is in
+memory while sorted items are read.
+
+The number of runs merged at once is bounded in order to bound the number
+of opened files. When it is reached, runs are first merged into a bigger
+run, level by level like a merge tree.
+
+A run record is a header with the pickled key size and the pickled item
+size, followed by the pickled key and item."""
+
+__all__ = ['externalsort']
+
+from heapq import merge
+
+from struct import Struct
+
+from six.moves.cPickle import dumps, loads, HIGHEST_PROTOCOL
+
+from tempfile import TemporaryFile
+
+DEFAULT_MAXBYTES = 64 * 1024 * 1024  #: default memory budget of a run.
+
+DEFAULT_MAXRUNS = 64  #: default maximal number of runs merged at once.
+
+_HEADER = Struct('>II')  #: run record header (key size, item size).
+
+
+def externalsort(
+        items, key, maxbytes=DEFAULT_MAXBYTES, maxruns=DEFAULT_MAXRUNS
+):
+    """Sort input items with a memory budget.
+
+    The sort is stable. Keys must be picklable.
+
+    :param Iterable items: items to sort.
+    :param key: function which takes an item and returns its sort key.
+    :param int maxbytes: maximal pickled size of keys and items sorted in
+        memory.
+    :param int maxruns: maximal number of runs merged at once (at least 2).
+    :return: generator of sorted items."""
+
+    maxruns = max(2, maxruns)
+    runs = []  # list of (level, run file) where level is the merge depth
+    buffer = []
+    size = 0
+
+    for index, item in enumerate(items):
+        itemkey = key(item)
+        keydata = dumps((itemkey, index), HIGHEST_PROTOCOL)
+        data = dumps(item, HIGHEST_PROTOCOL)
+        buffer.append((itemkey, index, keydata, data))
+        size += len(keydata) + len(data)
+
+        if size > maxbytes:
+            buffer.sort()
+            runs.append((0, _writerun(buffer)))
+            buffer = []
+            size = 0
+            _compact(runs, maxruns)
+
+    buffer.sort()
+
+    if runs:
+        if buffer:
+            runs.append((0, _writerun(buffer)))
+            buffer = None
+
+        while len(runs) > maxruns:  # intermediate passes on smallest runs
+            _mergelast(runs, min(maxruns, len(runs) - maxruns + 1))
+
+        records = merge(*[_readrun(run) for _, run in runs])
+
+    else:
+        records = buffer
+
+    for _, _, _, data in records:
+        yield loads(data)
+
+
+def _compact(runs, maxruns):
+    """Merge the last maxruns runs while they have the same level.
+
+    :param list runs: list of (level, run file) by decreasing level.
+    :param int maxruns: maximal number of runs merged at once."""
+
+    while len(runs) >= maxruns and runs[-maxruns][0] == runs[-1][0]:
+        _mergelast(runs, maxruns)
+
+
+def _mergelast(runs, count):
+    """Replace the last count runs with their merge.
+
+    :param list runs: list of (level, run file) by decreasing level.
+    :param int count: number of runs to merge."""
+
+    merged = merge(*[_readrun(run) for _, run in runs[-count:]])
+
+    runs[-count:] = [(runs[-count][0] + 1, _writerun(merged))]
+
+
+def _writerun(records):
+    """Write sorted records to a temporary file.
+
+    :param Iterable records: sorted (key, index, pickled key, pickled item).
+    :return: run file."""
+
+    result = TemporaryFile()
+
+    for _, _, keydata, data in records:
+        result.write(_HEADER.pack(len(keydata), len(data)))
+        result.write(keydata)
+        result.write(data)
+
+    result.seek(0)
+
+    return result
+
+
+def _readrun(run):
+    """Read records of a run file and close it.
+
+    :return: generator of (key, index, pickled key, pickled item)."""
+
+    try:
+        while True:
+            header = run.read(_HEADER.size)
+
+            if len(header) < _HEADER.size:
+                break
+
+            keysize, datasize = _HEADER.unpack(header)
+            keydata = run.read(keysize)
+            key, index = loads(keydata)
+
+            yield key, index, keydata, run.read(datasize)
+
+    finally:
+        run.close()
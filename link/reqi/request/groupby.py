@@ -0,0 +1,389 @@
+# -*- coding: utf-8 -*-
+
+# --------------------------------------------------------------------
+# The MIT License (MIT)
+#
+# Copyright (c) 2016 Jonathan Labéjof <jonathan.labejof@gmail.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+# --------------------------------------------------------------------
+
+"""Specification of the hash aggregation group-by operator.
+
+Rows are grouped in a hash table by a key tuple, and aggregated by
+combiners which update a state per group and value. Combiner states are
+mergeable, so that the table is bounded: beyond a maximal number of groups,
+partial states are spilled to temporary files partitioned by key hash, and
+partitions are merged one by one at the end. A partition which has more
+groups than the maximal number is partitioned again with other digits of the
+key hash while it is merged, so that memory stays bounded whatever the number
+of groups."""
+
+__all__ = [
+    'Combiner', 'Count', 'Sum', 'Min', 'Max', 'Mean', 'First', 'Last',
+    'COMBINERS', 'getcombiner', 'hashgroup'
+]
+
+from b3j0f.utils.version import OrderedDict
+
+from six.moves.cPickle import dump, load, HIGHEST_PROTOCOL
+
+from tempfile import TemporaryFile
+
+DEFAULT_MAXGROUPS = 100000  #: default maximal number of groups in memory.
+DEFAULT_PARTITIONS = 16  #: default number of spill partitions.
+MAXDEPTH = 8  #: maximal number of partitioning passes.
+
+
+class Combiner(object):
+    """Mergeable aggregation of values.
+
+    States must be picklable. None values are ignored by default."""
+
+    __slots__ = []
+
+    name = None  #: combiner name.
+
+    def init(self):
+        """Get an initial state."""
+
+        return None
+
+    def add(self, state, value):
+        """Get a state updated with input value."""
+
+        raise NotImplementedError()
+
+    def merge(self, state, other):
+        """Get the state of two merged partial states. Input other state has
+        been computed on values after those of input state."""
+
+        raise NotImplementedError()
+
+    def result(self, state):
+        """Get the aggregated value of input state."""
+
+        return state
+
+
+class Count(Combiner):
+    """Count not None values."""
+
+    __slots__ = []
+
+    name = 'count'
+
+    def init(self):
+
+        return 0
+
+    def add(self, state, value):
+
+        return state if value is None else state + 1
+
+    def merge(self, state, other):
+
+        return state + other
+
+
+class Sum(Count):
+    """Sum values."""
+
+    __slots__ = []
+
+    name = 'sum'
+
+    def add(self, state, value):
+
+        return state if value is None else state + value
+
+
+class Min(Combiner):
+    """Minimal value."""
+
+    __slots__ = []
+
+    name = 'min'
+
+    def add(self, state, value):
+
+        if value is not None and (state is None or value < state):
+            state = value
+
+        return state
+
+    def merge(self, state, other):
+
+        return state if other is None else self.add(state, other)
+
+
+class Max(Combiner):
+    """Maximal value."""
+
+    __slots__ = []
+
+    name = 'max'
+
+    def add(self, state, value):
+
+        if value is not None and (state is None or value > state):
+            state = value
+
+        return state
+
+    def merge(self, state, other):
+
+        return state if other is None else self.add(state, other)
+
+
+class Mean(Combiner):
+    """Mean of values."""
+
+    __slots__ = []
+
+    name = 'mean'
+
+    def init(self):
+
+        return 0, 0
+
+    def add(self, state, value):
+
+        if value is not None:
+            state = state[0] + value, state[1] + 1
+
+        return state
+
+    def merge(self, state, other):
+
+        return state[0] + other[0], state[1] + other[1]
+
+    def result(self, state):
+
+        return state[0] / float(state[1]) if state[1] else None
+
+
+class First(Combiner):
+    """First not None value."""
+
+    __slots__ = []
+
+    name = 'first'
+
+    def init(self):
+
+        return ()
+
+    def add(self, state, value):
+
+        if not state and value is not None:
+            state = (value,)
+
+        return state
+
+    def merge(self, state, other):
+
+        return state or other
+
+    def result(self, state):
+
+        return state[0] if state else None
+
+
+class Last(First):
+    """Last not None value."""
+
+    __slots__ = []
+
+    name = 'last'
+
+    def add(self, state, value):
+
+        return state if value is None else (value,)
+
+    def merge(self, state, other):
+
+        return other or state
+
+
+#: combiners by name.
+COMBINERS = dict(
+    (cls.name, cls()) for cls in [Count, Sum, Min, Max, Mean, First, Last]
+)
+
+
+def getcombiner(combiner):
+    """Get a combiner from a name or a combiner.
+
+    :param combiner: combiner name (see COMBINERS) or combiner.
+    :rtype: Combiner"""
+
+    if isinstance(combiner, Combiner):
+        result = combiner
+
+    else:
+        try:
+            result = COMBINERS[combiner]
+
+        except KeyError:
+            raise ValueError('Unknown combiner {0}.'.format(combiner))
+
+    return result
+
+
+def hashgroup(
+        rows, keyfuncs, aggregates, maxgroups=DEFAULT_MAXGROUPS,
+        partitions=DEFAULT_PARTITIONS
+):
+    """Group and aggregate input rows.
+
+    Groups are generated in their first row order, unless partial states are
+    spilled in which case they are generated by partition.
+
+    :param Iterable rows: rows to group.
+    :param list keyfuncs: functions which take a row and return a key value.
+    :param list aggregates: list of (combiner, function which takes a row and
+        returns the value to aggregate).
+    :param int maxgroups: maximal number of groups in memory.
+    :param int partitions: number of spill partitions.
+    :return: generator of (key tuple, list of aggregated values).
+    """
+
+    combiners = [combiner for combiner, _ in aggregates]
+    valuefuncs = [valuefunc for _, valuefunc in aggregates]
+    groups = OrderedDict()
+    files = None
+
+    for row in rows:
+        key = tuple(keyfunc(row) for keyfunc in keyfuncs)
+        states = groups.get(key)
+
+        if states is None:
+            if len(groups) >= maxgroups:
+                files = _spill(groups, files, partitions)
+                groups = OrderedDict()
+
+            states = groups[key] = [combiner.init() for combiner in combiners]
+
+        for index, combiner in enumerate(combiners):
+            states[index] = combiner.add(
+                states[index], valuefuncs[index](row)
+            )
+
+    if files is None:
+        partials = [groups]
+
+    else:
+        files = _spill(groups, files, partitions)
+        partials = _partials(combiners, files, maxgroups, partitions, 1)
+
+    for partial in partials:
+        for key, states in partial.items():
+            yield key, [
+                combiner.result(state)
+                for combiner, state in zip(combiners, states)
+            ]
+
+
+def _spill(groups, files, partitions, depth=0):
+    """Append partial states of input groups to partition files.
+
+    :param int depth: partitioning pass. Each pass partitions by other
+        digits of the key hash.
+    :return: partition files."""
+
+    if files is None:
+        files = [TemporaryFile() for _ in range(partitions)]
+
+    chunks = [[] for _ in files]
+    base = len(files) ** depth
+
+    for item in groups.items():
+        chunks[hash(item[0]) // base % len(files)].append(item)
+
+    for spilled, chunk in zip(files, chunks):
+        if chunk:
+            dump(chunk, spilled, HIGHEST_PROTOCOL)
+
+    return files
+
+
+def _partials(combiners, files, maxgroups, partitions, depth):
+    """Generate merged groups of partition files.
+
+    :return: generator of OrderedDict."""
+
+    for spilled in files:
+        groups, subfiles = _merge(
+            combiners, spilled, maxgroups, partitions, depth
+        )
+
+        if subfiles is None:
+            yield groups
+
+        else:
+            for partial in _partials(
+                    combiners, subfiles, maxgroups, partitions, depth + 1
+            ):
+                yield partial
+
+
+def _merge(combiners, spilled, maxgroups, partitions, depth):
+    """Merge partial states of a partition file and close it.
+
+    Beyond maxgroups groups, merged states are spilled to new partition files
+    (unless the maximal depth is reached).
+
+    :return: merged groups, or None and new partition files.
+    :rtype: tuple"""
+
+    result = OrderedDict()
+    files = None
+
+    spilled.seek(0)
+
+    try:
+        while True:
+            for key, states in load(spilled):
+                merged = result.get(key)
+
+                if merged is None:
+                    if len(result) >= maxgroups and depth < MAXDEPTH:
+                        files = _spill(result, files, partitions, depth)
+                        result = OrderedDict()
+
+                    result[key] = states
+
+                else:
+                    result[key] = [
+                        combiner.merge(state, other) for combiner, state, other
+                        in zip(combiners, merged, states)
+                    ]
+
+    except EOFError:
+        pass
+
+    finally:
+        spilled.close()
+
+    if files is not None:
+        files = _spill(result, files, partitions, depth)
+        result = None
+
+    return result, files
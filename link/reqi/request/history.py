@@ -0,0 +1,518 @@
+# -*- coding: utf-8 -*-
+
+# --------------------------------------------------------------------
+# The MIT License (MIT)
+#
+# Copyright (c) 2016 Jonathan Labéjof <jonathan.labejof@gmail.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+# --------------------------------------------------------------------
+
+"""Specification of request queue histories.
+
+A history bounds the number of request contexts kept in memory by a count
+and/or a byte budget. Oldest contexts beyond the bounds are spilled to a
+store with the request ctx, and reloaded from it when they are read: they are
+then kept in memory again as the most recent ones.
+
+Queued contexts are layered on previous ones (see the ctx module), so the
+size of a context is the pickled size of the layers written since the
+previous context. When a context is spilled, layers of resident contexts
+shared with it are flattened in one layer which refers to the spilled
+context, so that they do not keep spilled layers in memory. Contexts spilled
+later only save their own layers and references to the spilled contexts
+which they are layered on, and stored contexts are deleted once they are
+neither spilled nor referred.
+
+Contexts which can not be pickled stay in memory and count in the bounds."""
+
+__all__ = ['History', 'SQLiteStore']
+
+from collections import deque
+
+from os import close, remove
+from tempfile import mkstemp
+
+from six.moves.cPickle import dumps, loads, PicklingError, HIGHEST_PROTOCOL
+
+import sqlite3
+
+from .ctx import Context, _DELETED
+from .utils import materialize
+
+
+class SQLiteStore(object):
+    """Store of pickled contexts in a sqlite database."""
+
+    __slots__ = ['path', '_conn', '_temp']
+
+    def __init__(self, path=None, *args, **kwargs):
+        """
+        :param str path: database path. Default is a temporary file removed
+            when this store is closed.
+        """
+
+        super(SQLiteStore, self).__init__(*args, **kwargs)
+
+        self._temp = path is None
+
+        if self._temp:
+            fd, path = mkstemp(suffix='.sqlite')
+            close(fd)
+
+        self.path = path
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS ctxs '
+            '(key INTEGER PRIMARY KEY AUTOINCREMENT, data BLOB)'
+        )
+
+    def save(self, data):
+        """Save pickled data.
+
+        :param bytes data: pickled context.
+        :return: data key.
+        :rtype: int"""
+
+        with self._conn:
+            cursor = self._conn.execute(
+                'INSERT INTO ctxs (data) VALUES (?)', (sqlite3.Binary(data),)
+            )
+
+        return cursor.lastrowid
+
+    def load(self, key):
+        """Load pickled data.
+
+        :param int key: data key.
+        :rtype: bytes"""
+
+        row = self._conn.execute(
+            'SELECT data FROM ctxs WHERE key = ?', (key,)
+        ).fetchone()
+
+        if row is None:
+            raise KeyError(key)
+
+        return bytes(row[0])
+
+    def delete(self, keys):
+        """Delete data.
+
+        :param list keys: data keys."""
+
+        with self._conn:
+            self._conn.executemany(
+                'DELETE FROM ctxs WHERE key = ?', [(key,) for key in keys]
+            )
+
+    def close(self):
+        """Close this store."""
+
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+            if self._temp:
+                remove(self.path)
+
+
+class History(object):
+    """Request context history policy."""
+
+    __slots__ = [
+        'maxcount', 'maxbytes', 'store', '_resident', '_pinned', '_bytes',
+        '_refs', '_parents', '_released'
+    ]
+
+    def __init__(
+            self, maxcount=None, maxbytes=None, store=None, *args, **kwargs
+    ):
+        """
+        :param int maxcount: maximal number of contexts in memory.
+        :param int maxbytes: maximal pickled size of contexts in memory. The
+            last context is kept in memory whatever its size.
+        :param store: spill store (with save, load and delete methods).
+            Default is a temporary SQLiteStore created at the first spill.
+        """
+
+        super(History, self).__init__(*args, **kwargs)
+
+        self.maxcount = maxcount
+        self.maxbytes = maxbytes
+        self.store = store
+        self._resident = deque()  # (request, size) in execution order
+        self._pinned = []  # (request, size) which can not be spilled
+        self._bytes = 0
+        self._refs = {}  # number of stored contexts referring to keys
+        self._parents = {}  # keys referred by stored contexts by key
+        self._released = set()  # keys of contexts which are not spilled
+
+    @property
+    def resident(self):
+        """Get the number of contexts in memory.
+
+        :rtype: int"""
+
+        return len(self._resident) + len(self._pinned)
+
+    def add(self, request):
+        """Register an executed request and spill the oldest contexts.
+
+        :param Request request: executed request."""
+
+        size = 0
+
+        if self.maxbytes is not None:
+            previous = self._resident[-1][0] if self._resident else None
+            size = len(_dumps(_local(request, previous)) or b'')
+
+        self._resident.append((request, size))
+        self._bytes += size
+
+        while len(self._resident) > 1 and (
+                (
+                    self.maxcount is not None and
+                    self.resident > self.maxcount
+                ) or (
+                    self.maxbytes is not None and self._bytes > self.maxbytes
+                )
+        ):
+            request, size = self._resident.popleft()
+
+            if self.spill(request):
+                self._bytes -= size
+
+            else:  # still in memory
+                self._pinned.append((request, size))
+
+    def spill(self, request):
+        """Spill the ctx and result context of input request.
+
+        Contexts which can not be pickled stay in memory.
+
+        :param Request request: request to spill.
+        :return: True if spilled.
+        :rtype: bool"""
+
+        data = _dumps(request.ctx, request.resctx)
+        result = data is not None
+
+        if result:
+            if self.store is None:
+                self.store = SQLiteStore()
+
+            key = self.store.save(data)
+            parents = _referred(request.ctx, request.resctx)
+
+            self._parents[key] = parents
+
+            for parent in parents:
+                self._refs[parent] = self._refs.get(parent, 0) + 1
+
+            self._cut(request, key)
+            request.spill(self, key)
+
+        return result
+
+    def _cut(self, request, key):
+        """Flatten layers of resident contexts shared with contexts of input
+        request in layers which refer to input spilled contexts key."""
+
+        layers = set()
+
+        for ctx in (request.ctx, request.resctx):
+            if isinstance(ctx, Context):
+                layers.update(id(_layer) for _layer in ctx.maps)
+
+        flattened = {}  # flattened layers by layer ids
+
+        residents = [resident for resident, _ in self._resident]
+        residents += [resident for resident, _ in self._pinned]
+
+        for resident in residents:
+            for ctx in (resident.ctx, resident.resctx):
+                if not isinstance(ctx, Context):
+                    continue
+
+                for start in range(1, len(ctx.maps)):  # first is written
+                    if id(ctx.maps[start]) in layers:
+                        stop = start
+
+                        while (
+                                stop < len(ctx.maps) and
+                                id(ctx.maps[stop]) in layers
+                        ):
+                            stop += 1
+
+                        ids = tuple(
+                            id(_layer) for _layer in ctx.maps[start:stop]
+                        )
+
+                        if ids not in flattened:
+                            flattened[ids] = _Spilled(
+                                Context(maps=[{}] + ctx.maps[start:stop])
+                            )
+                            flattened[ids].key = key
+
+                        ctx.maps[start:stop] = [flattened[ids]]
+                        break
+
+    def load(self, key):
+        """Load spilled contexts.
+
+        :param key: contexts key.
+        :return: request ctx and result context.
+        :rtype: tuple"""
+
+        datas = {}  # pickled layers by key
+        tovisit = [key]
+
+        while tovisit:
+            current = tovisit.pop()
+
+            if current not in datas:
+                datas[current] = loads(self.store.load(current))
+                tovisit += self._parents.get(current, ())
+
+        contexts = {}  # flattened result contexts of referred keys
+        tovisit = [key]
+
+        while tovisit:  # referred contexts are loaded before referring ones
+            current = tovisit[-1]
+            parents = [
+                parent for parent in self._parents.get(current, ())
+                if parent not in contexts
+            ]
+
+            if parents:
+                tovisit += parents
+
+            else:
+                tovisit.pop()
+                ctx, resctx = [
+                    _context(entries, contexts) for entries in datas[current]
+                ]
+                contexts[current] = _Spilled(resctx)
+                contexts[current].key = current
+
+        ctx, resctx = [_context(entries, contexts) for entries in datas[key]]
+
+        return ctx, Context() if resctx is None else resctx
+
+    def reload(self, request):
+        """Reload the spilled contexts of input request and keep them in
+        memory as the most recent ones.
+
+        :param Request request: spilled request."""
+
+        key = request.unspill()
+        request.ctx, request.resctx = self.load(key)
+        self._release([key])
+        self.add(request)
+
+    def _release(self, keys):
+        """Delete stored contexts of input keys once they are not referred.
+
+        :param list keys: keys of contexts which are not spilled anymore."""
+
+        self._released.update(keys)
+        todelete = []
+        tovisit = list(keys)
+
+        while tovisit:
+            key = tovisit.pop()
+
+            if key in self._released and not self._refs.get(key):
+                self._released.discard(key)
+                self._refs.pop(key, None)
+                todelete.append(key)
+
+                for parent in self._parents.pop(key, ()):
+                    self._refs[parent] -= 1
+                    tovisit.append(parent)
+
+        if todelete:
+            self.store.delete(todelete)
+
+    def drop(self, requests):
+        """Forget input requests.
+
+        Input requests are the last added ones.
+
+        :param list requests: requests to forget."""
+
+        dropped = set(id(request) for request in requests)
+        keys = []
+
+        while self._resident and id(self._resident[-1][0]) in dropped:
+            _, size = self._resident.pop()
+            self._bytes -= size
+
+        for request, size in list(self._pinned):
+            if id(request) in dropped:
+                self._pinned.remove((request, size))
+                self._bytes -= size
+
+        for request in requests:
+            key = request.unspill()
+
+            if key is not None:
+                keys.append(key)
+
+        if keys:
+            self._release(keys)
+
+    def close(self):
+        """Close the spill store."""
+
+        if self.store is not None:
+            self.store.close()
+
+
+class _Spilled(dict):
+    """Flattened layers of a spilled result context."""
+
+    __slots__ = ['key']  # spilled contexts key
+
+
+def _local(request, previous):
+    """Get values of layers of the request result context which are not
+    layers of the previous request result context.
+
+    :rtype: dict"""
+
+    ctx = request.resctx
+
+    if isinstance(ctx, Context) and previous is not None and isinstance(
+            previous.resctx, Context
+    ):
+        shared = set(id(_layer) for _layer in previous.resctx.maps)
+
+        ctx = Context(
+            maps=[{}] + [
+                _layer for _layer in ctx.maps if id(_layer) not in shared
+            ]
+        )
+
+    return ctx
+
+
+def _layers(ctx):
+    """Get layers of input ctx.
+
+    :rtype: list"""
+
+    if ctx is None:
+        result = []
+
+    elif isinstance(ctx, Context):
+        result = ctx.maps
+
+    else:
+        result = [ctx]
+
+    return result
+
+
+def _referred(*ctxs):
+    """Get keys of spilled contexts referred by layers of input ctxs.
+
+    :rtype: list"""
+
+    result = []
+
+    for ctx in ctxs:
+        for _layer in _layers(ctx):
+            if isinstance(_layer, _Spilled) and _layer.key not in result:
+                result.append(_layer.key)
+
+    return result
+
+
+def _dumps(*ctxs):
+    """Pickle layers of input ctxs, or return None if one can not be
+    pickled.
+
+    A layer is pickled as (key, values, deleted names) where key refers to
+    spilled contexts of flattened layers, and layers shared by ctxs are
+    pickled once."""
+
+    entries = {}  # entries by layer id
+
+    def entry(_layer):
+
+        result = entries.get(id(_layer))
+
+        if result is None:
+            if isinstance(_layer, _Spilled):
+                result = _layer.key, None, None
+
+            else:
+                result = None, dict(
+                    (name, materialize(_layer[name])) for name in _layer
+                    if _layer[name] is not _DELETED
+                ), [name for name in _layer if _layer[name] is _DELETED]
+
+            entries[id(_layer)] = result
+
+        return result
+
+    try:
+        result = dumps(
+            tuple(
+                None if ctx is None else [
+                    entry(_layer) for _layer in _layers(ctx)
+                ]
+                for ctx in ctxs
+            ),
+            HIGHEST_PROTOCOL
+        )
+
+    except (PicklingError, TypeError, AttributeError):
+        result = None
+
+    return result
+
+
+def _context(entries, contexts):
+    """Get a context from pickled layers.
+
+    :param list entries: pickled layers (see _dumps).
+    :param dict contexts: flattened result contexts by referred keys.
+    :rtype: Context"""
+
+    result = None
+
+    if entries is not None:
+        maps = [{}]
+
+        for key, values, deleted in entries:
+            if key is None:
+                _layer = values
+                _layer.update((name, _DELETED) for name in deleted)
+
+            else:
+                _layer = contexts[key]
+
+            maps.append(_layer)
+
+        result = Context(maps=maps)
+
+    return result
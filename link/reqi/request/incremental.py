@@ -0,0 +1,163 @@
+# -*- coding: utf-8 -*-
+
+# --------------------------------------------------------------------
+# The MIT License (MIT)
+#
+# Copyright (c) 2016 Jonathan Labéjof <jonathan.labejof@gmail.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+# --------------------------------------------------------------------
+
+"""Specification of incremental request execution.
+
+An incremental execution records names read and written by each plan step.
+When names are invalidated, a new execution only runs steps which read or
+write invalidated names, and steps which depend on them in turn. Values
+written by other steps are reused from the previous result context."""
+
+__all__ = ['Trace', 'runincremental', 'writtenschemas']
+
+from .base import ALIAS
+from .ctx import TrackingContext
+from .plan import _compile, _walk
+from .crud.create import Create
+from .crud.update import Update
+from .crud.delete import Delete
+
+
+#: names which are not dependencies, such as the alias registry.
+UNTRACKED = frozenset([ALIAS])
+
+
+class Trace(object):
+    """Names read and written by plan steps during an execution."""
+
+    __slots__ = ['fingerprint', 'steps']
+
+    def __init__(self, fingerprint, count, *args, **kwargs):
+        """
+        :param tuple fingerprint: structural fingerprint and context names
+            of executed nodes.
+        :param int count: number of plan steps.
+        """
+
+        super(Trace, self).__init__(*args, **kwargs)
+
+        self.fingerprint = fingerprint
+        self.steps = [(frozenset(), frozenset())] * count
+
+    def invalidated(self, names):
+        """Get steps to run again if input names are invalidated.
+
+        :param set names: invalidated names (except untracked names).
+        :return: step indexes and all invalidated names.
+        :rtype: tuple"""
+
+        names = set(names)
+        result = set()
+        changed = True
+
+        while changed:
+            changed = False
+
+            for index, (reads, writes) in enumerate(self.steps):
+                if index not in result and (reads & names or writes & names):
+                    result.add(index)
+                    names |= writes - UNTRACKED
+                    changed = True
+
+        return result, names
+
+    def kept(self, steps, ctx):
+        """Get values written by other steps than input steps.
+
+        :param set steps: step indexes to run again.
+        :param dict ctx: previous result context.
+        :rtype: dict"""
+
+        result = dict(
+            (name, ctx[name]) for name in UNTRACKED if name in ctx
+        )
+
+        for index, (_, writes) in enumerate(self.steps):
+            if index not in steps:
+                for name in writes:
+                    if name in ctx:
+                        result[name] = ctx[name]
+
+        return result
+
+
+def runincremental(request, invalid, trace=None):
+    """Execute input request incrementally.
+
+    :param Request request: request to execute.
+    :param set invalid: invalidated names since the trace execution.
+    :param Trace trace: previous execution trace. If None or if request nodes
+        changed, all steps are executed.
+    :return: result context and new trace.
+    :rtype: tuple"""
+
+    fingerprint, walk = _walk(request.nodes)
+    # nodes of the same structure may have other values
+    fingerprint = fingerprint, tuple(node.getctxname() for node in walk[0])
+
+    if request.plans is None:
+        plan, nodes = _compile(*walk), walk[0]
+
+    else:
+        plan, nodes = request.plans.get(request.nodes)
+
+    initctx = request.initctx()
+
+    if (
+            trace is None or trace.fingerprint != fingerprint or
+            not request.executed
+    ):
+        steps = None
+        trace = Trace(fingerprint, len(plan.steps))
+        maps = [{}] + initctx.freeze()
+
+    else:
+        steps, _ = trace.invalidated(invalid)
+        maps = [{}, trace.kept(steps, request.resctx)] + initctx.freeze()
+
+    ctx = TrackingContext(maps=maps)
+
+    ctx = plan.run(
+        nodes=nodes, dispatcher=request.dispatcher, ctx=ctx, steps=steps,
+        trace=trace.steps
+    )
+
+    return ctx, trace
+
+
+def writtenschemas(nodes):
+    """Get names of schemas written by input nodes.
+
+    :param list nodes: request nodes.
+    :rtype: set"""
+
+    result = set()
+
+    for node in nodes:
+        if isinstance(node, (Create, Update, Delete)) and node.schema:
+            result.add(node.schema)
+
+    return result
@@ -0,0 +1,455 @@
+# -*- coding: utf-8 -*-
+
+# --------------------------------------------------------------------
+# The MIT License (MIT)
+#
+# Copyright (c) 2016 Jonathan Labéjof <jonathan.labejof@gmail.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+# --------------------------------------------------------------------
+
+"""Specification of the hash join engine.
+
+Joins combine schema items which come from different systems. The hash table
+is built on the smaller side and probed with the other one. Whatever the
+build side is, results are produced in the left items order, then in the
+right items order.
+
+Before fetching the second side of a join from its system, keys of the first
+side are passed sideways to reduce fetched items: with an exact key set sent
+by chunks to the system such as a membership predicate, or with a Bloom
+filter applied on fetched items when keys are too many."""
+
+__all__ = [
+    'hashjoin', 'keyfunc', 'runjoin', 'BloomFilter', 'KeyFilter',
+    'INNER', 'LEFT', 'SEMI', 'ANTI'
+]
+
+from math import ceil, log
+
+from .base import Ref
+from .expr.utils import getctxname, getsysschprop
+
+INNER = 'inner'  #: items of both sides which match.
+LEFT = 'left'  #: inner join plus left items without match.
+SEMI = 'semi'  #: left items with at least one match.
+ANTI = 'anti'  #: left items without match.
+
+DEFAULT_MAXKEYS = 100000  #: maximal size of exact key sets.
+DEFAULT_ERRORRATE = 0.01  #: default Bloom filter false positive rate.
+DEFAULT_CHUNKSIZE = 1000  #: maximal number of keys per membership predicate.
+
+
+def keyfunc(names):
+    """Get a function which extracts a join key from an item.
+
+    :param names: property name, context name (system/schema/prop) or list of
+        them for composite keys.
+    :return: function which takes an item and returns its key, or None if
+        a key property is missing.
+    """
+
+    if isinstance(names, (list, tuple)):
+        props = [_getprop(name) for name in names]
+
+        def result(item):
+            key = tuple(item.get(prop) for prop in props)
+            return None if None in key else key
+
+    else:
+        prop = _getprop(names)
+
+        def result(item):
+            return item.get(prop)
+
+    return result
+
+
+def _getprop(name):
+    """Get a property name from a context name or a property name."""
+
+    if name.count('/') == 2:
+        name = getsysschprop(name)[2]
+
+    return name
+
+
+def hashjoin(
+        left, right, leftkey, rightkey, how=INNER,
+        leftname='left', rightname='right'
+):
+    """Join input items.
+
+    :param Iterable left: left items.
+    :param Iterable right: right items.
+    :param leftkey: left key names (see keyfunc).
+    :param rightkey: right key names (see keyfunc).
+    :param str how: join type (INNER, LEFT, SEMI or ANTI).
+    :param str leftname: left item name in joined rows.
+    :param str rightname: right item name in joined rows.
+    :return: list of rows by item names for INNER and LEFT joins, list of left
+        items for SEMI and ANTI joins. Missing right items of LEFT joins are
+        None.
+    :rtype: list"""
+
+    if how not in (INNER, LEFT, SEMI, ANTI):
+        raise ValueError('Wrong join type {0}.'.format(how))
+
+    left = list(left)
+    right = list(right)
+    lkey = keyfunc(leftkey)
+    rkey = keyfunc(rightkey)
+
+    if len(left) < len(right):  # build on left and probe with right
+        table = _build(left, lkey)
+        matches = [[] for _ in left]
+
+        for item in right:
+            key = rkey(item)
+
+            if key is not None:
+                for index in table.get(key, ()):
+                    matches[index].append(item)
+
+    else:  # build on right and probe with left
+        table = _build(right, rkey)
+        matches = []
+
+        for item in left:
+            key = lkey(item)
+            matches.append(
+                [] if key is None else
+                [right[index] for index in table.get(key, ())]
+            )
+
+    result = []
+
+    if how in (INNER, LEFT):
+        for item, ritems in zip(left, matches):
+
+            for ritem in ritems:
+                result.append({leftname: item, rightname: ritem})
+
+            if how == LEFT and not ritems:
+                result.append({leftname: item, rightname: None})
+
+    else:
+        keep = how == SEMI
+        result = [
+            item for item, ritems in zip(left, matches)
+            if bool(ritems) is keep
+        ]
+
+    return result
+
+
+def _build(items, key):
+    """Build a hash table of item indexes by key."""
+
+    result = {}
+
+    for index, item in enumerate(items):
+        value = key(item)
+
+        if value is not None:
+            result.setdefault(value, []).append(index)
+
+    return result
+
+
+class BloomFilter(object):
+    """Probabilistic set without false negatives."""
+
+    __slots__ = ['size', 'hashes', 'bits']
+
+    def __init__(
+            self, capacity, errorrate=DEFAULT_ERRORRATE, *args, **kwargs
+    ):
+        """
+        :param int capacity: expected number of keys.
+        :param float errorrate: false positive rate at capacity.
+        """
+
+        super(BloomFilter, self).__init__(*args, **kwargs)
+
+        capacity = max(capacity, 1)
+
+        self.size = int(ceil(-capacity * log(errorrate) / (log(2) ** 2)))
+        self.hashes = max(1, int(round(self.size * log(2) / capacity)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, key):
+        """Get bit positions of input key with double hashing."""
+
+        first = hash((key, 0))
+        second = hash((key, 1)) | 1
+
+        return [
+            (first + index * second) % self.size
+            for index in range(self.hashes)
+        ]
+
+    def add(self, key):
+        """Add a key.
+
+        :param key: hashable key."""
+
+        for position in self._positions(key):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, key):
+
+        result = True
+
+        for position in self._positions(key):
+            if not self.bits[position >> 3] & (1 << (position & 7)):
+                result = False
+                break
+
+        return result
+
+
+class KeyFilter(object):
+    """Join key filter which is an exact key set while keys are few enough,
+    and a Bloom filter otherwise."""
+
+    __slots__ = ['keys', 'bloom']
+
+    def __init__(
+            self, items, key, maxkeys=DEFAULT_MAXKEYS,
+            errorrate=DEFAULT_ERRORRATE, *args, **kwargs
+    ):
+        """
+        :param list items: items from where get keys.
+        :param key: function which returns the key of an item (see keyfunc).
+        :param int maxkeys: maximal size of the exact key set.
+        :param float errorrate: Bloom filter false positive rate.
+        """
+
+        super(KeyFilter, self).__init__(*args, **kwargs)
+
+        self.keys = set()
+        self.bloom = None
+
+        for item in items:
+            value = key(item)
+
+            if value is None:
+                continue
+
+            if self.bloom is None:
+                self.keys.add(value)
+
+                if len(self.keys) > maxkeys:  # switch to a Bloom filter
+                    self.bloom = BloomFilter(len(items), errorrate)
+
+                    for value in self.keys:
+                        self.bloom.add(value)
+
+                    self.keys = None
+
+            else:
+                self.bloom.add(value)
+
+    def __contains__(self, key):
+
+        if self.bloom is None:
+            result = key in self.keys
+
+        else:
+            result = key in self.bloom
+
+        return result
+
+
+def runjoin(
+        node, dispatcher, ctx, how=INNER, maxkeys=DEFAULT_MAXKEYS,
+        chunksize=DEFAULT_CHUNKSIZE
+):
+    """Join items of the two expression params of input node.
+
+    Params are expressions, or references to aliased expressions, which refer
+    to a system, a schema and a key property. Missing schema items are fetched
+    from their system, the most selective side first (according to the
+    dispatcher cost model row estimates). The other side is reduced with the
+    keys of the first one if the join type allows it. The joined rows are
+    named by the context name of each param system/schema and saved in ctx
+    under the node context name.
+
+    :param Function node: function with two expression params.
+    :param b3j0f.reqi.dispatch.Dispatcher dispatcher: dispatcher.
+    :param dict ctx: execution context.
+    :param str how: join type.
+    :param int maxkeys: maximal size of exact key sets.
+    :param int chunksize: maximal number of keys per system call.
+    :return: ctx."""
+
+    exprs = []
+
+    for param in node.params[:2]:
+        if isinstance(param, Ref):  # resolve the aliased expression
+            ctx = param.run(dispatcher=dispatcher, ctx=ctx)
+            param = param.ref
+
+        exprs.append(param)
+
+    lexpr, rexpr = exprs
+    keys = [
+        keyfunc(getctxname(expr.system, expr.schema, expr.prop))
+        for expr in exprs
+    ]
+    # sides which can be reduced by the keys of the other side
+    reducible = [how == INNER, True]
+
+    missing = [
+        index for index, expr in enumerate(exprs)
+        if expr.schema not in ctx and expr.system is not None
+    ]
+
+    if len(missing) == 2 and how == INNER:  # fetch the selective side first
+        missing.sort(key=lambda index: _rows(dispatcher, exprs[index]))
+
+    for index in missing:
+        other = 1 - index
+        keyfilter = None
+
+        if reducible[index] and exprs[other].schema in ctx:
+            keyfilter = KeyFilter(
+                _items(ctx, exprs[other]), keys[other], maxkeys=maxkeys
+            )
+
+        ctx = _fetch(
+            exprs[index], keys[index], dispatcher, ctx,
+            keyfilter=keyfilter, chunksize=chunksize
+        )
+
+    ctx[node.getctxname()] = hashjoin(
+        left=ctx.get(lexpr.schema) or (),
+        right=ctx.get(rexpr.schema) or (),
+        leftkey=getctxname(lexpr.system, lexpr.schema, lexpr.prop),
+        rightkey=getctxname(rexpr.system, rexpr.schema, rexpr.prop),
+        how=how,
+        leftname=getctxname(system=lexpr.system, schema=lexpr.schema),
+        rightname=getctxname(system=rexpr.system, schema=rexpr.schema)
+    )
+
+    return ctx
+
+
+def _rows(dispatcher, expr):
+    """Get the row estimate of input expression system."""
+
+    cost = getattr(dispatcher, 'cost', None)
+
+    return 0 if cost is None else cost.stats(expr.system).rows
+
+
+def _call(expr, nodes, dispatcher, ctx):
+    """Run input nodes with the system of input expression, through the
+    dispatcher result cache if any.
+
+    The call is measured by the dispatcher cost model, if any, with the rows
+    of the expression schema, so that the cost model row estimates order the
+    next join fetches.
+
+    :return: ctx."""
+
+    cost = getattr(dispatcher, 'cost', None)
+
+    def call(ctx):
+
+        def run(name):
+            return dispatcher.systems[name].run(
+                nodes=nodes, dispatcher=dispatcher, ctx=ctx
+            ) or ctx
+
+        if cost is None:
+            result = run(expr.system)
+
+        else:
+            result = cost.call([expr.system], run, names=[expr.schema])
+
+        return result
+
+    cache = getattr(dispatcher, 'cache', None)
+
+    if cache is None:
+        result = call(ctx)
+
+    else:
+        result = cache.call(expr.system, nodes, ctx, call)
+
+    return result
+
+
+def _items(ctx, expr):
+    """Get ctx items of input expression schema such as a list."""
+
+    result = ctx[expr.schema]
+
+    if not isinstance(result, list):
+        result = ctx[expr.schema] = list(result or ())
+
+    return result
+
+
+def _fetch(expr, key, dispatcher, ctx, keyfilter=None, chunksize=None):
+    """Fetch input expression schema items from its system.
+
+    :param Expression expr: expression to fetch.
+    :param key: item key function.
+    :param b3j0f.reqi.dispatch.Dispatcher dispatcher: dispatcher.
+    :param dict ctx: execution context.
+    :param KeyFilter keyfilter: filter of keys to fetch.
+    :param int chunksize: maximal number of keys per system call.
+    :return: ctx."""
+
+    if keyfilter is None or keyfilter.bloom is not None:
+        ctx = _call(expr, [expr], dispatcher, ctx)
+
+        if keyfilter is not None:  # post-filter
+            ctx[expr.schema] = [
+                item for item in ctx.get(expr.schema) or ()
+                if key(item) in keyfilter
+            ]
+
+    else:  # send keys to the system by chunks
+        from .expr.join import In
+
+        values = list(keyfilter.keys)
+        chunksize = chunksize or max(len(values), 1)
+        items = []
+
+        for start in range(0, len(values), chunksize):
+            subctx = ctx.copy()
+            subctx.pop(expr.schema, None)
+
+            chunk = values[start: start + chunksize]
+            predicate = In(params=[expr, chunk])
+            subctx = _call(expr, [predicate], dispatcher, subctx)
+
+            chunk = set(chunk)
+            items += [  # systems may ignore the predicate
+                item for item in subctx.get(expr.schema) or ()
+                if key(item) in chunk
+            ]
+
+        ctx[expr.schema] = items
+
+    return ctx
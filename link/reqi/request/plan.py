@@ -0,0 +1,861 @@
+# -*- coding: utf-8 -*-
+
+# --------------------------------------------------------------------
+# The MIT License (MIT)
+#
+# Copyright (c) 2016 Jonathan Labéjof <jonathan.labejof@gmail.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+# --------------------------------------------------------------------
+
+"""Specification of execution plans.
+
+A plan is a flat list of steps compiled once from a node tree. A step refers
+to nodes by their index in the tree walk, and records whether nodes are
+executed by themselves, locally or delegated to a system.
+
+Predicates (functions with an operator name) whose inputs come from one
+system are pushed down to this system. Predicates of a conjunction are given
+to their system in one call, and only cross-system predicates remain
+executed in memory, except equalities between expressions of two systems
+which are executed with a hash join.
+
+Structurally identical predicates and pure functions without alias (same
+context name) are common subexpressions: only the first one is executed, by a
+step of its own or among the nodes delegated to a system, and the others
+reuse its result from the execution context.
+
+Create nodes of a system are delegated to this system, and consecutive ones
+are given to the system in one call, so that it can send them with one bulk
+write.
+
+Consecutive SYSTEM steps which do not read or write the same context names
+and schemas are independent: they are given together to the dispatcher
+executor, each one on its own copy of the execution context, and their
+written values are set in the execution context in the step order.
+
+Plans only depend on the tree structure (node types and systems), so they are
+cached by structural fingerprint and reused by requests of the same shape."""
+
+__all__ = ['Plan', 'PlanCache', 'compileplan', 'runplan']
+
+from b3j0f.utils.version import OrderedDict
+
+from six import get_unbound_function
+
+from .base import Node, Ref
+from .columnar import COLUMNAR, tocolumnar, torows
+from .ctx import written
+from .join import runjoin
+
+RUN = 'run'  #: step kind which executes node.run.
+LOCAL = 'local'  #: step kind which executes a function locally.
+SYSTEM = 'system'  #: step kind which delegates functions to a system.
+JOIN = 'join'  #: step kind which joins items of two systems.
+
+AND = 'and'  #: conjunction operator name.
+EQ = 'eq'  #: equality operator name.
+
+DEFAULT_CACHESIZE = 256  #: default maximal number of cached plans.
+
+
+class Step(object):
+    """Plan step."""
+
+    __slots__ = ['indexes', 'kind', 'system', 'ends', 'shared']
+
+    def __init__(
+            self, indexes, kind, system=None, ends=None, shared=None,
+            *args, **kwargs
+    ):
+        """
+        :param list indexes: node indexes in the tree walk. Only SYSTEM steps
+            may refer to several nodes.
+        :param str kind: step kind (RUN, LOCAL, SYSTEM or JOIN).
+        :param str system: system name if kind is SYSTEM.
+        :param list ends: walk index after the subtree of each node.
+        :param list shared: indexes of common subexpressions of step nodes
+            which are not executed.
+        """
+
+        super(Step, self).__init__(*args, **kwargs)
+
+        self.indexes = indexes
+        self.kind = kind
+        self.system = system
+        self.ends = [index + 1 for index in indexes] if ends is None else ends
+        self.shared = [] if shared is None else shared
+
+    def covers(self, step):
+        """True if a node of input step is in the subtree of a node of this.
+
+        :param Step step: step to check.
+        :rtype: bool"""
+
+        return any(
+            start <= index < end
+            for start, end in zip(self.indexes, self.ends)
+            for index in step.indexes
+        )
+
+    def names(self, nodes):
+        """Get context names and schemas which step nodes may read or write.
+
+        Schemas of expressions with a system are also named by a couple
+        (system, schema), and a leaf node which refers to a system without
+        schema by (system, None): it may read or write all system schemas
+        (see independent).
+
+        :param list nodes: nodes in the walk order of the compiled tree.
+        :rtype: set"""
+
+        result = set()
+        tovisit = [nodes[index] for index in self.indexes]
+
+        while tovisit:
+            node = tovisit.pop()
+            result.add(node.getctxname())
+
+            if isinstance(node, Ref):
+                node = node.ref
+
+            system = getattr(node, 'system', None)
+            schema = getattr(node, 'schema', None)
+            params = [
+                param for param in getattr(node, 'params', None) or ()
+                if isinstance(param, Node)
+            ]
+
+            if schema is not None:
+                result.add(schema)
+
+            if system is not None and (schema is not None or not params):
+                result.add((system, schema))
+
+            tovisit += params
+
+        return result
+
+    def __repr__(self):
+
+        return 'Step({0}, {1}, {2})'.format(
+            self.indexes, self.kind, self.system
+        )
+
+
+class Plan(object):
+    """Flat execution plan of a node tree."""
+
+    __slots__ = ['steps']
+
+    def __init__(self, steps=None, *args, **kwargs):
+        """
+        :param list steps: steps to execute in order.
+        """
+
+        super(Plan, self).__init__(*args, **kwargs)
+
+        self.steps = [] if steps is None else steps
+
+    def run(self, nodes, dispatcher, ctx, steps=None, trace=None):
+        """Execute this plan on input walked nodes.
+
+        :param list nodes: nodes in the walk order of the compiled tree.
+        :param b3j0f.reqi.dispatch.Dispatcher dispatcher: dispatcher to run.
+        :param dict ctx: execution context.
+        :param set steps: indexes of steps to execute. Default is all steps.
+        :param list trace: list where save names read and written by each
+            executed step, by step index. ctx must be a TrackingContext.
+        :return: execution context.
+        :rtype: dict"""
+
+        executor = getattr(dispatcher, 'executor', None)
+
+        if trace is not None:
+            ctx.commit()
+
+            for index, step in enumerate(self.steps):
+
+                if steps is None or index in steps:
+                    ctx = self.runstep(step, nodes, dispatcher, ctx)
+                    trace[index] = ctx.commit()
+
+        elif executor is None:
+            for index, step in enumerate(self.steps):
+
+                if steps is None or index in steps:
+                    ctx = self.runstep(step, nodes, dispatcher, ctx)
+
+        else:
+            for group in self.groups(nodes, steps):
+                ctx = self.rungroup(group, nodes, dispatcher, ctx, executor)
+
+        return ctx
+
+    def groups(self, nodes, steps=None):
+        """Group consecutive SYSTEM steps which are independent.
+
+        :param list nodes: nodes in the walk order of the compiled tree.
+        :param set steps: indexes of steps to group. Default is all steps.
+        :return: list of step lists.
+        :rtype: list"""
+
+        result = []
+        names = None  # names of the last group
+
+        for index, step in enumerate(self.steps):
+
+            if steps is not None and index not in steps:
+                continue
+
+            if step.kind == SYSTEM and names is not None:
+                stepnames = step.names(nodes)
+
+                if independent(names, stepnames):
+                    result[-1].append(step)
+                    names |= stepnames
+                    continue
+
+            result.append([step])
+            names = step.names(nodes) if step.kind == SYSTEM else None
+
+        return result
+
+    def rungroup(self, group, nodes, dispatcher, ctx, executor):
+        """Execute a group of independent steps with an executor.
+
+        :param list group: steps to execute.
+        :param list nodes: nodes in the walk order of the compiled tree.
+        :param b3j0f.reqi.dispatch.Dispatcher dispatcher: dispatcher to run.
+        :param dict ctx: execution context.
+        :param b3j0f.reqi.executor.Executor executor: executor to use.
+        :return: execution context.
+        :rtype: dict"""
+
+        if len(group) == 1:
+            ctx = self.runstep(group[0], nodes, dispatcher, ctx)
+
+        else:
+            copies = [ctx.copy() for _ in group]
+
+            def runstep(index):
+
+                sctx = self.runstep(
+                    group[index], nodes, dispatcher, copies[index]
+                )
+
+                return written(ctx, sctx)
+
+            for values in executor.map(runstep, range(len(group))):
+                for name, value in values:
+                    ctx[name] = value
+
+            for step in group:
+                for index in step.indexes + step.shared:
+                    nodes[index].ctx = ctx
+
+        return ctx
+
+    def runstep(self, step, nodes, dispatcher, ctx):
+        """Execute one step of this plan.
+
+        :param Step step: step to execute.
+        :param list nodes: nodes in the walk order of the compiled tree.
+        :param b3j0f.reqi.dispatch.Dispatcher dispatcher: dispatcher to run.
+        :param dict ctx: execution context.
+        :return: execution context.
+        :rtype: dict"""
+
+        stepnodes = [nodes[index] for index in step.indexes]
+
+        if step.kind == RUN:
+            ctx = stepnodes[0].run(dispatcher=dispatcher, ctx=ctx)
+
+            cache = getattr(dispatcher, 'cache', None)
+
+            if cache is not None:
+                cache.written(stepnodes)
+
+            if ctx.get(COLUMNAR):
+                tocolumnar(ctx, step.names(nodes))
+
+            self.share(step, nodes, ctx)
+
+        elif step.kind == JOIN:
+            node = stepnodes[0]
+
+            if node.getctxname() not in ctx:
+                ctx = runjoin(node, dispatcher=dispatcher, ctx=ctx)
+
+            node.ctx = ctx
+            self.share(step, nodes, ctx)
+
+        else:
+            ctx, torun = self.prepare(step, nodes, dispatcher, ctx)
+
+            if torun:
+
+                if step.kind == LOCAL:
+                    ctx = torun[0]._prun(dispatcher=dispatcher, ctx=ctx) or ctx
+
+                else:
+                    ctx = delegate(step.system, torun, dispatcher, ctx)
+
+            self.finish(step, nodes, ctx)
+
+        return ctx
+
+    def prepare(self, step, nodes, dispatcher, ctx):
+        """Prepare a LOCAL or SYSTEM step execution.
+
+        :return: ctx and step nodes to execute (not already in ctx).
+        :rtype: tuple"""
+
+        torun = []
+        names = set()
+
+        for node in (nodes[index] for index in step.indexes):
+            name = node.getctxname()
+
+            if name not in ctx and name not in names:
+                names.add(name)
+                torun.append(node)
+
+        for node in torun:
+            ctx = Node._run(node, dispatcher=dispatcher, ctx=ctx) or ctx
+
+        if torun and step.kind == SYSTEM and ctx.get(COLUMNAR):
+            torows(ctx, step.names(nodes))  # systems read rows
+
+        return ctx, torun
+
+    def finish(self, step, nodes, ctx):
+        """Finish a LOCAL or SYSTEM step execution."""
+
+        if ctx.get(COLUMNAR):  # convert new system and local rows
+            tocolumnar(ctx, step.names(nodes))
+
+        for index in step.indexes:
+            nodes[index].ctx = ctx
+
+        self.share(step, nodes, ctx)
+
+    def share(self, step, nodes, ctx):
+        """Set the execution context of common subexpressions of step nodes.
+        """
+
+        for index in step.shared:
+            nodes[index].ctx = ctx
+
+
+def independent(names, others):
+    """True if steps which use input names do not read or write the same
+    context names.
+
+    :param set names: names of steps (see Step.names).
+    :param set others: names of other steps.
+    :rtype: bool"""
+
+    def systems(names, wildcard=False):
+        return set(
+            name[0] for name in names
+            if isinstance(name, tuple) and (name[1] is None or not wildcard)
+        )
+
+    return (
+        names.isdisjoint(others) and
+        systems(names, True).isdisjoint(systems(others)) and
+        systems(others, True).isdisjoint(systems(names))
+    )
+
+
+def delegate(name, nodes, dispatcher, ctx):
+    """Delegate nodes to a system, through the dispatcher result cache if
+    any.
+
+    Nodes which read one schema are given to the cheapest system hosting
+    the schema if the dispatcher routes by cost (runcheapest). Writes are
+    always given to their system.
+
+    :param str name: system name.
+    :param list nodes: nodes to delegate.
+    :param b3j0f.reqi.dispatch.Dispatcher dispatcher: dispatcher to run.
+    :param dict ctx: execution context.
+    :return: execution context.
+    :rtype: dict"""
+
+    runcheapest = getattr(dispatcher, 'runcheapest', None)
+
+    def run(ctx):
+
+        cheapest, schema = route(nodes, runcheapest)
+
+        if cheapest:
+            result = runcheapest(nodes, schema, system=name, ctx=ctx)
+
+        else:
+            result = dispatcher.systems[name].run(
+                nodes=nodes, dispatcher=dispatcher, ctx=ctx
+            )
+
+        return result or ctx
+
+    cache = getattr(dispatcher, 'cache', None)
+
+    if cache is None:
+        result = run(ctx)
+
+    else:
+        result = cache.call(name, nodes, ctx, run)
+
+    return result
+
+
+def delegatebatch(name, batches, dispatcher):
+    """Delegate nodes of several requests to a system, through the
+    dispatcher result cache if any.
+
+    Batches are routed such as with delegate, and batches of a same route
+    are given in one call to the system (see batch.callbatch).
+
+    :param str name: system name.
+    :param list batches: list of (nodes, ctx).
+    :param b3j0f.reqi.dispatch.Dispatcher dispatcher: dispatcher to run.
+    :return: execution context per batch.
+    :rtype: list"""
+
+    from .batch import callbatch
+
+    runcheapest = getattr(dispatcher, 'runcheapest', None)
+    cache = getattr(dispatcher, 'cache', None)
+
+    result = [ctx for _, ctx in batches]
+    keys = [None] * len(batches)  # cache keys
+    routes = OrderedDict()  # indexes of batches to run by route
+
+    for index, (nodes, ctx) in enumerate(batches):
+        if cache is not None:
+            keys[index] = cache.key(name, nodes, ctx)
+
+        if cache is None or not cache.load(name, nodes, ctx, keys[index]):
+            routes.setdefault(route(nodes, runcheapest), []).append(index)
+
+    for (cheapest, schema), indexes in routes.items():
+        torun = [batches[index] for index in indexes]
+        prevs = None if cache is None else [dict(ctx) for _, ctx in torun]
+
+        if cheapest:
+            ctxs = runcheapest(
+                [node for nodes, _ in torun for node in nodes], schema,
+                system=name, batches=torun
+            )
+
+        else:
+            ctxs = callbatch(dispatcher.systems[name], torun, dispatcher)
+
+        for position, (index, ctx) in enumerate(zip(indexes, ctxs)):
+            result[index] = ctx
+
+            if cache is not None:
+                cache.save(
+                    name, torun[position][0], ctx, prevs[position],
+                    keys[index]
+                )
+
+    return result
+
+
+def route(nodes, runcheapest):
+    """Get the route of delegated nodes.
+
+    :param list nodes: delegated nodes.
+    :param runcheapest: dispatcher runcheapest method if any.
+    :return: True if nodes are given to the cheapest system, and the schema
+        name which they read if only one.
+    :rtype: tuple"""
+
+    from ..cache import readschemas
+
+    cheapest = runcheapest is not None and not any(
+        _iswrite(node) for node in nodes
+    )
+    schema = None
+
+    if cheapest:
+        schemas = readschemas(nodes)
+
+        if schemas is not None and len(schemas) == 1:
+            schema = next(iter(schemas))
+
+    return cheapest, schema
+
+
+def _ispredicate(node):
+    """True if input node is a predicate which can be pushed to a system."""
+
+    return getattr(node, 'opname', None) is not None
+
+
+def _iswrite(node):
+    """True if input node is a Create node which can be delegated to a
+    system.
+
+    Update and Delete nodes have no filter to give to a system, so they are
+    executed on the items of the execution context."""
+
+    from .crud import Create
+
+    return isinstance(node, Create) and node.schema is not None
+
+
+def _isjoin(node):
+    """True if input node is an equality between expressions of two
+    systems."""
+
+    from .expr.base import Expression
+    from .expr.func import Function
+
+    result = getattr(node, 'opname', None) == EQ and len(node.params) == 2
+
+    if result:
+        systems = set()
+
+        for param in node.params:
+            if isinstance(param, Ref):
+                param = param.ref
+
+            if (
+                    not isinstance(param, Expression) or
+                    isinstance(param, Function) or
+                    param.system is None or param.schema is None
+            ):
+                result = False
+                break
+
+            systems.add(param.system)
+
+        result = result and len(systems) == 2
+
+    return result
+
+
+def _isplanned(node):
+    """True if input node execution is driven by a plan."""
+
+    from .expr.func import Function
+
+    return isinstance(node, Function) and (
+        get_unbound_function(type(node)._run)
+        is get_unbound_function(Function._run)
+    )
+
+
+def _iscommon(node):
+    """True if input node may be a common subexpression.
+
+    Other functions than predicates and pure functions may write other names
+    than their context name, such as schema items, and executing equal
+    functions once would change results."""
+
+    from .expr.func import Function
+
+    return isinstance(node, Function) and node.alias is None and (
+        node.opname is not None or node.pure
+    )
+
+
+def _walk(nodes):
+    """Walk input node trees in pre-order.
+
+    :param list nodes: root nodes.
+    :return: structural fingerprint and walk. The walk contains walked nodes,
+        node systems, node children indexes, root indexes and the index of
+        the first walked common subexpression by index.
+    :rtype: tuple"""
+
+    walked = []
+    systems = []
+    children = []
+    firsts = {}  # first walked index by common subexpression name
+    commons = {}
+
+    def walk(node):
+
+        index = len(walked)
+        walked.append(node)
+        systems.append(None)
+        children.append(None)
+
+        first = None
+
+        if _iscommon(node):
+            first = firsts.setdefault(node.getctxname(), index)
+
+            if first == index:
+                first = None
+
+            else:
+                commons[index] = first
+
+        if _isplanned(node):
+            nodesystems = set() if node.system is None else set([node.system])
+            fparams = []
+            indexes = []
+
+            for param in node.params:
+                if isinstance(param, Node):
+                    indexes.append(len(walked))
+                    fparams.append(walk(param))
+                    nodesystems |= systems[indexes[-1]]
+
+            result = (type(node), node.system, tuple(fparams), first)
+            children[index] = indexes
+
+        else:
+            nodesystems = set(node.getsystems())
+            result = (
+                type(node), tuple(sorted(nodesystems)), _isjoin(node),
+                _ispredicate(node), _iswrite(node), first
+            )
+
+        systems[index] = frozenset(nodesystems)
+
+        return result
+
+    roots = []
+    fingerprint = []
+
+    for node in nodes:
+        roots.append(len(walked))
+        fingerprint.append(walk(node))
+
+    return tuple(fingerprint), (walked, systems, children, roots, commons)
+
+
+def compileplan(nodes):
+    """Compile a plan from input node trees.
+
+    :param list nodes: root nodes to execute in order.
+    :return: plan and walked nodes.
+    :rtype: tuple"""
+
+    _, walk = _walk(nodes)
+
+    return _compile(*walk), walk[0]
+
+
+def _compile(walked, systems, children, roots, commons=None):
+    """Compile a plan from a tree walk."""
+
+    steps = []
+    executed = {}  # step by index of executed node
+    commons = {} if commons is None else commons
+    ends = list(range(1, len(walked) + 1))  # walk index after each subtree
+
+    for index in reversed(range(len(walked))):
+        if children[index]:
+            ends[index] = ends[children[index][-1]]
+
+    def newstep(indexes, kind, system=None):
+
+        step = Step(indexes, kind, system, [ends[index] for index in indexes])
+        steps.append(step)
+
+        for index in indexes:
+            executed[index] = step
+
+    def share(index):
+        """True if input node is a common subexpression already executed."""
+
+        step = executed.get(commons.get(index))
+
+        result = step is not None
+
+        if result:
+            step.shared.append(index)
+            executed[index] = step
+
+        return result
+
+    def compilenode(index):
+
+        if share(index):
+            return
+
+        node = walked[index]
+        nodesystems = systems[index]
+
+        if len(nodesystems) == 1 and (
+                children[index] is not None or _ispredicate(node) or
+                _iswrite(node)
+        ):  # push down the whole subtree
+            newstep([index], SYSTEM, next(iter(nodesystems)))
+
+        elif _isjoin(node):
+            newstep([index], JOIN)
+
+        elif children[index] is None:
+            newstep([index], RUN)
+
+        elif node.opname == AND:
+            compileconjunction(index)
+
+        elif not nodesystems:
+            newstep([index], LOCAL)
+
+        else:  # execute params until remaining systems are unique
+            remaining = list(children[index])
+            rsystems = nodesystems
+
+            while len(rsystems) > 1:
+                compilenode(remaining.pop(0))
+
+                rsystems = set() if node.system is None else set([node.system])
+                for child in remaining:
+                    rsystems |= systems[child]
+
+            if rsystems:
+                newstep([index], SYSTEM, next(iter(rsystems)))
+
+            else:
+                newstep([index], LOCAL)
+
+    def compileconjunction(index):
+        """Push down conjunction predicates by system and keep residuals."""
+
+        pushed = OrderedDict()  # predicate indexes by system
+        residuals = []
+        commonpushed = {}  # common pushed predicates by first index
+
+        for child in children[index]:
+
+            if share(child):
+                continue
+
+            first = commons.get(child, child)
+
+            if first in commonpushed:
+                commonpushed[first].append(child)
+
+            elif len(systems[child]) == 1 and _ispredicate(walked[child]):
+                commonpushed[first] = []
+                system = next(iter(systems[child]))
+                pushed.setdefault(system, []).append(child)
+
+            else:
+                residuals.append(child)
+
+        for system in pushed:
+            newstep(pushed[system], SYSTEM, system)
+
+            for child in pushed[system]:
+                for common in commonpushed[commons.get(child, child)]:
+                    steps[-1].shared.append(common)
+                    executed[common] = steps[-1]
+
+        for child in residuals:
+            compilenode(child)
+
+        newstep([index], LOCAL)
+
+    for root in roots:
+        node = walked[root]
+        last = steps[-1] if steps else None
+
+        if (
+                last is not None and last.kind == SYSTEM and
+                _iswrite(node) and systems[root] == set([last.system]) and
+                all(_iswrite(walked[index]) for index in last.indexes)
+        ):  # consecutive writes of a system are delegated together
+            last.indexes.append(root)
+            last.ends.append(ends[root])
+            executed[root] = last
+
+        else:
+            compilenode(root)
+
+    return Plan(steps=steps)
+
+
+class PlanCache(object):
+    """LRU cache of plans by structural fingerprint."""
+
+    __slots__ = ['size', '_plans']
+
+    def __init__(self, size=DEFAULT_CACHESIZE, *args, **kwargs):
+        """
+        :param int size: maximal number of cached plans.
+        """
+
+        super(PlanCache, self).__init__(*args, **kwargs)
+
+        self.size = size
+        self._plans = OrderedDict()
+
+    def __len__(self):
+
+        return len(self._plans)
+
+    def get(self, nodes):
+        """Get a plan for input node trees.
+
+        :param list nodes: root nodes to execute in order.
+        :return: plan and walked nodes.
+        :rtype: tuple"""
+
+        fingerprint, walk = _walk(nodes)
+
+        plan = self._plans.pop(fingerprint, None)
+
+        if plan is None:
+            plan = _compile(*walk)
+
+        self._plans[fingerprint] = plan
+
+        while len(self._plans) > self.size:
+            self._plans.popitem(last=False)
+
+        return plan, walk[0]
+
+    def clear(self):
+        """Remove all cached plans."""
+
+        self._plans.clear()
+
+
+PLANS = PlanCache()  #: default plan cache.
+
+
+def runplan(nodes, dispatcher, ctx, cache=PLANS):
+    """Execute input node trees with a (cached) plan.
+
+    :param list nodes: root nodes to execute in order.
+    :param b3j0f.reqi.dispatch.Dispatcher dispatcher: dispatcher to run.
+    :param dict ctx: execution context.
+    :param PlanCache cache: plan cache. If None, the plan is not cached.
+    :return: execution context.
+    :rtype: dict"""
+
+    if cache is None:
+        plan, walked = compileplan(nodes)
+
+    else:
+        plan, walked = cache.get(nodes)
+
+    return plan.run(nodes=walked, dispatcher=dispatcher, ctx=ctx)
@@ -29,32 +29,96 @@
 __all__ = ['RequestQueue']
 
 from .core import Request
+from .plan import PLANS
+from .batch import runbatch
+from .ctx import layer, written
+from .incremental import writtenschemas
+
+from time import time
 
 
 class RequestQueue(list):
-    """In charge of processing multi requests with historization of requests."""
+    """In charge of processing multi requests with historization of requests.
+
+    In batching mode (with a batch size or a time window), requests are
+    pending until the batch is full, the window is elapsed or the ctx is
+    read. Pending requests are then executed together (see the batch module)
+    and start from the ctx of the last request executed before them. Their
+    result contexts are chained in order afterwards, such as if they were
+    executed one after the other: values written by a request have the
+    priority on the result ctx of the previous one. The window is checked
+    when requests are added, without background timer.
 
-    __slots__ = ['dispatcher']
+    A history (see the history module) bounds the number of contexts kept in
+    memory. Requests stay in the queue, and spilled contexts are reloaded
+    when read."""
 
-    def __init__(self, dispatcher, *args, **kwargs):
+    __slots__ = [
+        'dispatcher', 'plans', 'batchsize', 'window', 'history',
+        '_pending', '_since'
+    ]
+
+    def __init__(
+            self, dispatcher, plans=PLANS, batchsize=None, window=None,
+            history=None, *args, **kwargs
+    ):
         """
         :param Dispatcher dispatcher: default dispatcher.
-        :param dict ctx: default expression execution context.
-        :param list nodes: nodes to execute.
+        :param PlanCache plans: plan cache shared by queued requests.
+        :param int batchsize: maximal number of pending requests.
+        :param float window: maximal pending duration in seconds of the first
+            pending request.
+        :param History history: history policy. Default keeps all contexts
+            in memory.
         """
 
         super(RequestQueue, self).__init__(*args, **kwargs)
 
         self.dispatcher = dispatcher
+        self.plans = plans
+        self.batchsize = batchsize
+        self.window = window
+        self.history = history
+        self._pending = []
+        self._since = None  # first pending request time
 
     @property
     def ctx(self):
         """Get last (calculated) ctx.
 
+        Pending requests are executed before.
+
         :rtype: dict"""
 
+        self.flush()
+
         return self[-1].resctx if self else None
 
+    @property
+    def pending(self):
+        """Get pending requests.
+
+        :rtype: list"""
+
+        return list(self._pending)
+
+    def flush(self):
+        """Execute pending requests.
+
+        :return: this.
+        :rtype: RequestQueue"""
+
+        if self._pending:
+            requests = self._pending
+            self._pending = []
+            self._since = None
+
+            runbatch(requests)
+            self._chain(requests)
+            self._record(requests)
+
+        return self
+
     def run(self, nodes, ctx=None, dispatcher=None):
         """Run input nodes in adding a new request to this queue.
 
@@ -64,25 +128,115 @@ class RequestQueue(list):
             dispatcher.
         """
 
+        req = self._request(nodes=nodes, ctx=ctx, dispatcher=dispatcher)
+
+        if self.batchsize is None and self.window is None:
+            req.run()
+            self._record([req])
+
+        else:
+            if not self._pending:
+                self._since = time()
+
+            self._pending.append(req)
+
+            if (
+                    self.batchsize is not None and
+                    len(self._pending) >= self.batchsize
+            ) or (
+                    self.window is not None and
+                    time() - self._since >= self.window
+            ):
+                self.flush()
+
+        return self
+
+    def arun(self, nodes, ctx=None, dispatcher=None, executor=None):
+        """Get a coroutine which runs input nodes in adding a new request to
+        this queue (python 3.5+).
+
+        A request starts from the previous request ctx, so coroutines of the
+        same queue are awaited one after the other. Concurrency comes from
+        independent system calls and from different queues.
+
+        :param list nodes: nodes to process.
+        :param dict ctx: execution context.
+        :param Dispatcher dispatcher: dispatcher to use. Default is this
+            dispatcher.
+        :param concurrent.futures.Executor executor: executor where offload
+            synchronous calls.
+        :return: coroutine which returns this."""
+
+        from ..aio import arunqueue
+
+        return arunqueue(
+            self, nodes=nodes, ctx=ctx, dispatcher=dispatcher,
+            executor=executor
+        )
+
+    def _request(self, nodes, ctx=None, dispatcher=None):
+        """Create a new request from the last ctx and add it to this queue.
+
+        :rtype: Request"""
+
         if dispatcher is None:
             dispatcher = self.dispatcher
 
-        if ctx is None:
-            ctx = self.ctx
+        lastctx = self._lastctx()
 
-            if ctx is not None:
-                ctx = ctx.copy()
+        if lastctx is not None:  # last values have the priority
+            ctx = layer(lastctx, ctx)
 
-        elif self.ctx is not None:
-            ctx.update(self.ctx)
+        result = Request(
+            nodes=nodes, ctx=ctx, dispatcher=dispatcher, plans=self.plans
+        )
 
-        req = Request(nodes=nodes, ctx=ctx, dispatcher=dispatcher)
+        self.append(result)
 
-        self.append(req)
+        return result
 
-        req.run()
+    def _lastctx(self):
+        """Get the ctx of the last executed request.
 
-        return self
+        :rtype: dict"""
+
+        result = None
+
+        for req in reversed(self):
+            if req.executed:
+                result = req.resctx
+                break
+
+        return result
+
+    def _chain(self, requests):
+        """Layer result contexts of batched requests on the result ctx of
+        their previous request."""
+
+        prev = None
+
+        for req in requests:
+            if prev is not None:
+                req.resctx = layer(
+                    dict(written(req.ctx or {}, req.resctx)), prev, req.resctx
+                )
+
+            prev = req.resctx
+
+    def _record(self, requests):
+        """Record executed requests in the history, and invalidate schemas
+        written by them in other requests."""
+
+        for req in requests:
+            if self.history is not None:
+                self.history.add(req)
+
+            schemas = writtenschemas(req.nodes)
+
+            if schemas:
+                for queued in self:
+                    if queued is not req:
+                        queued.invalidate(*schemas)
 
     def drop(self, count=1):
         """Drop last ``count`` requests.
@@ -93,6 +247,19 @@ class RequestQueue(list):
 
         if count > 0:
 
-            self[:] = self[:-count]
+            dropped = self[-count:]
+            del self[-count:]
+
+            # pending requests are the last ones
+            del self._pending[max(0, len(self._pending) - count):]
+
+            if self.history is not None:
+                self.history.drop(dropped)
 
         return self
+
+    def close(self):
+        """Release history resources."""
+
+        if self.history is not None:
+            self.history.close()
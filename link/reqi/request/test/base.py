@@ -89,7 +89,83 @@ class NodeTest(UTCase):
 
         node = Node()
 
-        self.assertEqual(str(node), node.getctxname())
+        self.assertEqual(node.getctxname(), 'Node()')
+
+    def test_structctxname(self):
+
+        node, other = TestNode(), TestNode()
+
+        self.assertEqual(node.getctxname(), 'TestNode()')
+        self.assertIs(node.getctxname(), other.getctxname())
+
+    def test_cachedctxname(self):
+
+        ref = Ref(ref=Node(alias='test'))
+        node = TestNode()
+        node.values = [ref]
+
+        ctxname = node.getctxname()
+
+        self.assertEqual(ctxname, 'TestNode(values=[test])')
+        self.assertIs(node.getctxname(), ctxname)
+
+        ref.ref.alias = 'other'
+
+        self.assertEqual(node.getctxname(), 'TestNode(values=[other])')
+
+        node.values.append(1)
+
+        self.assertEqual(node.getctxname(), 'TestNode(values=[other])')
+
+        node.touch()
+
+        self.assertEqual(node.getctxname(), 'TestNode(values=[other,1])')
+
+    def test_scopedctxname(self):
+
+        node, other = TestNode(), TestNode()
+        node.values = [1]
+
+        ctxname = node.getctxname()
+        other.getctxname()
+
+        # assigning another node does not invalidate this name
+        other.values = [2]
+        Ref(alias='test').ref = other
+
+        self.assertIs(node._ctxname, ctxname)
+        self.assertEqual(other.getctxname(), 'TestNode(values=[2])')
+
+    def test_arrayctxname(self):
+
+        try:
+            import numpy
+
+        except ImportError:
+            self.skipTest('numpy is not installed')
+
+        node, other = TestNode(), TestNode()
+        node.values = numpy.zeros(10000)
+        other.values = numpy.zeros(10000)
+        other.values[5000] = 1
+
+        self.assertEqual(repr(node.values), repr(other.values))
+        self.assertNotEqual(node.getctxname(), other.getctxname())
+
+    def test_pickle(self):
+
+        from pickle import dumps, loads
+
+        node = TestNode()
+        node.values = [Node(alias='test')]
+
+        node = loads(dumps(node))
+
+        self.assertEqual(node.getctxname(), 'TestNode(values=[test])')
+
+        node.values[0].alias = 'other'
+
+        self.assertEqual(node.getctxname(), 'TestNode(values=[other])')
 
     def test_run(self):
 
@@ -130,6 +206,52 @@ class RefTest(UTCase):
 
         self.assertFalse(Ref(ref=Node()).getsystems())
 
+    def test_scopedctxname(self):
+
+        node, other = TestNode(), TestNode()
+        node.values = [1]
+
+        ctxname = node.getctxname()
+        other.getctxname()
+
+        # assigning another node does not invalidate this name
+        other.values = [2]
+        Ref(alias='test').ref = other
+
+        self.assertIs(node._ctxname, ctxname)
+        self.assertEqual(other.getctxname(), 'TestNode(values=[2])')
+
+    def test_arrayctxname(self):
+
+        try:
+            import numpy
+
+        except ImportError:
+            self.skipTest('numpy is not installed')
+
+        node, other = TestNode(), TestNode()
+        node.values = numpy.zeros(10000)
+        other.values = numpy.zeros(10000)
+        other.values[5000] = 1
+
+        self.assertEqual(repr(node.values), repr(other.values))
+        self.assertNotEqual(node.getctxname(), other.getctxname())
+
+    def test_pickle(self):
+
+        from pickle import dumps, loads
+
+        node = TestNode()
+        node.values = [Node(alias='test')]
+
+        node = loads(dumps(node))
+
+        self.assertEqual(node.getctxname(), 'TestNode(values=[test])')
+
+        node.values[0].alias = 'other'
+
+        self.assertEqual(node.getctxname(), 'TestNode(values=[other])')
+
     def test_run(self):
 
         alias = 'test'
@@ -0,0 +1,307 @@
+# -*- coding: utf-8 -*-
+
+# --------------------------------------------------------------------
+# The MIT License (MIT)
+#
+# Copyright (c) 2016 Jonathan Labéjof <jonathan.labejof@gmail.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+# --------------------------------------------------------------------
+
+
+
+from unittest import main
+
+from b3j0f.utils.ut import UTCase
+
+from ...cache import ResultCache
+from ..batch import runbatch, callbatch
+from ..core import Request
+from ..queue import RequestQueue
+from ..plan import PlanCache
+from ..crud.create import Create
+from ..expr.base import Expression
+from ..expr.group import And
+from .plan import TestFunction, TestSystem, predicate
+
+
+class BatchSystem(TestSystem):
+
+    def __init__(self, name):
+
+        super(BatchSystem, self).__init__(name)
+
+        self.batches = []
+
+    def runbatch(self, batches, dispatcher):
+
+        self.batches.append(len(batches))
+
+        return [
+            self.run(nodes=nodes, dispatcher=dispatcher, ctx=ctx)
+            for nodes, ctx in batches
+        ]
+
+
+class NameSystem(BatchSystem):
+
+    def run(self, nodes, dispatcher, ctx):
+
+        for node in nodes:
+            ctx[node.alias] = self.name
+
+        return ctx
+
+
+class TestDispatcher(object):
+
+    def __init__(self, system=BatchSystem):
+
+        self.systems = dict((name, system(name)) for name in 'ab')
+        self.store = []
+
+
+class CheapestDispatcher(TestDispatcher):
+
+    def __init__(self, *args, **kwargs):
+
+        super(CheapestDispatcher, self).__init__(*args, **kwargs)
+
+        self.routed = []
+
+    def runcheapest(self, nodes, schema, system=None, ctx=None, batches=None):
+
+        self.routed.append((system, len(batches)))
+
+        return callbatch(self.systems['b'], batches, self)
+
+
+class StoreCreate(Create):
+
+    def _run(self, dispatcher, ctx):
+
+        dispatcher.store.append(self.content)
+
+        return ctx
+
+
+class StoreRead(TestFunction):
+
+    def _prun(self, dispatcher, ctx):
+
+        ctx['read'] = list(dispatcher.store)
+
+        return ctx
+
+
+def request(dispatcher, alias, plans=None):
+
+    return Request(
+        dispatcher=dispatcher, ctx={'exec': []}, plans=plans,
+        nodes=[And(params=[predicate(alias, 'a'), predicate(alias, 'b')])]
+    )
+
+
+class CallBatchTest(UTCase):
+
+    def test_fallback(self):
+
+        system = TestSystem('a')
+        batches = [([TestFunction(alias='f')], {'exec': []}) for _ in '01']
+
+        ctxs = callbatch(system, batches, None)
+
+        self.assertEqual([ctx['exec'] for ctx in ctxs], [[('f', 'a')]] * 2)
+
+    def test_runbatch(self):
+
+        system = BatchSystem('a')
+        batches = [([TestFunction(alias='f')], {'exec': []}) for _ in '01']
+
+        callbatch(system, batches, None)
+
+        self.assertEqual(system.batches, [2])
+
+
+class RunBatchTest(UTCase):
+
+    def test_batch(self):
+
+        dispatcher = TestDispatcher()
+        requests = [request(dispatcher, str(index)) for index in range(3)]
+
+        ctxs = runbatch(requests)
+
+        # one call per system for all requests
+        self.assertEqual(dispatcher.systems['a'].batches, [3])
+        self.assertEqual(dispatcher.systems['b'].batches, [3])
+
+        for index, (req, ctx) in enumerate(zip(requests, ctxs)):
+            self.assertIs(req.resctx, ctx)
+            self.assertEqual(
+                ctx['exec'], [(str(index), 'a'), (str(index), 'b')]
+            )
+
+    def test_shapes(self):
+
+        dispatcher = TestDispatcher()
+        plans = PlanCache()
+        requests = [
+            request(dispatcher, 'first', plans),
+            Request(
+                dispatcher=dispatcher, ctx={'exec': []}, plans=plans,
+                nodes=[TestFunction(alias='local')]
+            ),
+            request(dispatcher, 'last', plans)
+        ]
+
+        runbatch(requests)
+
+        self.assertEqual(dispatcher.systems['a'].batches, [2])
+        self.assertEqual(requests[1].resctx['exec'], ['local'])
+
+
+    def test_cheapest(self):
+
+        dispatcher = CheapestDispatcher()
+        requests = [
+            Request(
+                dispatcher=dispatcher, ctx={'exec': []},
+                nodes=[predicate(str(index), 'a')]
+            ) for index in range(2)
+        ]
+
+        ctxs = runbatch(requests)
+
+        self.assertEqual(dispatcher.routed, [('a', 2)])
+        self.assertEqual(dispatcher.systems['b'].batches, [2])
+        self.assertEqual(
+            [ctx['exec'] for ctx in ctxs], [[('0', 'b')], [('1', 'b')]]
+        )
+
+    def test_cache(self):
+
+        dispatcher = TestDispatcher(system=NameSystem)
+        dispatcher.cache = ResultCache()
+
+        for _ in range(2):
+            ctxs = runbatch([
+                Request(
+                    dispatcher=dispatcher, nodes=[predicate(str(index), 'a')]
+                ) for index in range(2)
+            ])
+
+        # second requests are read from the cache
+        self.assertEqual(dispatcher.systems['a'].batches, [2])
+        self.assertEqual(dispatcher.cache.stats.hits, 2)
+        self.assertEqual([ctxs[0]['0'], ctxs[1]['1']], ['a', 'a'])
+
+    def test_writeread(self):
+
+        dispatcher = TestDispatcher()
+        requests = [
+            Request(
+                dispatcher=dispatcher, ctx={'exec': []},
+                nodes=[
+                    predicate('write', 'a'),
+                    StoreCreate(schema='s', content='item')
+                ]
+            ),
+            Request(
+                dispatcher=dispatcher, ctx={'exec': []},
+                nodes=[
+                    StoreRead(alias='read', params=[Expression(schema='s')])
+                ]
+            ),
+            request(dispatcher, 'other')
+        ]
+
+        ctxs = runbatch(requests)
+
+        # the read is executed after the previous write
+        self.assertEqual(ctxs[1]['read'], ['item'])
+        # the write request is executed in its own batch
+        self.assertEqual(dispatcher.systems['a'].batches, [1, 1])
+
+class QueueBatchTest(UTCase):
+
+    def setUp(self):
+
+        self.dispatcher = TestDispatcher(system=NameSystem)
+
+    def test_size(self):
+
+        queue = RequestQueue(dispatcher=self.dispatcher, batchsize=2)
+
+        queue.run(nodes=[predicate('0', 'a')])
+
+        self.assertEqual(len(queue.pending), 1)
+        self.assertIsNone(queue[0].resctx)
+
+        queue.run(nodes=[predicate('1', 'a')])
+
+        self.assertFalse(queue.pending)
+        self.assertEqual(self.dispatcher.systems['a'].batches, [2])
+        self.assertEqual(queue.ctx['1'], 'a')
+
+    def test_window(self):
+
+        queue = RequestQueue(dispatcher=self.dispatcher, window=0)
+
+        queue.run(nodes=[predicate('0', 'a')])
+
+        self.assertFalse(queue.pending)
+
+    def test_ctx(self):
+
+        queue = RequestQueue(dispatcher=self.dispatcher, window=60)
+
+        queue.run(nodes=[predicate('0', 'a')])
+        queue.run(nodes=[predicate('1', 'a')])
+
+        self.assertEqual(len(queue.pending), 2)
+        # reading the ctx flushes pending requests
+        self.assertEqual(queue.ctx['1'], 'a')
+        self.assertFalse(queue.pending)
+        # results of previous requests of the batch are chained
+        self.assertEqual(queue.ctx['0'], 'a')
+        self.assertNotIn('1', queue[0].resctx)
+
+        # next requests start from the last executed ctx
+        queue.run(nodes=[predicate('2', 'b')]).flush()
+
+        self.assertEqual(
+            [queue.ctx[name] for name in '012'], ['a', 'a', 'b']
+        )
+
+    def test_drop(self):
+
+        queue = RequestQueue(dispatcher=self.dispatcher, batchsize=10)
+
+        queue.run(nodes=[predicate('0', 'a')])
+        queue.run(nodes=[predicate('1', 'a')])
+        queue.drop()
+
+        self.assertEqual(len(queue.pending), 1)
+        self.assertEqual(queue.ctx['0'], 'a')
+        self.assertNotIn('1', queue.ctx)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,248 @@
+# -*- coding: utf-8 -*-
+
+# --------------------------------------------------------------------
+# The MIT License (MIT)
+#
+# Copyright (c) 2016 Jonathan Labéjof <jonathan.labejof@gmail.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+# --------------------------------------------------------------------
+
+
+
+from unittest import main
+
+from b3j0f.utils.ut import UTCase
+
+from ..columnar import COLUMNAR, Columns, MISSING, column, tocolumnar, torows
+from ..core import Request
+from ..expr.base import Expression
+from ..expr.func import Function
+from ..plan import runplan
+from ..utils import updatecond, updateitems
+from .base import TestNode
+
+
+class ColumnTest(UTCase):
+
+    def test_empty(self):
+
+        self.assertEqual(column([]), [])
+
+    def test_int(self):
+
+        values = column([1, 2, 3])
+
+        self.assertNotIsInstance(values, list)
+        self.assertEqual(list(values), [1, 2, 3])
+
+    def test_float(self):
+
+        values = column([1, 2.5])
+
+        self.assertNotIsInstance(values, list)
+        self.assertEqual(list(values), [1., 2.5])
+
+    def test_long(self):
+
+        values = [1, 2 ** 80]
+
+        self.assertIs(column(values), values)
+
+    def test_object(self):
+
+        values = [1, 'a', None]
+
+        self.assertIs(column(values), values)
+
+    def test_missing(self):
+
+        values = [1, MISSING]
+
+        self.assertIs(column(values), values)
+
+
+class ColumnsTest(UTCase):
+
+    def setUp(self):
+
+        self.rows = [
+            {'a': 1, 'b': 'x'},
+            {'a': 2, 'c': 1.5},
+            {'a': 3, 'b': 'z'}
+        ]
+
+        self.columns = Columns.fromrows(self.rows)
+
+    def test_fromrows(self):
+
+        self.assertEqual(len(self.columns), 3)
+        self.assertEqual(list(self.columns['a']), [1, 2, 3])
+        self.assertEqual(self.columns['b'], ['x', MISSING, 'z'])
+
+    def test_torows(self):
+
+        self.assertEqual(self.columns.torows(), self.rows)
+        self.assertEqual(list(self.columns), self.rows)
+        self.assertEqual(self.columns, self.rows)
+
+    def test_row(self):
+
+        self.assertEqual(self.columns[1], self.rows[1])
+        self.assertEqual(self.columns[-1], self.rows[-1])
+        self.assertRaises(IndexError, self.columns.__getitem__, 3)
+
+    def test_slice(self):
+
+        columns = self.columns[1:]
+
+        self.assertIsInstance(columns, Columns)
+        self.assertEqual(len(columns), 2)
+        self.assertEqual(columns, self.rows[1:])
+
+    def test_setitem(self):
+
+        self.columns['d'] = [True, False, True]
+
+        self.assertEqual(self.columns[0]['d'], True)
+        self.assertRaises(ValueError, self.columns.__setitem__, 'e', [1])
+
+    def test_iter(self):
+
+        self.assertIs(next(iter(self.columns)), next(iter(self.columns)))
+
+    def test_select(self):
+
+        columns = Columns.fromrows([{'a': 1}, {'a': 2}, {'a': 3}])
+
+        selected = columns.select([True, False, True])
+
+        self.assertEqual(selected, [{'a': 1}, {'a': 3}])
+        self.assertEqual(len(selected), 2)
+
+    def test_emptyrows(self):
+
+        columns = Columns.fromrows([{}, {}])
+
+        self.assertEqual(len(columns), 2)
+        self.assertEqual(columns.torows(), [{}, {}])
+
+
+class RowSystem(object):
+
+    def __init__(self, dispatcher):
+
+        self.dispatcher = dispatcher
+
+    def run(self, nodes, dispatcher, ctx):
+
+        items = ctx['schema']
+        self.dispatcher.received.append(type(items))
+        ctx['schema'] = [item for item in items if item['a'] > 1]
+
+        return ctx
+
+
+class RowDispatcher(object):
+
+    def __init__(self):
+
+        self.systems = {'system': RowSystem(self)}
+        self.received = []
+
+
+class CtxTest(UTCase):
+
+    def test_convert(self):
+
+        rows = [{'a': 1}]
+        ctx = {'rows': rows, 'values': [1], 'empty': [], 'other': None}
+
+        tocolumnar(ctx)
+
+        self.assertIsInstance(ctx['rows'], Columns)
+        self.assertEqual(ctx['values'], [1])
+        self.assertEqual(ctx['empty'], [])
+
+        torows(ctx)
+
+        self.assertEqual(ctx['rows'], rows)
+
+    def test_names(self):
+
+        rows = [{'a': 1}]
+        ctx = {'rows': rows, 'other': [{'b': 2}]}
+
+        tocolumnar(ctx, ['rows', 'missing'])
+
+        self.assertIsInstance(ctx['rows'], Columns)
+        self.assertIsInstance(ctx['other'], list)
+
+        torows(ctx, ['rows'])
+
+        self.assertEqual(ctx['rows'], rows)
+
+    def test_update(self):
+
+        expr = Expression(schema='schema', prop='a')
+        ctx = {'schema': Columns.fromrows([{'a': 1}, {'a': 2}, {'a': 3}])}
+
+        updatecond(ctx, expr, lambda item, node, ctx: item['a'] % 2)
+
+        self.assertIsInstance(ctx['schema'], Columns)
+        self.assertEqual(ctx['schema'], [{'a': 1}, {'a': 3}])
+
+        def double(item, node, ctx):
+            item['a'] *= 2
+            return item
+
+        updateitems(ctx, expr, double)
+
+        self.assertIsInstance(ctx['schema'], Columns)
+        self.assertEqual(ctx['schema'], [{'a': 2}, {'a': 6}])
+
+    def test_system(self):
+
+        expr = Expression(system='system', schema='schema', prop='a')
+        ctx = {
+            COLUMNAR: True, 'schema': Columns.fromrows([{'a': 1}, {'a': 2}])
+        }
+        dispatcher = RowDispatcher()
+
+        ctx = runplan([Function(params=[expr])], dispatcher, ctx, None)
+
+        self.assertEqual(dispatcher.received, [list])
+        self.assertIsInstance(ctx['schema'], Columns)
+        self.assertEqual(ctx['schema'], [{'a': 2}])
+
+    def test_request(self):
+
+        request = Request(
+            dispatcher=None, nodes=[TestNode(alias='1')], columnar=True
+        )
+
+        ctx = request.run()
+
+        self.assertTrue(ctx[COLUMNAR])
+        self.assertIsInstance(ctx['1'], Columns)
+        self.assertEqual(ctx['1'], [{'count': 0}])
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+
+# --------------------------------------------------------------------
+# The MIT License (MIT)
+#
+# Copyright (c) 2016 Jonathan Labéjof <jonathan.labejof@gmail.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+# --------------------------------------------------------------------
+
+
+
+from unittest import main
+
+from b3j0f.utils.ut import UTCase
+
+from ..ctx import Context, layer, MAXDEPTH
+
+
+class ContextTest(UTCase):
+
+    def test_dict(self):
+
+        ctx = Context({'a': 1})
+        ctx['b'] = 2
+        del ctx['a']
+
+        self.assertEqual(ctx, {'b': 2})
+        self.assertEqual(len(ctx), 1)
+        self.assertNotIn('a', ctx)
+        self.assertIsNone(ctx.get('a'))
+        self.assertRaises(KeyError, ctx.__getitem__, 'a')
+        self.assertRaises(KeyError, ctx.__delitem__, 'a')
+
+    def test_copy(self):
+
+        ctx = Context({'a': 1, 'b': 2})
+
+        copy = ctx.copy()
+        copy['a'] = 3
+        del copy['b']
+        ctx['c'] = 4
+
+        self.assertEqual(ctx, {'a': 1, 'b': 2, 'c': 4})
+        self.assertEqual(copy, {'a': 3})
+        self.assertEqual(copy.local(), {'a': 3})
+        # frozen layers are shared
+        self.assertIs(ctx.maps[1], copy.maps[1])
+
+    def test_copies(self):
+
+        ctx = Context()
+
+        for index in range(MAXDEPTH * 2):
+            ctx[index] = index
+            ctx = ctx.copy()
+
+        self.assertLessEqual(len(ctx.maps), MAXDEPTH + 1)
+        self.assertEqual(ctx, dict((index, index) for index in ctx))
+        self.assertEqual(len(ctx), MAXDEPTH * 2)
+
+
+class LayerTest(UTCase):
+
+    def test_layer(self):
+
+        first = Context({'a': 1})
+        second = {'a': 2, 'b': 2}
+
+        ctx = layer(first, None, second)
+        ctx['c'] = 3
+        first['d'] = 4
+
+        self.assertEqual(ctx, {'a': 1, 'b': 2, 'c': 3})
+        self.assertEqual(second, {'a': 2, 'b': 2})
+        self.assertEqual(first, {'a': 1, 'd': 4})
+
+    def test_empty(self):
+
+        self.assertEqual(layer(), {})
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,145 @@
+# -*- coding: utf-8 -*-
+
+# --------------------------------------------------------------------
+# The MIT License (MIT)
+#
+# Copyright (c) 2016 Jonathan Labéjof <jonathan.labejof@gmail.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+# --------------------------------------------------------------------
+
+
+
+from unittest import main
+
+from b3j0f.utils.ut import UTCase
+
+from random import Random
+
+from .. import extsort
+from ..extsort import externalsort
+
+
+class ExternalSortTest(UTCase):
+
+    def setUp(self):
+
+        random = Random(0)
+
+        self.items = [
+            {'key': random.randint(0, 100), 'index': index}
+            for index in range(1000)
+        ]
+
+    def sort(self, maxbytes, maxruns=extsort.DEFAULT_MAXRUNS):
+
+        return list(
+            externalsort(
+                self.items, key=lambda item: item['key'], maxbytes=maxbytes,
+                maxruns=maxruns
+            )
+        )
+
+    def test_memory(self):
+
+        self.assertEqual(
+            self.sort(10 ** 9),
+            sorted(self.items, key=lambda item: item['key'])
+        )
+
+    def test_runs(self):
+
+        self.assertEqual(self.sort(1000), self.sort(10 ** 9))
+
+    def test_fanin(self):
+
+        opened = []
+        counts = []
+        temporaryfile = extsort.TemporaryFile
+
+        class RunFile(object):
+
+            def __init__(self):
+
+                self.file = temporaryfile()
+                opened.append(self)
+                counts.append(len(opened))
+
+            def __getattr__(self, name):
+
+                return getattr(self.file, name)
+
+            def close(self):
+
+                opened.remove(self)
+                self.file.close()
+
+        extsort.TemporaryFile = RunFile
+
+        try:
+            result = self.sort(10, maxruns=4)
+
+        finally:
+            extsort.TemporaryFile = temporaryfile
+
+        self.assertEqual(result, self.sort(10 ** 9))
+        self.assertEqual(opened, [])
+        self.assertGreater(len(counts), 1000)  # one run per item at least
+        self.assertLess(max(counts), 20)
+
+    def test_keys(self):
+
+        runs = []
+        temporaryfile = extsort.TemporaryFile
+
+        def runfile():
+
+            runs.append(None)
+
+            return temporaryfile()
+
+        extsort.TemporaryFile = runfile
+
+        try:
+            result = list(
+                externalsort(
+                    range(10), key=lambda item: 'k' * 1000, maxbytes=500
+                )
+            )
+
+        finally:
+            extsort.TemporaryFile = temporaryfile
+
+        self.assertEqual(result, list(range(10)))
+        self.assertEqual(len(runs), 10)
+
+    def test_stream(self):
+
+        sortedkeys = externalsort(iter([3, 1, 2]), key=int, maxbytes=1)
+
+        self.assertEqual(next(sortedkeys), 1)
+        self.assertEqual(list(sortedkeys), [2, 3])
+
+    def test_empty(self):
+
+        self.assertEqual(list(externalsort([], key=int)), [])
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,149 @@
+# -*- coding: utf-8 -*-
+
+# --------------------------------------------------------------------
+# The MIT License (MIT)
+#
+# Copyright (c) 2016 Jonathan Labéjof <jonathan.labejof@gmail.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+# --------------------------------------------------------------------
+
+
+
+from unittest import main
+
+from b3j0f.utils.ut import UTCase
+
+from b3j0f.utils.version import OrderedDict
+
+from ..groupby import (
+    COMBINERS, getcombiner, hashgroup, Max, _partials, _spill
+)
+
+
+def group(rows, combiners, **kwargs):
+
+    return dict(
+        hashgroup(
+            rows, [lambda row: row[0]],
+            [(getcombiner(name), lambda row: row[1]) for name in combiners],
+            **kwargs
+        )
+    )
+
+
+class CombinerTest(UTCase):
+
+    def test_combiners(self):
+
+        values = [None, 3, None, 1, 2, None]
+        expected = {
+            'count': 3, 'sum': 6, 'min': 1, 'max': 3, 'mean': 2.,
+            'first': 3, 'last': 2
+        }
+
+        for name, combiner in COMBINERS.items():
+            state = combiner.init()
+
+            for value in values:
+                state = combiner.add(state, value)
+
+            self.assertEqual(combiner.result(state), expected[name])
+
+    def test_merge(self):
+
+        for name, combiner in COMBINERS.items():
+            states = [combiner.init(), combiner.init()]
+
+            for index, value in enumerate([1, 5, 2, 4]):
+                states[index // 2] = combiner.add(states[index // 2], value)
+
+            whole = combiner.init()
+
+            for value in [1, 5, 2, 4]:
+                whole = combiner.add(whole, value)
+
+            self.assertEqual(
+                combiner.result(combiner.merge(*states)),
+                combiner.result(whole)
+            )
+
+    def test_getcombiner(self):
+
+        combiner = Max()
+
+        self.assertIs(getcombiner(combiner), combiner)
+        self.assertIs(getcombiner('max'), COMBINERS['max'])
+        self.assertRaises(ValueError, getcombiner, 'unknown')
+
+
+class HashGroupTest(UTCase):
+
+    def test_group(self):
+
+        rows = [('a', 1), ('b', 2), ('a', 3)]
+
+        self.assertEqual(
+            list(
+                hashgroup(
+                    rows, [lambda row: row[0]],
+                    [(COMBINERS['sum'], lambda row: row[1])]
+                )
+            ),
+            [(('a',), [4]), (('b',), [2])]
+        )
+
+    def test_spill(self):
+
+        rows = [(index % 50, index) for index in range(1000)]
+        combiners = ['count', 'sum', 'first', 'last']
+
+        self.assertEqual(
+            group(rows, combiners, maxgroups=7, partitions=3),
+            group(rows, combiners)
+        )
+        self.assertEqual(
+            group(rows, combiners)[(3,)], [20, sum(range(3, 1000, 50)), 3, 953]
+        )
+
+
+    def test_repartition(self):
+
+        rows = [(index % 500, index) for index in range(2000)]
+        combiners = ['count', 'sum', 'first', 'last']
+
+        self.assertEqual(
+            group(rows, combiners, maxgroups=10, partitions=2),
+            group(rows, combiners)
+        )
+
+    def test_boundedmerge(self):
+
+        combiner = COMBINERS['count']
+        groups = OrderedDict(((index,), [1]) for index in range(100))
+        files = _spill(groups, None, 2)
+
+        partials = list(_partials([combiner], files, 10, 2, 1))
+
+        self.assertTrue(all(len(partial) <= 10 for partial in partials))
+        self.assertEqual(sum(len(partial) for partial in partials), 100)
+
+
+if __name__ == '__main__':
+    main()
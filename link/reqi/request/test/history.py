@@ -0,0 +1,225 @@
+# -*- coding: utf-8 -*-
+
+# --------------------------------------------------------------------
+# The MIT License (MIT)
+#
+# Copyright (c) 2016 Jonathan Labéjof <jonathan.labejof@gmail.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+# --------------------------------------------------------------------
+
+
+
+from unittest import main
+
+from b3j0f.utils.ut import UTCase
+
+from os.path import exists
+
+from ..history import History, SQLiteStore
+from ..queue import RequestQueue
+from .plan import TestDispatcher, predicate
+
+
+class SQLiteStoreTest(UTCase):
+
+    def test_store(self):
+
+        store = SQLiteStore()
+
+        key = store.save(b'data')
+
+        self.assertEqual(store.load(key), b'data')
+
+        store.delete([key])
+
+        self.assertRaises(KeyError, store.load, key)
+
+        store.close()
+
+        self.assertFalse(exists(store.path))
+
+
+class HistoryTest(UTCase):
+
+    def setUp(self):
+
+        self.dispatcher = TestDispatcher('a')
+
+    def queue(self, **kwargs):
+
+        queue = RequestQueue(
+            dispatcher=self.dispatcher, history=History(**kwargs)
+        )
+
+        queue.run(nodes=[], ctx={'exec': []})
+
+        for index in range(1, 5):
+            queue.run(
+                nodes=[predicate(str(index), 'a')],
+                ctx={'k' + str(index): index}
+            )
+
+        return queue
+
+    def count(self, queue):
+
+        return queue.history.store._conn.execute(
+            'SELECT COUNT(*) FROM ctxs'
+        ).fetchone()[0]
+
+    def test_maxcount(self):
+
+        queue = self.queue(maxcount=2)
+
+        self.assertEqual(queue.history.resident, 2)
+        self.assertEqual(len(queue), 5)
+        # spilled contexts are reloaded
+        self.assertEqual(queue[1].resctx['k1'], 1)
+        self.assertNotIn('k2', queue[1].resctx)
+        # values are shared by contexts and spilled with the first context
+        self.assertEqual(
+            [len(req.resctx['exec']) for req in queue], [2, 2, 2, 2, 2]
+        )
+        self.assertEqual(queue.ctx['k4'], 4)
+
+        queue.close()
+
+    def test_layers(self):
+
+        queue = self.queue(maxcount=1)
+
+        # resident contexts do not share layers with spilled ones
+        self.assertLessEqual(len(queue[-1].resctx.maps), 3)
+        self.assertEqual(queue.ctx['k1'], 1)
+
+        for request in queue[:-1]:
+            self.assertIsNone(request._ctx)
+            self.assertIsNone(request._resctx)
+
+        queue.close()
+
+    def test_mutation(self):
+
+        queue = self.queue(maxcount=2)
+
+        queue[0].resctx['mutated'] = True
+
+        # reloaded contexts stay in memory
+        self.assertTrue(queue[0].resctx['mutated'])
+        self.assertIn('exec', queue[0].ctx)
+
+        queue.close()
+
+    def test_localsize(self):
+
+        history = History(maxbytes=1 << 20)
+        queue = RequestQueue(dispatcher=self.dispatcher, history=history)
+
+        queue.run(nodes=[], ctx={'data': 'x' * 10000})
+        queue.run(nodes=[], ctx={'k': 1})
+
+        # the second context size does not count inherited values
+        self.assertLess(history._resident[1][1], 1000)
+
+        queue.close()
+
+    def test_spilllocal(self):
+
+        queue = RequestQueue(
+            dispatcher=self.dispatcher, history=History(maxcount=1)
+        )
+
+        queue.run(nodes=[], ctx={'data': 'x' * 10000})
+
+        for index in range(3):
+            queue.run(nodes=[], ctx={'k' + str(index): index})
+
+        sizes = [
+            len(row[0]) for row in queue.history.store._conn.execute(
+                'SELECT data FROM ctxs ORDER BY key'
+            )
+        ]
+
+        # inherited values are only spilled with the first context
+        self.assertGreater(sizes[0], 10000)
+        self.assertTrue(all(size < 1000 for size in sizes[1:]))
+        self.assertEqual(queue[2].resctx['data'], 'x' * 10000)
+        self.assertEqual(queue[2].resctx['k0'], 0)
+        self.assertEqual(queue[2].resctx['k1'], 1)
+
+        queue.close()
+
+    def test_maxbytes(self):
+
+        queue = self.queue(maxbytes=1)
+
+        # the last context stays in memory
+        self.assertEqual(queue.history.resident, 1)
+        self.assertEqual(queue.ctx['k4'], 4)
+
+        queue.close()
+
+    def test_unbounded(self):
+
+        queue = self.queue()
+
+        self.assertEqual(queue.history.resident, 5)
+        self.assertIsNone(queue.history.store)
+
+    def test_drop(self):
+
+        queue = self.queue(maxcount=2)
+
+        queue.drop(4)
+
+        self.assertEqual(len(queue), 1)
+        self.assertEqual(queue.history.resident, 0)
+
+        # dropped contexts are deleted from the store
+        self.assertEqual(self.count(queue), 1)
+
+        # reloaded contexts are deleted from the store and resident again
+        self.assertEqual(list(queue.ctx), ['exec'])
+        self.assertEqual(self.count(queue), 0)
+        self.assertEqual(queue.history.resident, 1)
+
+        queue.run(nodes=[predicate('5', 'a')])
+
+        self.assertEqual(queue.ctx['exec'][-1], ('5', 'a'))
+        self.assertEqual(queue.history.resident, 2)
+
+        queue.close()
+
+    def test_unpicklable(self):
+
+        queue = RequestQueue(
+            dispatcher=self.dispatcher, history=History(maxcount=1)
+        )
+
+        queue.run(nodes=[], ctx={'func': lambda: None})
+        queue.run(nodes=[])
+
+        self.assertTrue(callable(queue[0].resctx['func']))
+        # contexts in memory count in the bounds
+        self.assertEqual(queue.history.resident, 2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,221 @@
+# -*- coding: utf-8 -*-
+
+# --------------------------------------------------------------------
+# The MIT License (MIT)
+#
+# Copyright (c) 2016 Jonathan Labéjof <jonathan.labejof@gmail.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+# --------------------------------------------------------------------
+
+
+
+from unittest import main
+
+from b3j0f.utils.ut import UTCase
+
+from ..core import Request
+from ..queue import RequestQueue
+from ..plan import PlanCache
+from ..incremental import Trace, writtenschemas
+from ..crud.create import Create
+from ..crud.update import Update
+from ..crud.delete import Delete
+from ..expr.base import Expression
+from ..expr.func import Function
+
+
+class Fetch(Function):
+
+    opname = 'eq'
+
+
+def fetch(schema, system):
+
+    return Fetch(
+        alias='fetch' + schema,
+        params=[Expression(system=system, schema=schema)]
+    )
+
+
+class Keep(Function):
+    """Keep even items of a schema."""
+
+    calls = 0
+
+    def _run(self, dispatcher, ctx):
+
+        Keep.calls += 1
+
+        schema = self.params[0]
+        ctx[schema] = [item for item in ctx[schema] if item % 2 == 0]
+
+        return ctx
+
+
+class FetchSystem(object):
+
+    def __init__(self, name):
+
+        self.name = name
+        self.calls = 0
+        self.items = [0, 1, 2, 3]
+
+    def run(self, nodes, dispatcher, ctx):
+
+        self.calls += 1
+
+        for node in nodes:
+            ctx[node.params[0].schema] = list(self.items)
+            ctx[node.getctxname()] = True
+
+        return ctx
+
+
+class TestDispatcher(object):
+
+    def __init__(self):
+
+        self.systems = dict((name, FetchSystem(name)) for name in 'ab')
+
+
+class IncrementalTest(UTCase):
+
+    def setUp(self):
+
+        Keep.calls = 0
+        self.dispatcher = TestDispatcher()
+        self.request = Request(
+            dispatcher=self.dispatcher, incremental=True, plans=PlanCache(),
+            nodes=[
+                fetch('sa', 'a'), fetch('sb', 'b'),
+                Keep(alias='keep', params=['sa'])
+            ]
+        )
+        self.request.run()
+
+    def calls(self):
+
+        return (
+            self.dispatcher.systems['a'].calls,
+            self.dispatcher.systems['b'].calls,
+            Keep.calls
+        )
+
+    def test_run(self):
+
+        self.assertEqual(self.calls(), (1, 1, 1))
+        self.assertEqual(self.request.resctx['sa'], [0, 2])
+        self.assertEqual(self.request.resctx['sb'], [0, 1, 2, 3])
+
+    def test_nothing(self):
+
+        ctx = self.request.run(force=True)
+
+        self.assertEqual(self.calls(), (1, 1, 1))
+        self.assertEqual(ctx['sa'], [0, 2])
+        self.assertEqual(ctx['sb'], [0, 1, 2, 3])
+
+    def test_independent(self):
+
+        self.dispatcher.systems['b'].items = [4]
+        self.request.invalidate('sb')
+
+        ctx = self.request.run(force=True)
+
+        self.assertEqual(self.calls(), (1, 2, 1))
+        self.assertEqual(ctx['sa'], [0, 2])
+        self.assertEqual(ctx['sb'], [4])
+
+    def test_dependent(self):
+
+        self.dispatcher.systems['a'].items = [4, 5, 6]
+        self.request.invalidate('sa')
+
+        ctx = self.request.run(force=True)
+
+        # the fetch and its filter are executed again
+        self.assertEqual(self.calls(), (2, 1, 2))
+        self.assertEqual(ctx['sa'], [4, 6])
+
+        ctx = self.request.run(force=True)
+
+        self.assertEqual(self.calls(), (2, 1, 2))
+
+    def test_nodes(self):
+
+        self.request.nodes = self.request.nodes[:2]
+
+        self.request.run(force=True)
+
+        self.assertEqual(self.calls(), (2, 2, 1))
+
+    def test_values(self):
+
+        self.request.nodes = self.request.nodes[:2] + [Keep(params=['sa'])]
+        self.request.run(force=True)
+
+        # same structure with other values
+        self.request.nodes = self.request.nodes[:2] + [Keep(params=['sb'])]
+        ctx = self.request.run(force=True)
+
+        self.assertEqual(Keep.calls, 3)
+        self.assertEqual(ctx['sb'], [0, 2])
+
+    def test_queue(self):
+
+        queue = RequestQueue(dispatcher=self.dispatcher)
+        queue.append(self.request)
+
+        queue.run(nodes=[Create(schema='sb')])
+        self.request.run(force=True)
+
+        self.assertEqual(self.calls(), (1, 2, 1))
+
+
+class TraceTest(UTCase):
+
+    def test_invalidated(self):
+
+        trace = Trace(fingerprint=(), count=3)
+        trace.steps = [
+            (frozenset(), frozenset(['x'])),
+            (frozenset(['x']), frozenset(['y'])),
+            (frozenset(['z']), frozenset(['z']))
+        ]
+
+        self.assertEqual(trace.invalidated(['x']), ({0, 1}, {'x', 'y'}))
+        self.assertEqual(trace.invalidated(['y']), ({1}, {'y'}))
+        self.assertEqual(trace.invalidated([]), (set(), set()))
+
+
+class WrittenSchemasTest(UTCase):
+
+    def test_writtenschemas(self):
+
+        nodes = [
+            Create(schema='c'), Update(schema='u'), Delete(schema='d'),
+            Delete(), fetch('f', 'a')
+        ]
+
+        self.assertEqual(writtenschemas(nodes), set(['c', 'u', 'd']))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,408 @@
+# -*- coding: utf-8 -*-
+
+# --------------------------------------------------------------------
+# The MIT License (MIT)
+#
+# Copyright (c) 2016 Jonathan Labéjof <jonathan.labejof@gmail.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+# --------------------------------------------------------------------
+
+
+
+from unittest import main
+
+from b3j0f.utils.ut import UTCase
+
+from ..base import Node, Ref, ALIAS
+from ..join import (
+    hashjoin, keyfunc, runjoin, BloomFilter, KeyFilter,
+    INNER, LEFT, SEMI, ANTI
+)
+from ..plan import PlanCache, compileplan, runplan, JOIN, RUN
+from ..expr.base import Expression
+from ..expr.join import Join, In
+from ..expr.num import EQ
+from ...cost import CostModel
+
+
+class KeyFuncTest(UTCase):
+
+    def test_prop(self):
+
+        self.assertEqual(keyfunc('a')({'a': 1}), 1)
+
+    def test_ctxname(self):
+
+        self.assertEqual(keyfunc('sys/sch/a')({'a': 1}), 1)
+
+    def test_composite(self):
+
+        key = keyfunc(['a', 'sys/sch/b'])
+
+        self.assertEqual(key({'a': 1, 'b': 2}), (1, 2))
+        self.assertIsNone(key({'a': 1}))
+
+
+LEFTITEMS = [{'id': 1}, {'id': 2}, {'id': 3}, {}]
+RIGHTITEMS = [{'ref': 2, 'v': 'a'}, {'ref': 1, 'v': 'b'}, {'ref': 2, 'v': 'c'}]
+
+
+class HashJoinTest(UTCase):
+
+    def join(self, how, left=LEFTITEMS, right=RIGHTITEMS):
+
+        return hashjoin(left, right, 'id', 'ref', how=how, rightname='r')
+
+    def test_inner(self):
+
+        expected = [
+            {'left': {'id': 1}, 'r': RIGHTITEMS[1]},
+            {'left': {'id': 2}, 'r': RIGHTITEMS[0]},
+            {'left': {'id': 2}, 'r': RIGHTITEMS[2]}
+        ]
+
+        self.assertEqual(self.join(INNER), expected)
+        # same order when the hash table is built on the left side
+        self.assertEqual(
+            self.join(INNER, right=RIGHTITEMS * 2),
+            [
+                {'left': {'id': 1}, 'r': RIGHTITEMS[1]},
+                {'left': {'id': 1}, 'r': RIGHTITEMS[1]},
+                {'left': {'id': 2}, 'r': RIGHTITEMS[0]},
+                {'left': {'id': 2}, 'r': RIGHTITEMS[2]},
+                {'left': {'id': 2}, 'r': RIGHTITEMS[0]},
+                {'left': {'id': 2}, 'r': RIGHTITEMS[2]}
+            ]
+        )
+
+    def test_left(self):
+
+        result = self.join(LEFT)
+
+        self.assertEqual(len(result), 5)
+        self.assertEqual(result[3], {'left': {'id': 3}, 'r': None})
+        self.assertEqual(result[4], {'left': {}, 'r': None})
+
+    def test_semi(self):
+
+        self.assertEqual(self.join(SEMI), [{'id': 1}, {'id': 2}])
+        self.assertEqual(
+            self.join(SEMI, right=RIGHTITEMS * 2), [{'id': 1}, {'id': 2}]
+        )
+
+    def test_anti(self):
+
+        self.assertEqual(self.join(ANTI), [{'id': 3}, {}])
+        self.assertEqual(
+            self.join(ANTI, right=RIGHTITEMS * 2), [{'id': 3}, {}]
+        )
+
+    def test_empty(self):
+
+        self.assertEqual(self.join(INNER, right=[]), [])
+        self.assertEqual(self.join(ANTI, right=[]), LEFTITEMS)
+
+    def test_how(self):
+
+        self.assertRaises(ValueError, self.join, 'outer')
+
+
+class TestSystem(object):
+
+    def __init__(self, items):
+
+        self.items = items
+        self.calls = []
+
+    def run(self, nodes, dispatcher, ctx):
+
+        for node in nodes:
+            self.calls.append(node)
+
+            if isinstance(node, In):
+                ctx[node.params[0].schema] = list(self.items)
+                node.run(dispatcher=dispatcher, ctx=ctx)
+
+            else:
+                ctx[node.schema] = self.items
+
+        return ctx
+
+
+class TestCost(CostModel):
+
+    def __init__(self, **rows):
+
+        super(TestCost, self).__init__()
+
+        for system in rows:
+            self.observe(system, 0., rows=rows[system])
+
+
+class IgnoreSystem(TestSystem):
+    """System which ignores membership predicates."""
+
+    def run(self, nodes, dispatcher, ctx):
+
+        for node in nodes:
+            self.calls.append(node)
+            ctx[node.params[0].schema] = list(self.items)
+
+        return ctx
+
+
+class TestDispatcher(object):
+
+    def __init__(self, cost=None):
+
+        self.systems = {
+            'a': TestSystem(LEFTITEMS), 'b': TestSystem(RIGHTITEMS)
+        }
+        self.cost = cost
+
+
+def keys():
+
+    return (
+        Expression(system='a', schema='left', prop='id'),
+        Expression(system='b', schema='right', prop='ref')
+    )
+
+
+class RunJoinTest(UTCase):
+
+    def setUp(self):
+
+        self.dispatcher = TestDispatcher()
+
+    def test_join(self):
+
+        join = Join(params=list(keys()), how=SEMI)
+
+        ctx = join.run(dispatcher=self.dispatcher, ctx={})
+
+        self.assertEqual(ctx[join.getctxname()], [{'id': 1}, {'id': 2}])
+
+    def test_fetched(self):
+
+        ctx = {'left': [{'id': 2}]}
+
+        join = Join(params=list(keys()))
+        runjoin(join, dispatcher=self.dispatcher, ctx=ctx)
+
+        self.assertFalse(self.dispatcher.systems['a'].calls)
+        # the right side is reduced to the left keys
+        calls = self.dispatcher.systems['b'].calls
+        self.assertEqual(len(calls), 1)
+        self.assertIsInstance(calls[0], In)
+        self.assertEqual(calls[0].params[1], [2])
+        self.assertEqual(
+            ctx[join.getctxname()],
+            [
+                {'a/left/': {'id': 2}, 'b/right/': RIGHTITEMS[0]},
+                {'a/left/': {'id': 2}, 'b/right/': RIGHTITEMS[2]}
+            ]
+        )
+
+    def test_ref(self):
+
+        left, right = keys()
+        left.alias = 'l'
+
+        join = Join(params=[Ref(alias='l'), right], how=ANTI)
+
+        ctx = join.run(dispatcher=self.dispatcher, ctx={ALIAS: {'l': left}})
+
+        self.assertEqual(ctx[join.getctxname()], [{'id': 3}, {}])
+
+
+class BloomFilterTest(UTCase):
+
+    def test_contains(self):
+
+        bloom = BloomFilter(1000)
+
+        for key in range(1000):
+            bloom.add(key)
+
+        self.assertTrue(all(key in bloom for key in range(1000)))
+
+        positives = sum(1 for key in range(1000, 11000) if key in bloom)
+
+        self.assertLess(positives, 300)
+
+
+class KeyFilterTest(UTCase):
+
+    def test_exact(self):
+
+        keyfilter = KeyFilter(LEFTITEMS, keyfunc('id'))
+
+        self.assertEqual(keyfilter.keys, set([1, 2, 3]))
+        self.assertIn(2, keyfilter)
+        self.assertNotIn(4, keyfilter)
+
+    def test_bloom(self):
+
+        keyfilter = KeyFilter(LEFTITEMS, keyfunc('id'), maxkeys=2)
+
+        self.assertIsNone(keyfilter.keys)
+        self.assertIsNotNone(keyfilter.bloom)
+        self.assertTrue(all(key in keyfilter for key in [1, 2, 3]))
+
+
+class ReductionTest(UTCase):
+
+    def test_selective(self):
+
+        dispatcher = TestDispatcher(cost=TestCost(a=1000, b=3))
+        node = EQ(params=list(keys()))
+
+        ctx = runjoin(node, dispatcher=dispatcher, ctx={}, chunksize=1)
+
+        # b is fetched in full, then a by chunks of b keys
+        bcalls = dispatcher.systems['b'].calls
+        self.assertEqual(len(bcalls), 1)
+        self.assertNotIsInstance(bcalls[0], In)
+        self.assertEqual(
+            sorted(call.params[1] for call in dispatcher.systems['a'].calls),
+            [[1], [2]]
+        )
+        self.assertEqual(ctx['left'], [{'id': 1}, {'id': 2}])
+        self.assertEqual(len(ctx[node.getctxname()]), 3)
+
+    def test_observed(self):
+
+        dispatcher = TestDispatcher(cost=CostModel())
+
+        runjoin(EQ(params=list(keys())), dispatcher=dispatcher, ctx={})
+
+        self.assertEqual(dispatcher.cost.stats('a').rows, len(LEFTITEMS))
+
+        del dispatcher.systems['a'].calls[:]
+        del dispatcher.systems['b'].calls[:]
+
+        runjoin(EQ(params=list(keys())), dispatcher=dispatcher, ctx={})
+
+        # the right side is the most selective one now
+        self.assertNotIsInstance(dispatcher.systems['b'].calls[0], In)
+        self.assertIsInstance(dispatcher.systems['a'].calls[0], In)
+
+    def test_ignoredchunks(self):
+
+        dispatcher = TestDispatcher()
+        dispatcher.systems['b'] = IgnoreSystem(RIGHTITEMS)
+
+        ctx = runjoin(
+            EQ(params=list(keys())), dispatcher=dispatcher,
+            ctx={'left': LEFTITEMS}, chunksize=1
+        )
+
+        self.assertEqual(len(dispatcher.systems['b'].calls), 3)
+        self.assertEqual(
+            sorted(item['v'] for item in ctx['right']), ['a', 'b', 'c']
+        )
+
+    def test_left(self):
+
+        dispatcher = TestDispatcher(cost=TestCost(a=1000, b=3))
+
+        ctx = runjoin(
+            EQ(params=list(keys())), dispatcher=dispatcher, ctx={}, how=LEFT
+        )
+
+        # the left side is fetched first and in full
+        self.assertNotIsInstance(dispatcher.systems['a'].calls[0], In)
+        self.assertIsInstance(dispatcher.systems['b'].calls[0], In)
+        self.assertEqual(len(ctx['left']), 4)
+
+    def test_nokeys(self):
+
+        dispatcher = TestDispatcher()
+
+        ctx = runjoin(
+            EQ(params=list(keys())), dispatcher=dispatcher, ctx={'left': []}
+        )
+
+        self.assertFalse(dispatcher.systems['b'].calls)
+        self.assertEqual(ctx['right'], [])
+
+    def test_postfilter(self):
+
+        dispatcher = TestDispatcher()
+
+        ctx = runjoin(
+            EQ(params=list(keys())), dispatcher=dispatcher,
+            ctx={'left': [{'id': 1}, {'id': 3}]}, maxkeys=1
+        )
+
+        self.assertNotIsInstance(dispatcher.systems['b'].calls[0], In)
+        self.assertEqual(ctx['right'], [RIGHTITEMS[1]])
+
+
+class PlanJoinTest(UTCase):
+
+    def test_compile(self):
+
+        plan, _ = compileplan([EQ(params=list(keys()))])
+
+        self.assertEqual(
+            [(step.indexes, step.kind) for step in plan.steps], [([0], JOIN)]
+        )
+
+    def test_samesystem(self):
+
+        left, right = keys()
+        right.system = 'a'
+
+        plan, _ = compileplan([EQ(params=[left, right]), Node()])
+
+        self.assertNotIn(JOIN, [step.kind for step in plan.steps])
+
+    def test_function(self):
+
+        left, right = keys()
+
+        plan, _ = compileplan([EQ(params=[left, EQ(params=[right, 1])])])
+
+        self.assertEqual([step.kind for step in plan.steps], [RUN])
+
+    def test_run(self):
+
+        plans = PlanCache()
+        dispatcher = TestDispatcher()
+        node = EQ(params=list(keys()))
+
+        ctx = runplan([node], dispatcher=dispatcher, ctx={}, cache=plans)
+
+        self.assertEqual(len(ctx[node.getctxname()]), 3)
+        self.assertIs(node.ctx, ctx)
+
+        # the fingerprint distinguishes joins from other equalities
+        left, right = keys()
+        runplan(
+            [EQ(params=[left, EQ(params=[right, 1])])], dispatcher=dispatcher,
+            ctx={}, cache=plans
+        )
+        self.assertEqual(len(plans), 2)
+
+
+if __name__ == '__main__':
+    main()
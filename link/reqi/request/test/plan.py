@@ -0,0 +1,521 @@
+# -*- coding: utf-8 -*-
+
+# --------------------------------------------------------------------
+# The MIT License (MIT)
+#
+# Copyright (c) 2016 Jonathan Labéjof <jonathan.labejof@gmail.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+# --------------------------------------------------------------------
+
+
+
+from unittest import main
+
+from b3j0f.utils.ut import UTCase
+
+from threading import current_thread
+
+from ..base import Node
+from ..plan import PlanCache, compileplan, runplan, RUN, LOCAL, SYSTEM
+from ..expr.func import Function
+from ..expr.base import Expression
+from ..expr.group import And
+from ..expr.num import Add
+from ..ctx import Context
+from ..crud import Create, Update, Delete
+from ...executor import ThreadExecutor
+from .base import TestNode
+
+
+class TestFunction(Function):
+
+    def _prun(self, dispatcher, ctx):
+
+        ctx['exec'].append(self.alias)
+
+        return ctx
+
+
+class PureFunction(TestFunction):
+
+    pure = True
+
+
+class TestPredicate(Function):
+
+    opname = 'lt'
+
+    def _run(self, dispatcher, ctx):
+
+        ctx['exec'].append(self.alias)
+
+        return ctx
+
+
+def predicate(alias, *systems):
+
+    return TestPredicate(
+        alias=alias, params=[Expression(system=system) for system in systems]
+    )
+
+
+class TestSystem(object):
+
+    def __init__(self, name):
+
+        self.name = name
+
+    def run(self, nodes, dispatcher, ctx):
+
+        for node in nodes:
+            ctx['exec'].append((node.alias, self.name))
+
+        return ctx
+
+
+class TestDispatcher(object):
+
+    def __init__(self, *names):
+
+        self.systems = dict((name, TestSystem(name)) for name in names)
+
+
+def multisys(alias='parent'):
+
+    return TestFunction(
+        alias=alias,
+        params=[
+            TestFunction(alias='a', system='a'),
+            1,
+            TestFunction(alias='b', system='b', params=[Node()]),
+            TestFunction(alias='c', system='c')
+        ]
+    )
+
+
+class CompilePlanTest(UTCase):
+
+    def assertsteps(self, nodes, steps):
+
+        plan, _ = compileplan(nodes)
+
+        self.assertEqual(
+            [(step.indexes, step.kind, step.system) for step in plan.steps],
+            steps
+        )
+
+    def test_empty(self):
+
+        self.assertsteps([], [])
+
+    def test_node(self):
+
+        self.assertsteps(
+            [Node(), TestNode()], [([0], RUN, None), ([1], RUN, None)]
+        )
+
+    def test_local(self):
+
+        self.assertsteps([TestFunction(params=[Node()])], [([0], LOCAL, None)])
+
+    def test_system(self):
+
+        func = TestFunction(params=[Node(), TestFunction(system='s')])
+
+        self.assertsteps([func], [([0], SYSTEM, 's')])
+
+    def test_multisys(self):
+
+        self.assertsteps(
+            [multisys()],
+            [([1], SYSTEM, 'a'), ([2], SYSTEM, 'b'), ([0], SYSTEM, 'c')]
+        )
+
+    def test_roots(self):
+
+        self.assertsteps(
+            [multisys(), Node()],
+            [
+                ([1], SYSTEM, 'a'), ([2], SYSTEM, 'b'), ([0], SYSTEM, 'c'),
+                ([5], RUN, None)
+            ]
+        )
+
+    def test_ends(self):
+
+        plan, _ = compileplan([multisys()])
+
+        self.assertEqual([step.ends for step in plan.steps], [[2], [4], [5]])
+        self.assertTrue(plan.steps[2].covers(plan.steps[0]))
+        self.assertFalse(plan.steps[1].covers(plan.steps[0]))
+
+
+class PushDownTest(CompilePlanTest):
+
+    def test_predicate(self):
+
+        self.assertsteps([predicate('p', 'a')], [([0], SYSTEM, 'a')])
+
+    def test_localpredicate(self):
+
+        self.assertsteps([predicate('p')], [([0], RUN, None)])
+
+    def test_crosspredicate(self):
+
+        self.assertsteps([predicate('p', 'a', 'b')], [([0], RUN, None)])
+
+    def test_conjunction(self):
+
+        conjunction = And(
+            params=[
+                predicate('a0', 'a'),
+                predicate('b0', 'b'),
+                predicate('ab', 'a', 'b'),
+                predicate('a1', 'a'),
+                predicate('local')
+            ]
+        )
+
+        self.assertsteps(
+            [conjunction],
+            [
+                ([1, 4], SYSTEM, 'a'),
+                ([2], SYSTEM, 'b'),
+                ([3], RUN, None),
+                ([5], RUN, None),
+                ([0], LOCAL, None)
+            ]
+        )
+
+    def test_systemconjunction(self):
+
+        conjunction = And(params=[predicate('a0', 'a'), predicate('a1', 'a')])
+
+        self.assertsteps([conjunction], [([0], SYSTEM, 'a')])
+
+
+class CommonTest(CompilePlanTest):
+
+    def test_roots(self):
+
+        self.assertsteps(
+            [PureFunction(system='a'), PureFunction(system='a')],
+            [([0], SYSTEM, 'a')]
+        )
+
+    def test_impure(self):
+
+        self.assertsteps(
+            [TestFunction(system='a'), TestFunction(system='a')],
+            [([0], SYSTEM, 'a'), ([1], SYSTEM, 'a')]
+        )
+
+    def test_alias(self):
+
+        self.assertsteps(
+            [TestFunction(system='a'), TestFunction(alias='f', system='a')],
+            [([0], SYSTEM, 'a'), ([1], SYSTEM, 'a')]
+        )
+
+    def test_subtree(self):
+
+        common = [PureFunction(system='a', params=[Node()]) for _ in range(2)]
+
+        plan, _ = compileplan(
+            [
+                common[0],
+                TestFunction(params=[common[1], TestFunction(system='b')])
+            ]
+        )
+
+        self.assertEqual(
+            [(step.indexes, step.system, step.shared) for step in plan.steps],
+            [([0], 'a', [3]), ([2], 'b', [])]
+        )
+
+    def test_conjunction(self):
+
+        conjunction = And(
+            params=[
+                predicate(None, 'a'), predicate(None, 'b'),
+                predicate(None, 'a')
+            ]
+        )
+
+        plan, _ = compileplan([conjunction])
+
+        self.assertEqual(
+            [(step.indexes, step.system, step.shared) for step in plan.steps],
+            [([1], 'a', [3]), ([2], 'b', []), ([0], None, [])]
+        )
+
+    def test_fingerprint(self):
+
+        plans = PlanCache()
+
+        plans.get([TestFunction(system='a'), TestFunction(system='a')])
+        plans.get([TestFunction(system='a'), TestFunction(system='b')])
+
+        self.assertEqual(len(plans), 2)
+
+    def test_run(self):
+
+        common = [PureFunction(system='a') for _ in range(2)]
+
+        ctx = runplan(common, TestDispatcher('a'), {'exec': []}, None)
+
+        self.assertEqual(ctx['exec'], [(None, 'a')])
+        self.assertIs(common[1].ctx, ctx)
+
+    def test_sideeffect(self):
+
+        x = Expression(schema='s', prop='x')
+        ctx = {'s': [{'x': 0}]}
+
+        runplan([Add(params=[x, 1]), Add(params=[x, 1])], None, ctx, None)
+
+        self.assertEqual(ctx['s'], [{'x': 2}])
+
+
+class RunPlanTest(UTCase):
+
+    def setUp(self):
+
+        self.dispatcher = TestDispatcher('a', 'b', 'c')
+        self.plans = PlanCache()
+
+    def test_run(self):
+
+        ctx = runplan(
+            [multisys()], dispatcher=self.dispatcher, ctx={'exec': []},
+            cache=self.plans
+        )
+
+        self.assertEqual(
+            ctx['exec'], [('a', 'a'), ('b', 'b'), ('parent', 'c')]
+        )
+
+    def test_pushdown(self):
+
+        conjunction = And(
+            params=[
+                predicate('a0', 'a'),
+                predicate('ab', 'a', 'b'),
+                predicate('a1', 'a')
+            ]
+        )
+
+        ctx = runplan(
+            [conjunction], dispatcher=self.dispatcher, ctx={'exec': []},
+            cache=self.plans
+        )
+
+        self.assertEqual(ctx['exec'], [('a0', 'a'), ('a1', 'a'), 'ab'])
+
+    def test_cache(self):
+
+        for alias in ['first', 'second']:
+
+            ctx = runplan(
+                [multisys(alias)], dispatcher=self.dispatcher,
+                ctx={'exec': []}, cache=self.plans
+            )
+
+            self.assertEqual(
+                ctx['exec'], [('a', 'a'), ('b', 'b'), (alias, 'c')]
+            )
+
+        self.assertEqual(len(self.plans), 1)
+
+    def test_shapes(self):
+
+        runplan([multisys()], self.dispatcher, {'exec': []}, self.plans)
+        runplan([TestFunction()], self.dispatcher, {'exec': []}, self.plans)
+
+        self.assertEqual(len(self.plans), 2)
+
+    def test_cachesize(self):
+
+        plans = PlanCache(size=1)
+
+        runplan([multisys()], self.dispatcher, {'exec': []}, plans)
+        runplan([TestFunction()], self.dispatcher, {'exec': []}, plans)
+
+        self.assertEqual(len(plans), 1)
+
+    def test_memo(self):
+
+        func = TestFunction(alias='func')
+
+        ctx = {'exec': [], 'func': None}
+
+        runplan([func], self.dispatcher, ctx, self.plans)
+
+        self.assertFalse(ctx['exec'])
+
+
+class RouteDispatcher(TestDispatcher):
+
+    def __init__(self, *names):
+
+        super(RouteDispatcher, self).__init__(*names)
+
+        self.routes = []
+
+    def runcheapest(self, nodes, schema, system=None, ctx=None):
+
+        self.routes.append((schema, system))
+
+        return self.systems[system].run(nodes=nodes, dispatcher=self, ctx=ctx)
+
+
+class RouteTest(UTCase):
+
+    def test_schema(self):
+
+        dispatcher = RouteDispatcher('a')
+        node = TestPredicate(
+            alias='p', params=[Expression(system='a', schema='s'), 1]
+        )
+
+        ctx = runplan([node], dispatcher, {'exec': []}, None)
+
+        self.assertEqual(dispatcher.routes, [('s', 'a')])
+        self.assertEqual(ctx['exec'], [('p', 'a')])
+
+    def test_unknownschema(self):
+
+        dispatcher = RouteDispatcher('a')
+
+        runplan([TestFunction(system='a')], dispatcher, {'exec': []}, None)
+
+        self.assertEqual(dispatcher.routes, [(None, 'a')])
+
+
+class WriteTest(CompilePlanTest):
+
+    def writes(self):
+
+        return [
+            Create(alias='c', schema='s', content={'v': 1}, system='a'),
+            Create(alias='c1', schema='s', content={'v': 2}, system='a'),
+            Update(alias='u', schema='s', pset={'v': 2}, system='a'),
+            Delete(alias='d', schema='t', system='b'),
+            Create(alias='l', schema='s')
+        ]
+
+    def test_compile(self):
+
+        self.assertsteps(
+            self.writes(),
+            [
+                ([0, 1], SYSTEM, 'a'), ([2], RUN, None), ([3], RUN, None),
+                ([4], RUN, None)
+            ]
+        )
+
+    def test_cache(self):
+
+        plans = PlanCache()
+
+        plans.get([Create(schema='s', system='a')])
+        plan, _ = plans.get([Create(system='a')])
+
+        self.assertEqual(plan.steps[0].kind, RUN)
+
+    def test_run(self):
+
+        dispatcher = RouteDispatcher('a', 'b')
+        nodes = self.writes()[:2]
+
+        ctx = runplan(nodes, dispatcher, {'exec': []}, None)
+
+        self.assertEqual(dispatcher.routes, [])  # replicas are not written
+        self.assertEqual(ctx['exec'], [('c', 'a'), ('c1', 'a')])
+
+
+class WriteSystem(TestSystem):
+
+    def run(self, nodes, dispatcher, ctx):
+
+        for node in nodes:
+            ctx[node.alias] = (self.name, current_thread().name)
+
+        return ctx
+
+
+class GroupTest(UTCase):
+
+    def setUp(self):
+
+        self.dispatcher = TestDispatcher()
+        self.dispatcher.systems = dict(
+            (name, WriteSystem(name)) for name in 'ab'
+        )
+        self.dispatcher.executor = ThreadExecutor(workers=2)
+
+    def tearDown(self):
+
+        self.dispatcher.executor.close()
+
+    def roots(self, *schemas):
+
+        return [
+            TestPredicate(
+                alias=system,
+                params=[Expression(system=system, schema=schema)]
+            )
+            for system, schema in zip('ab', schemas)
+        ]
+
+    def test_groups(self):
+
+        nodes = self.roots('s', 't')
+        plan, walked = compileplan(nodes)
+
+        self.assertEqual(
+            [len(group) for group in plan.groups(walked)], [2]
+        )
+
+    def test_sameschema(self):
+
+        nodes = self.roots('s', 's')
+        plan, walked = compileplan(nodes)
+
+        self.assertEqual(
+            [len(group) for group in plan.groups(walked)], [1, 1]
+        )
+
+    def test_run(self):
+
+        ctx = Context()
+        nodes = self.roots('s', 't')
+
+        result = runplan(nodes, self.dispatcher, ctx, None)
+
+        self.assertIs(result, ctx)
+        self.assertEqual(ctx['a'][0], 'a')
+        self.assertEqual(ctx['b'][0], 'b')
+        self.assertNotEqual(ctx['a'][1], current_thread().name)
+        self.assertIs(nodes[1].ctx, ctx)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,177 @@
+# -*- coding: utf-8 -*-
+
+# --------------------------------------------------------------------
+# The MIT License (MIT)
+#
+# Copyright (c) 2016 Jonathan Labéjof <jonathan.labejof@gmail.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+# --------------------------------------------------------------------
+
+
+
+from unittest import main
+
+from b3j0f.utils.ut import UTCase
+
+from ..utils import LAZY, Pipeline, materialize, updatecond, updateitems
+from ..expr.base import Expression
+
+
+class PipelineTest(UTCase):
+
+    def test_stages(self):
+
+        pipeline = Pipeline(range(10)).filter(lambda item: item % 2).map(
+            lambda item: item * 10
+        ).filter(lambda item: item > 10)
+
+        self.assertEqual(list(pipeline), [30, 50, 70, 90])
+
+    def test_lazy(self):
+
+        calls = []
+
+        def func(item):
+            calls.append(item)
+            return item
+
+        pipeline = Pipeline(range(10)).map(func)
+
+        self.assertFalse(calls)
+
+        items = iter(pipeline)
+        next(items)
+
+        self.assertEqual(calls, [0])
+
+    def test_reiterable(self):
+
+        pipeline = Pipeline([1, 2]).map(lambda item: -item)
+
+        self.assertEqual(list(pipeline), [-1, -2])
+        self.assertEqual(list(pipeline), [-1, -2])
+
+    def test_mutatingmap(self):
+
+        items = [{'x': 1}, {'x': 2}]
+
+        def add(item):
+            item['x'] += 10
+            return item
+
+        pipeline = Pipeline(items).map(add)
+
+        self.assertEqual([item['x'] for item in pipeline], [11, 12])
+        self.assertEqual([item['x'] for item in pipeline], [11, 12])
+
+    def test_partial(self):
+
+        calls = []
+
+        def func(item):
+            calls.append(item)
+            return item
+
+        pipeline = Pipeline([1, 2, 3]).map(func)
+
+        next(iter(pipeline))
+
+        self.assertEqual(list(pipeline), [1, 2, 3])
+        self.assertEqual(list(pipeline.map(abs)), [1, 2, 3])
+        self.assertEqual(calls, [1, 2, 3])
+
+    def test_consumed(self):
+
+        pipeline = Pipeline(iter([1, 2]))
+
+        list(pipeline)
+
+        self.assertRaises(ValueError, iter, pipeline)
+
+    def test_materialize(self):
+
+        pipeline = Pipeline(iter([1, 2])).map(lambda item: -item)
+
+        items = pipeline.materialize()
+
+        self.assertEqual(items, [-1, -2])
+        self.assertIs(pipeline.materialize(), items)
+        self.assertEqual(list(pipeline), items)
+        self.assertEqual(list(pipeline.map(abs)), [1, 2])
+
+    def test_materializefunc(self):
+
+        items = [1]
+
+        self.assertIs(materialize(items), items)
+        self.assertEqual(materialize(Pipeline(iter(items))), items)
+
+
+class UpdateTest(UTCase):
+
+    def setUp(self):
+
+        self.node = Expression(schema='schema')
+
+    def assertupdate(self, lazy):
+
+        ctx = {'schema': list(range(10))}
+
+        if lazy:
+            ctx[LAZY] = True
+
+        updatecond(ctx, self.node, lambda item, node, ctx: item % 2)
+        updateitems(ctx, self.node, lambda item, node, ctx: item * 10)
+
+        self.assertEqual(list(ctx['schema']), [10, 30, 50, 70, 90])
+
+        return ctx['schema']
+
+    def test_eager(self):
+
+        self.assertIsInstance(self.assertupdate(lazy=False), list)
+
+    def test_lazy(self):
+
+        self.assertIsInstance(self.assertupdate(lazy=True), Pipeline)
+
+    def test_bind(self):
+
+        ctx = {'schema': list(range(4)), 'max': 2, LAZY: True}
+
+        updatecond(
+            ctx, self.node, lambda item, node, ctx: item < ctx['max']
+        )
+
+        ctx['max'] = 4
+
+        self.assertEqual(list(ctx['schema']), [0, 1])
+
+    def test_missing(self):
+
+        ctx = {}
+
+        self.assertFalse(updatecond(ctx, self.node, None))
+        self.assertFalse(updateitems(ctx, self.node, None))
+        self.assertFalse(ctx)
+
+
+if __name__ == '__main__':
+    main()
@@ -26,13 +26,26 @@
 
 """Node utilities."""
 
-__all__ = ['getcontext', 'updateref', 'copy']
+__all__ = [
+    'getcontext', 'updateref', 'copy', 'updatecond', 'updateitems',
+    'Pipeline', 'materialize'
+]
 
-from collections import Iterable
+try:
+    from collections.abc import Iterable
+
+except ImportError:
+    from collections import Iterable
 
 from six import string_types
 
 from .base import Node
+from .columnar import Columns
+
+LAZY = 'LAZY'  #: ctx key used to enable lazy pipelines.
+
+FILTER = 'filter'  #: pipeline filter stage kind.
+MAP = 'map'  #: pipeline map stage kind.
 
 
 def getcontext(node, systems=None, schemas=None):
@@ -153,30 +166,239 @@ def _parseworef(node, func):
         value."""
 
     for slot in node.__slots__:
-        if slot != 'ref':
+        if slot != 'ref' and not slot.startswith('_'):
             attr = getattr(node, slot)
             func(slot, attr)
 
+
+class Pipeline(object):
+    """Lazy sequence of filter and map stages applied on source items.
+
+    Items are pulled one by one from the source through all stages, so a
+    chain of functions does not build intermediary lists. Stages are applied
+    once per source item: a pipeline over a reiterable source keeps pulled
+    items for next iterations, and a pipeline over a one-shot iterator can be
+    iterated only once unless it is materialized."""
+
+    __slots__ = ['_source', '_stages', '_items', '_iterated', '_pulled']
+
+    def __init__(self, source, stages=None, *args, **kwargs):
+        """
+        :param Iterable source: source items.
+        :param list stages: list of (stage kind, function).
+        """
+
+        super(Pipeline, self).__init__(*args, **kwargs)
+
+        self._source = source
+        self._stages = [] if stages is None else stages
+        self._items = None
+        self._iterated = False
+        self._pulled = None  # pulled items and stream of a reiterable source
+
+    def _chain(self, kind, func):
+        """Get a new pipeline with a stage added to this stages."""
+
+        if self._items is not None:
+            result = Pipeline(self._items, [(kind, func)])
+
+        elif self._pulled is not None:  # do not apply stages twice
+            result = Pipeline(self, [(kind, func)])
+
+        else:
+            result = Pipeline(self._source, self._stages + [(kind, func)])
+
+        return result
+
+    def filter(self, cond):
+        """Get a pipeline which filters this items.
+
+        :param cond: function which takes an item and returns True if the item
+            is kept.
+        :rtype: Pipeline"""
+
+        return self._chain(FILTER, cond)
+
+    def map(self, func):
+        """Get a pipeline which converts this items.
+
+        :param func: function which takes an item and returns a new item.
+        :rtype: Pipeline"""
+
+        return self._chain(MAP, func)
+
+    def materialize(self):
+        """Get (and keep) all items of this pipeline in a list.
+
+        :rtype: list"""
+
+        if self._items is None:
+            self._setitems(list(self))
+
+        return self._items
+
+    def _setitems(self, items):
+        """Keep all items of this pipeline."""
+
+        self._items = items
+        self._source, self._stages, self._pulled = items, [], None
+
+    def __iter__(self):
+
+        if self._items is not None:
+            result = iter(self._items)
+
+        elif iter(self._source) is self._source:  # one-shot source
+
+            if self._iterated:
+                raise ValueError('Pipeline source already consumed.')
+
+            self._iterated = True
+            result = self._stream()
+
+        else:
+            result = self._replay()
+
+        return result
+
+    def _replay(self):
+        """Iterate pulled items, then pull new items from the stream."""
+
+        if self._pulled is None:
+            self._pulled = [], self._stream()
+
+        pulled, stream = self._pulled
+        index = 0
+
+        while True:
+
+            if index == len(pulled):
+                for item in stream:
+                    pulled.append(item)
+                    break
+
+                else:
+                    if self._items is None:
+                        self._setitems(pulled)
+
+                    break
+
+            yield pulled[index]
+            index += 1
+
+    def _stream(self):
+
+        stages = self._stages
+
+        for item in self._source:
+
+            for kind, func in stages:
+
+                if kind == FILTER:
+                    if not func(item):
+                        break
+
+                else:
+                    item = func(item)
+
+            else:
+                yield item
+
+
+def materialize(items):
+    """Get a list from input items if they are a pipeline.
+
+    :param items: items to materialize.
+    :return: input items or pipeline items."""
+
+    if isinstance(items, Pipeline):
+        items = items.materialize()
+
+    return items
+
+
 def updatecond(ctx, node, cond):
+    """Filter ctx items of input node schema.
+
+    Items are filtered lazily if the ctx enables lazy pipelines, except
+    columns which stay columns.
+
+    :param dict ctx: execution context.
+    :param Node node: node which refers to a schema.
+    :param cond: function which takes an item, node and ctx, and returns True
+        if the item is kept.
+    :return: True if the node schema is in ctx.
+    :rtype: bool"""
 
     result = False
 
     if node.schema in ctx:
-        ctx[node.schema] = [
-            item for item in ctx[node.schema] if cond(item, node, ctx)
-        ]
+        items = ctx[node.schema]
+
+        if isinstance(items, Columns):
+            ctx[node.schema] = items.select(
+                [bool(cond(item, node, ctx)) for item in items]
+            )
+
+        elif ctx.get(LAZY):
+            if not isinstance(items, Pipeline):
+                items = Pipeline(items)
+
+            ctx[node.schema] = items.filter(_bind(cond, node, ctx.copy()))
+
+        else:
+            ctx[node.schema] = [
+                item for item in items if cond(item, node, ctx)
+            ]
+
         result = True
 
     return result
 
+
 def updateitems(ctx, node, update):
+    """Convert ctx items of input node schema.
+
+    Items are converted lazily if the ctx enables lazy pipelines, except
+    columns which stay columns.
+
+    :param dict ctx: execution context.
+    :param Node node: node which refers to a schema.
+    :param update: function which takes an item, node and ctx, and returns a
+        new item.
+    :return: True if the node schema is in ctx.
+    :rtype: bool"""
 
     result = False
 
     if node.schema in ctx:
-        ctx[node.schema] = [
-            update(item, node, ctx) for item in ctx[node.schema]
-        ]
+        items = ctx[node.schema]
+
+        if isinstance(items, Columns):
+            ctx[node.schema] = Columns.fromrows(
+                update(item, node, ctx) for item in items.torows()
+            )
+
+        elif ctx.get(LAZY):
+            if not isinstance(items, Pipeline):
+                items = Pipeline(items)
+
+            ctx[node.schema] = items.map(_bind(update, node, ctx.copy()))
+
+        else:
+            ctx[node.schema] = [update(item, node, ctx) for item in items]
+
         result = True
 
     return result
+
+
+def _bind(func, node, ctx):
+    """Get a pipeline stage function which calls func with input values.
+
+    Lazy stages are executed after ctx changes, so they are given a copy of
+    ctx taken when they are added.
+
+    :rtype: function"""
+
+    return lambda item: func(item, node, ctx)
@@ -0,0 +1,299 @@
+# -*- coding: utf-8 -*-
+
+# --------------------------------------------------------------------
+# The MIT License (MIT)
+#
+# Copyright (c) 2016 Jonathan Labéjof <jonathan.labejof@gmail.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+# --------------------------------------------------------------------
+
+"""Specification of the routing index used by the dispatcher.
+
+System, schema and property names are interned into integer identifiers in
+their registration order. Relations between them are stored as integer bitsets
+in order to resolve routing with word-parallel intersections and unions."""
+
+__all__ = ['RoutingIndex']
+
+
+class RoutingIndex(object):
+    """In charge of indexing relations between systems, schemas and properties.
+
+    Resulting name lists are always decoded in the registration order (or in
+    the order of given default names) in order to stay deterministic."""
+
+    __slots__ = [
+        '_systemids', '_schemaids', '_systems', '_schemas',
+        '_schemaspersystem', '_systemsperschema', '_schemasperprop'
+    ]
+
+    def __init__(self, *args, **kwargs):
+
+        super(RoutingIndex, self).__init__(*args, **kwargs)
+
+        self._systemids = {}  # system id by system name
+        self._schemaids = {}  # schema id by schema name
+        self._systems = []  # system names by id
+        self._schemas = []  # schema names by id
+        self._schemaspersystem = []  # schema bitset by system id
+        self._systemsperschema = []  # system bitset by schema id
+        self._schemasperprop = {}  # schema bitset by property name
+
+    @property
+    def systems(self):
+        """Registered system names.
+
+        :rtype: list"""
+
+        return list(self._systems)
+
+    @property
+    def schemas(self):
+        """Registered schema names.
+
+        :rtype: list"""
+
+        return list(self._schemas)
+
+    def register(self, system, schema=None, props=None):
+        """Register a system with an optional schema and schema properties.
+
+        :param str system: system name.
+        :param str schema: schema name.
+        :param list props: schema property names.
+        """
+
+        systemid = self._systemids.get(system)
+
+        if systemid is None:
+            systemid = self._systemids[system] = len(self._systems)
+            self._systems.append(system)
+            self._schemaspersystem.append(0)
+
+        if schema is not None:
+
+            schemaid = self._schemaids.get(schema)
+
+            if schemaid is None:
+                schemaid = self._schemaids[schema] = len(self._schemas)
+                self._schemas.append(schema)
+                self._systemsperschema.append(0)
+
+            schemabit = 1 << schemaid
+
+            self._schemaspersystem[systemid] |= schemabit
+            self._systemsperschema[schemaid] |= 1 << systemid
+
+            for prop in props or ():
+                self._schemasperprop[prop] = (
+                    self._schemasperprop.get(prop, 0) | schemabit
+                )
+
+    def systemsmask(self, systems=None):
+        """Get the bitset of input system names.
+
+        :param list systems: system names. Default all systems.
+        :rtype: int
+        :raises: KeyError if a system is not registered."""
+
+        if systems is None:
+            result = (1 << len(self._systems)) - 1
+
+        else:
+            result = 0
+
+            for system in systems:
+                result |= 1 << self._systemids[system]
+
+        return result
+
+    def schemasmask(self, schemas=None):
+        """Get the bitset of input schema names.
+
+        :param list schemas: schema names. Default all schemas.
+        :rtype: int
+        :raises: KeyError if a schema is not registered."""
+
+        if schemas is None:
+            result = (1 << len(self._schemas)) - 1
+
+        else:
+            result = 0
+
+            for schema in schemas:
+                result |= 1 << self._schemaids[schema]
+
+        return result
+
+    def schemasofsystems(self, mask):
+        """Get the schema bitset hosted by the systems of the input bitset.
+
+        :param int mask: system bitset.
+        :rtype: int"""
+
+        return self._union(mask, self._schemaspersystem)
+
+    def systemsofschemas(self, mask):
+        """Get the system bitset hosting the schemas of the input bitset.
+
+        :param int mask: schema bitset.
+        :rtype: int"""
+
+        return self._union(mask, self._systemsperschema)
+
+    def schemasofprop(self, prop):
+        """Get the bitset of schemas which own the input property.
+
+        :param str prop: property name.
+        :rtype: int
+        :raises: KeyError if prop is not registered."""
+
+        return self._schemasperprop[prop]
+
+    def systemnames(self, mask, order=None):
+        """Decode a system bitset into system names.
+
+        :param int mask: system bitset.
+        :param list order: system names order. Default registration order.
+        :rtype: list"""
+
+        return self._decode(mask, self._systems, self._systemids, order)
+
+    def schemanames(self, mask, order=None):
+        """Decode a schema bitset into schema names.
+
+        :param int mask: schema bitset.
+        :param list order: schema names order. Default registration order.
+        :rtype: list"""
+
+        return self._decode(mask, self._schemas, self._schemaids, order)
+
+    def resolve(
+            self, system=None, schema=None, prop=None,
+            defsystems=None, defschemas=None
+    ):
+        """Get systems and schemas corresponding to input system, schema and
+        prop if not given.
+
+        :param str system: system name.
+        :param str schema: schema name.
+        :param str prop: property name.
+        :param list defsystems: default system names.
+        :param list defschemas: default schema names.
+        :return: corresponding (systems, schemas)
+        :rtype: tuple
+        """
+
+        sysorder, schorder = defsystems, defschemas
+
+        if defsystems is None:
+
+            if defschemas is None:
+                sysmask = self.systemsmask()
+
+            else:
+                sysmask = self.systemsofschemas(self.schemasmask(defschemas))
+
+        else:
+            sysmask = self.systemsmask(defsystems)
+
+        if defschemas is None:
+            schmask = self.schemasofsystems(sysmask)
+
+        else:
+            schmask = self.schemasmask(defschemas)
+
+        if system is not None:
+            sysmask, sysorder = self.systemsmask([system]), None
+
+        if schema is not None:
+            schmask, schorder = self.schemasmask([schema]), None
+
+        if prop is None:
+
+            if schema is None:
+
+                if system is not None:
+                    schmask &= self.schemasofsystems(sysmask)
+
+            elif system is None:
+                sysmask &= self.systemsofschemas(schmask)
+
+        elif schema is None:
+
+            schmask &= self.schemasofprop(prop)
+
+            if system is None:
+                sysmask &= self.systemsofschemas(schmask)
+
+            else:
+                schmask &= self.schemasofsystems(sysmask)
+
+        elif system is None:
+            sysmask &= self.systemsofschemas(schmask)
+
+        systems = self.systemnames(sysmask, sysorder)
+        schemas = self.schemanames(schmask, schorder)
+
+        return systems, schemas
+
+    @staticmethod
+    def _union(mask, bitsets):
+        """Union bitsets indexed by set bits of the input mask."""
+
+        result = 0
+        index = 0
+
+        while mask:
+
+            if mask & 1:
+                result |= bitsets[index]
+
+            mask >>= 1
+            index += 1
+
+        return result
+
+    @staticmethod
+    def _decode(mask, names, ids, order):
+        """Decode a bitset into names in the input order."""
+
+        result = []
+
+        if order is None:
+            index = 0
+
+            while mask:
+
+                if mask & 1:
+                    result.append(names[index])
+
+                mask >>= 1
+                index += 1
+
+        else:
+            for name in order:
+                bit = 1 << ids[name]
+
+                if mask & bit:
+                    result.append(name)
+                    mask &= ~bit  # remove multi-occurences
+
+        return result
@@ -24,10 +24,54 @@
 # SOFTWARE.
 # --------------------------------------------------------------------
 
-"""Specification of the System interface."""
+"""Specification of the System interface.
+
+A system runs nodes delegated by request plans. Predicates on a schema which
+is not read yet in the execution context are given to the query driver with
+the read query (see the 'predicates' query key), so that only matching items
+are read. Other nodes are executed in memory with the same semantics.
+
+Group-by of reads on one schema are given to the query driver too (see the
+'group' query key), so that only groups are read. Partial states of
+aggregate functions are computed by the query driver as well (see the
+'partial' entry of the 'group' query key), so that systems hosting
+partitions of a schema only return their states.
+
+Predicates of several requests on a same schema (see runbatch) are given to
+the query driver with one read query of the union of their conjunctions, and
+read items are filtered by request in memory.
+
+Sorts of reads on one schema are given to the query driver as well (see
+the 'sort', 'skip' and 'limit' query keys), so that only sorted items of the
+requested page are read.
+
+Create nodes are given to the query driver with one call per schema to its
+``process_writes`` method if it exists (for example mongo bulk writes),
+otherwise with one query per node. Driver results are set in the execution
+context under node context names. Update and Delete nodes have no filter to
+give to the driver, so they are executed on the items of the execution
+context."""
 
 __all__ = ['System']
 
+from b3j0f.utils.version import OrderedDict
+
+from link.dbrequest.assignment import A
+from link.dbrequest.driver import Driver
+from link.feature import getfeature
+
+from .request.crud import Create
+from .request.expr.base import Expression
+from .request.expr.group import And, Or
+from .request.groupby import COMBINERS
+from .request.utils import materialize
+
+PARTIAL = 'partial'  #: aggregate name of partial states read by runpartial.
+
+#: combiners of group-by given to query drivers. Drivers do not skip None
+#: values of first and last combiners.
+PUSHEDCOMBINERS = frozenset(['count', 'sum', 'min', 'max', 'mean'])
+
 
 class System(object):
     """In charge of processing requests thanks to both querymanager and model.
@@ -43,3 +87,349 @@ class System(object):
 
         self.model = model
         self.querymanager = querymanager
+
+    def run(self, nodes, dispatcher, ctx):
+        """Run input nodes.
+
+        :param list nodes: nodes to run.
+        :param b3j0f.reqi.dispatch.Dispatcher dispatcher: dispatcher.
+        :param dict ctx: execution context.
+        :return: execution context.
+        :rtype: dict"""
+
+        predicates = OrderedDict()  # pushed predicates by schema
+        writes = OrderedDict()  # Create nodes by schema
+        others = []
+
+        for node in nodes:
+            schema = _schema(node)
+
+            if isinstance(node, Create) and node.schema:
+                writes.setdefault(node.schema, []).append(node)
+
+            elif (
+                    getattr(node, 'opname', None) is not None and
+                    schema is not None and schema not in ctx
+            ):
+                predicates.setdefault(schema, []).append(node)
+
+            else:
+                others.append(node)
+
+        for schema in predicates:
+            ctx[schema] = self.read(schema, predicates[schema])
+
+        for schema in writes:
+            results = self.write(schema, writes[schema])
+
+            for node, result in zip(writes[schema], results):
+                ctx[node.getctxname()] = result
+
+        for node in others:
+            ctx = node._run(dispatcher=dispatcher, ctx=ctx) or ctx
+
+        return ctx
+
+    def runbatch(self, batches, dispatcher):
+        """Run nodes of several requests.
+
+        Predicates on a schema which is read by several requests are given
+        to the query driver in one read query, with the union of the
+        predicates of each request (see the 'or' predicate). Read items are
+        set in each request ctx, where run filters them in memory with the
+        request predicates.
+
+        :param list batches: list of (nodes, ctx).
+        :param b3j0f.reqi.dispatch.Dispatcher dispatcher: dispatcher.
+        :return: execution context per batch.
+        :rtype: list"""
+
+        readers = OrderedDict()  # list of (ctx, predicates) by schema
+
+        for nodes, ctx in batches:
+            predicates = OrderedDict()
+
+            for node in nodes:
+                schema = _schema(node)
+
+                if (
+                        getattr(node, 'opname', None) is not None and
+                        schema is not None and schema not in ctx
+                ):
+                    predicates.setdefault(schema, []).append(node)
+
+            for schema in predicates:
+                readers.setdefault(schema, []).append(
+                    (ctx, predicates[schema])
+                )
+
+        for schema, reads in readers.items():
+            if len(reads) > 1:
+                items = self.read(
+                    schema, [
+                        Or(params=[
+                            predicates[0] if len(predicates) == 1 else
+                            And(params=predicates)
+                            for _, predicates in reads
+                        ])
+                    ]
+                )
+
+                for ctx, _ in reads:
+                    ctx[schema] = list(items)
+
+        return [
+            self.run(nodes=nodes, dispatcher=dispatcher, ctx=ctx)
+            for nodes, ctx in batches
+        ]
+
+    def rungroup(self, nodes, groupby, aggregates, dispatcher, ctx):
+        """Read groups of input read expressions.
+
+        Groups are read by the query driver if nodes are expressions and
+        predicates of one schema which is not read yet in ctx, if fields are
+        schema properties and if combiners are in PUSHEDCOMBINERS. Otherwise,
+        items are grouped in memory.
+
+        :param list nodes: read expressions.
+        :param list groupby: names of properties to group by.
+        :param list aggregates: list of (name, Combiner, field name).
+        :param b3j0f.reqi.dispatch.Dispatcher dispatcher: dispatcher.
+        :param dict ctx: execution context.
+        :return: group-by and aggregated values by name, or None if items
+            must be grouped in memory.
+        :rtype: OrderedDict"""
+
+        result = None
+
+        schemas, predicates = _reads(nodes)
+
+        fields = set(groupby) | set(field for _, _, field in aggregates)
+        names = [name for name, _, _ in aggregates]
+
+        if (
+                len(schemas) == 1 and None not in schemas and
+                not schemas & set(ctx) and
+                not fields & set(node.getctxname() for node in nodes) and
+                all(
+                    combiner.name in PUSHEDCOMBINERS and
+                    COMBINERS[combiner.name] is combiner
+                    for _, combiner, _ in aggregates
+                )
+        ):
+            items = self.read(
+                schemas.pop(), predicates,
+                group={'groupby': list(groupby), 'aggregates': aggregates}
+            )
+
+            result = OrderedDict(
+                (name, [item.get(name) for item in items])
+                for name in list(groupby) + names
+            )
+
+        return result
+
+    def runsort(self, nodes, sort, offset, limit, dispatcher, ctx):
+        """Read sorted items of input read expressions.
+
+        Items are sorted, skipped and limited by the query driver if nodes
+        are expressions and predicates of one schema which is not read yet
+        in ctx, and if fields are schema properties. Sorted items are set in
+        ctx under the schema and node context names.
+
+        :param list nodes: read expressions.
+        :param list sort: list of (field name, direction).
+        :param int offset: number of sorted items to skip.
+        :param int limit: maximal number of items. None for all items.
+        :param b3j0f.reqi.dispatch.Dispatcher dispatcher: dispatcher.
+        :param dict ctx: execution context.
+        :return: execution context, or None if items must be sorted in
+            memory.
+        :rtype: dict"""
+
+        result = None
+
+        schemas, predicates = _reads(nodes)
+        fields = set(field for field, _ in sort)
+
+        if (
+                len(schemas) == 1 and None not in schemas and
+                not schemas & set(ctx) and
+                not fields & set(node.getctxname() for node in nodes)
+        ):
+            schema = schemas.pop()
+
+            items = self.read(
+                schema, predicates, sort=list(sort), skip=offset, limit=limit
+            )
+
+            ctx[schema] = items
+
+            for node in nodes:
+                ctx[node.getctxname()] = items
+
+            result = ctx
+
+        return result
+
+    def runpartial(self, node, expr, dispatcher, ctx):
+        """Compute the partial state of an aggregate function on the items
+        of its expression schema.
+
+        The state is computed by the query driver if the combiner is in
+        PUSHEDCOMBINERS and aggregates an item property. Otherwise, items are
+        read and reduced in memory.
+
+        :param link.reqi.request.expr.agg.Aggregate node: aggregate function.
+        :param Expression expr: aggregated expression of this system.
+        :param b3j0f.reqi.dispatch.Dispatcher dispatcher: dispatcher.
+        :param dict ctx: execution context.
+        :return: combiner state."""
+
+        combiner = node.combiner
+
+        if (
+                combiner.name in PUSHEDCOMBINERS and
+                COMBINERS[combiner.name] is combiner and
+                expr.prop != type(expr).__name__  # default property
+        ):
+            states = self.read(
+                expr.schema, [], group={
+                    'groupby': [], 'partial': True,
+                    'aggregates': [(PARTIAL, combiner, expr.prop)]
+                }
+            )
+
+            result = states[0][PARTIAL] if states else combiner.init()
+
+        else:
+            items = ctx.get(expr.schema)
+
+            if items is None:
+                items = self.read(expr.schema, [])
+
+            result = node.partial(materialize(items), expr)
+
+        return result
+
+    def read(
+            self, schema, predicates, group=None, sort=None, skip=None,
+            limit=None
+    ):
+        """Read schema items which match all input predicates.
+
+        :param str schema: schema name.
+        :param list predicates: predicates to give to the query driver.
+        :param dict group: group-by to give to the query driver, with
+            groupby and aggregates entries (see rungroup). With a True
+            partial entry, the driver returns one item with combiner states
+            of all items by aggregate name.
+        :param list sort: list of (field name, direction) to give to the
+            query driver (see runsort).
+        :param int skip: number of sorted items to skip.
+        :param int limit: maximal number of sorted items.
+        :return: items, or groups.
+        :rtype: list"""
+
+        driver = self._driver(schema)
+
+        query = {
+            'type': Driver.QUERY_READ, 'filter': [], 'predicates': predicates
+        }
+
+        if group is not None:
+            query['group'] = group
+
+        if sort is not None:
+            query.update(sort=sort, skip=skip, limit=limit)
+
+        cursor = driver.process_query(query)
+
+        return [
+            model.data for model in driver.cursor_class(driver, cursor)
+        ]
+
+    def write(self, schema, nodes):
+        """Write input Create nodes of one schema.
+
+        Nodes are given in order and in one call to the process_writes
+        method of the query driver if it exists, otherwise one by one to its
+        process_query method.
+
+        :param str schema: schema name.
+        :param list nodes: Create nodes.
+        :return: driver result per node.
+        :rtype: list"""
+
+        driver = self._driver(schema)
+        queries = [_writequery(node) for node in nodes]
+
+        processwrites = getattr(driver, 'process_writes', None)
+
+        if processwrites is None:
+            result = [driver.process_query(query) for query in queries]
+
+        else:
+            result = list(processwrites(queries, ordered=True))
+
+        return result
+
+    def _driver(self, schema):
+        """Get the query driver of input schema."""
+
+        return getfeature(
+            self.querymanager.get_child_middleware(), Driver.name,
+            scope=[schema]
+        )
+
+
+def _schema(node):
+    """Get the schema name of the first expression param of input node.
+
+    :rtype: str"""
+
+    result = None
+
+    for param in getattr(node, 'params', None) or ():
+        if isinstance(param, Expression) and param.schema is not None:
+            result = param.schema
+            break
+
+    return result
+
+
+def _reads(nodes):
+    """Get schemas and predicates of input read expressions.
+
+    :param list nodes: read expressions.
+    :return: schema names, with None for other nodes, and predicates.
+    :rtype: tuple"""
+
+    schemas = set()
+    predicates = []
+
+    for node in nodes:
+        if getattr(node, 'opname', None) is not None:
+            schemas.add(_schema(node))
+            predicates.append(node)
+
+        elif isinstance(node, Expression) and type(node) is Expression:
+            schemas.add(node.schema)
+
+        else:
+            schemas.add(None)
+
+    return schemas, predicates
+
+
+def _writequery(node):
+    """Get the query driver query of input Create node.
+
+    :rtype: dict"""
+
+    content = node.content or {}
+
+    return {
+        'type': Driver.QUERY_CREATE,
+        'update': [A(name, content[name]).get_ast() for name in content]
+    }
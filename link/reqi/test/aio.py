@@ -0,0 +1,294 @@
+# -*- coding: utf-8 -*-
+
+# --------------------------------------------------------------------
+# The MIT License (MIT)
+#
+# Copyright (c) 2016 Jonathan Labéjof <jonathan.labejof@gmail.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+# --------------------------------------------------------------------
+
+
+
+from unittest import main
+
+from b3j0f.utils.ut import UTCase
+
+from asyncio import new_event_loop, sleep as asleep
+
+from time import sleep, time
+
+from ..aio import AsyncSystem, arunplan, callsystem
+from ..request.core import Request
+from ..request.queue import RequestQueue
+from ..request.ctx import Context
+from ..request.plan import PlanCache, runplan
+from ..request.expr.base import Expression
+from ..request.expr.func import Function
+from ..request.expr.group import And
+from ..request.expr.num import GT, LT
+from ..request.test.plan import TestFunction, predicate
+
+DELAY = 0.05
+
+
+class SleepSystem(AsyncSystem):
+
+    def __init__(self, name):
+
+        self.name = name
+
+    async def run(self, nodes, dispatcher, ctx):
+
+        await asleep(DELAY)
+
+        for node in nodes:
+            ctx['exec'].append((node.alias, self.name))
+
+        return ctx
+
+
+class SyncSystem(object):
+
+    def __init__(self, name):
+
+        self.name = name
+
+    def run(self, nodes, dispatcher, ctx):
+
+        sleep(DELAY)
+
+        for node in nodes:
+            ctx['exec'].append((node.alias, self.name))
+
+        return ctx
+
+
+class FilterSystem(SyncSystem):
+    """Read schema items before waiting for the backend, and write them
+    after."""
+
+    def run(self, nodes, dispatcher, ctx):
+
+        items = dict(ctx)
+
+        sleep(DELAY)
+
+        for node in nodes:
+            items = node._run(dispatcher=dispatcher, ctx=items) or items
+
+        for name in items:
+            if items[name] is not ctx.get(name):
+                ctx[name] = items[name]
+
+        return ctx
+
+
+class TestDispatcher(object):
+
+    def __init__(self, system=SleepSystem):
+
+        self.systems = dict((name, system(name)) for name in 'abc')
+
+
+class CheapestDispatcher(TestDispatcher):
+    """Dispatcher which routes nodes to the system b."""
+
+    def __init__(self, *args, **kwargs):
+
+        super(CheapestDispatcher, self).__init__(*args, **kwargs)
+
+        self.routed = []
+
+    def runcheapest(self, nodes, schema, system=None, ctx=None):
+
+        self.routed.append(system)
+
+        return self.systems['b'].run(nodes=nodes, dispatcher=self, ctx=ctx)
+
+
+def conjunction():
+
+    return And(
+        params=[
+            predicate('a0', 'a'), predicate('b0', 'b'), predicate('c0', 'c')
+        ]
+    )
+
+
+class AsyncTest(UTCase):
+
+    def setUp(self):
+
+        self.loop = new_event_loop()
+        self.plans = PlanCache()
+
+    def tearDown(self):
+
+        self.loop.close()
+
+    def run_until_complete(self, coroutine):
+
+        start = time()
+        result = self.loop.run_until_complete(coroutine)
+
+        return result, time() - start
+
+    def test_abstract(self):
+
+        self.assertRaises(
+            NotImplementedError, self.loop.run_until_complete,
+            AsyncSystem().run(nodes=[], dispatcher=None, ctx={})
+        )
+
+    def test_callsystem(self):
+
+        for system in [SleepSystem('s'), SyncSystem('s')]:
+            ctx, _ = self.run_until_complete(
+                callsystem(
+                    system, [Function(alias='f')], dispatcher=None,
+                    ctx={'exec': []}
+                )
+            )
+
+            self.assertEqual(ctx['exec'], [('f', 's')])
+
+    def test_gather(self):
+
+        for system in [SleepSystem, SyncSystem]:
+            ctx, duration = self.run_until_complete(
+                arunplan(
+                    [conjunction()], dispatcher=TestDispatcher(system),
+                    ctx={'exec': []}, cache=self.plans
+                )
+            )
+
+            self.assertEqual(
+                sorted(ctx['exec']), [('a0', 'a'), ('b0', 'b'), ('c0', 'c')]
+            )
+            self.assertLess(duration, 3 * DELAY)
+
+    def test_cheapest(self):
+
+        dispatcher = CheapestDispatcher(SyncSystem)
+
+        ctx, _ = self.run_until_complete(
+            arunplan(
+                [predicate('a0', 'a')], dispatcher=dispatcher,
+                ctx={'exec': []}, cache=self.plans
+            )
+        )
+
+        self.assertEqual(dispatcher.routed, ['a'])
+        self.assertEqual(ctx['exec'], [('a0', 'b')])
+
+    def test_dependencies(self):
+
+        func = TestFunction(
+            alias='parent',
+            params=[
+                TestFunction(alias='a', system='a'),
+                TestFunction(alias='b', system='b'),
+                TestFunction(alias='c', system='c')
+            ]
+        )
+
+        ctx, duration = self.run_until_complete(
+            arunplan(
+                [func], dispatcher=TestDispatcher(), ctx={'exec': []},
+                cache=self.plans
+            )
+        )
+
+        # the parent step runs after its params
+        self.assertEqual(
+            sorted(ctx['exec'][:2]), [('a', 'a'), ('b', 'b')]
+        )
+        self.assertEqual(ctx['exec'][2], ('parent', 'c'))
+        self.assertGreaterEqual(duration, 2 * DELAY)
+        self.assertLess(duration, 3 * DELAY)
+
+    def context(self, rows):
+
+        result = Context()
+        result['s'] = list(rows)
+
+        return result
+
+    def test_sameschema(self):
+
+        x = Expression(system='a', schema='s', prop='x')
+
+        def nodes():
+            return [LT(params=[x, 5]), GT(params=[x, 2])]
+
+        rows = [{'x': value} for value in range(10)]
+        dispatcher = TestDispatcher(FilterSystem)
+
+        ctx, _ = self.run_until_complete(
+            arunplan(
+                nodes(), dispatcher=dispatcher, ctx=self.context(rows),
+                cache=self.plans
+            )
+        )
+
+        syncctx = runplan(nodes(), dispatcher, self.context(rows), None)
+
+        self.assertEqual(ctx['s'], [{'x': 3}, {'x': 4}])
+        self.assertEqual(ctx['s'], syncctx['s'])
+
+    def test_requests(self):
+
+        dispatcher = TestDispatcher()
+
+        requests = [
+            Request(
+                dispatcher=dispatcher, nodes=[conjunction()],
+                ctx={'exec': []}, plans=self.plans
+            )
+            for _ in range(100)
+        ]
+
+        async def runall():
+
+            from asyncio import gather
+
+            return await gather(*[request.arun() for request in requests])
+
+        ctxs, duration = self.run_until_complete(runall())
+
+        self.assertEqual(len(ctxs), 100)
+        self.assertTrue(all(len(ctx['exec']) == 3 for ctx in ctxs))
+        self.assertLess(duration, 10 * DELAY)
+
+    def test_queue(self):
+
+        queue = RequestQueue(dispatcher=TestDispatcher(), plans=self.plans)
+
+        self.loop.run_until_complete(
+            queue.arun([predicate('a0', 'a')], ctx={'exec': []})
+        )
+        self.loop.run_until_complete(queue.arun([predicate('b0', 'b')]))
+
+        self.assertEqual(len(queue), 2)
+        self.assertEqual(queue.ctx['exec'], [('a0', 'a'), ('b0', 'b')])
+
+
+if __name__ == '__main__':
+    main()
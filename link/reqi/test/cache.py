@@ -0,0 +1,298 @@
+# -*- coding: utf-8 -*-
+
+# --------------------------------------------------------------------
+# The MIT License (MIT)
+#
+# Copyright (c) 2016 Jonathan Labéjof <jonathan.labejof@gmail.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+# --------------------------------------------------------------------
+
+
+
+from unittest import main
+
+from b3j0f.utils.ut import UTCase
+
+from ..cache import ResultCache, readschemas
+from ..request.crud import Create, Delete
+from ..request.expr.base import Expression
+from ..request.expr.func import Function
+from ..request.expr.num import LT
+from ..request.plan import runplan
+
+
+class CountSystem(object):
+
+    def __init__(self):
+
+        self.calls = 0
+
+    def run(self, nodes, dispatcher, ctx):
+
+        self.calls += 1
+
+        for node in nodes:
+            ctx[node.getctxname()] = [{'call': self.calls}]
+
+        return ctx
+
+
+class SchemaSystem(CountSystem):
+
+    def run(self, nodes, dispatcher, ctx):
+
+        self.calls += 1
+
+        for schema in readschemas(nodes):
+            ctx[schema] = [{'v': value} for value in range(4)]
+
+        return ctx
+
+
+class CacheDispatcher(object):
+
+    def __init__(self, cache, system=CountSystem):
+
+        self.system = system()
+        self.systems = {'s': self.system}
+        self.cache = cache
+
+
+def read(schema='a'):
+
+    return Function(
+        system='s', params=[Expression(system='s', schema=schema)]
+    )
+
+
+class KeyCache(ResultCache):
+    """Result cache which counts key computations."""
+
+    __slots__ = ['keys']
+
+    def __init__(self, *args, **kwargs):
+
+        super(KeyCache, self).__init__(*args, **kwargs)
+
+        self.keys = 0
+
+    def key(self, *args, **kwargs):
+
+        self.keys += 1
+
+        return super(KeyCache, self).key(*args, **kwargs)
+
+
+class Clock(object):
+
+    def __init__(self):
+
+        self.now = 0
+
+    def __call__(self):
+
+        return self.now
+
+
+class ResultCacheTest(UTCase):
+
+    def setUp(self):
+
+        self.clock = Clock()
+        self.cache = ResultCache(size=2, ttl=10, clock=self.clock)
+
+    def test_get(self):
+
+        self.assertIsNone(self.cache.get('key'))
+
+        self.cache.put('key', {'name': [1]})
+
+        self.assertEqual(self.cache.get('key'), {'name': [1]})
+        self.assertEqual(self.cache.stats.hits, 1)
+        self.assertEqual(self.cache.stats.misses, 1)
+
+    def test_copy(self):
+
+        self.cache.put('key', {'name': [1]})
+        self.cache.get('key')['name'].append(2)
+
+        self.assertEqual(self.cache.get('key'), {'name': [1]})
+
+    def test_lru(self):
+
+        for key in ['a', 'b']:
+            self.cache.put(key, {})
+
+        self.cache.get('a')
+        self.cache.put('c', {})
+
+        self.assertIsNone(self.cache.get('b'))
+        self.assertIsNotNone(self.cache.get('a'))
+        self.assertEqual(self.cache.stats.evictions, 1)
+
+    def test_ttl(self):
+
+        self.cache.put('key', {})
+        self.clock.now = 11
+
+        self.assertIsNone(self.cache.get('key'))
+        self.assertEqual(len(self.cache), 0)
+        self.assertEqual(self.cache.stats.evictions, 1)
+
+    def test_maxbytes(self):
+
+        cache = ResultCache(maxbytes=100)
+
+        self.assertFalse(cache.put('big', {'name': 'x' * 100}))
+
+        for key in range(10):
+            self.assertTrue(cache.put(key, {'name': 'x' * 10}))
+
+        self.assertLessEqual(cache.nbytes, 100)
+        self.assertLess(len(cache), 10)
+        self.assertIsNotNone(cache.get(9))
+
+    def test_unpicklable(self):
+
+        self.assertFalse(self.cache.put('key', {'name': lambda: None}))
+
+    def test_invalidate(self):
+
+        self.cache.put(('s', ()), {}, set(['a']))
+        self.cache.put(('s', (1,)), {}, None)
+
+        self.assertEqual(self.cache.invalidate(system='t', schema='a'), 0)
+        self.assertEqual(self.cache.invalidate(system='s', schema='b'), 1)
+        self.assertEqual(self.cache.invalidate(schema='a'), 1)
+        self.assertEqual(self.cache.stats.invalidations, 2)
+
+
+class ReadSchemasTest(UTCase):
+
+    def test_schemas(self):
+
+        self.assertEqual(readschemas([read('a'), read('b')]), set(['a', 'b']))
+
+    def test_unknown(self):
+
+        self.assertIsNone(readschemas([Expression(system='s')]))
+
+
+class DispatchCacheTest(UTCase):
+
+    def setUp(self):
+
+        self.dispatcher = CacheDispatcher(ResultCache())
+
+    def runnodes(self, *nodes):
+
+        return runplan(list(nodes), dispatcher=self.dispatcher, ctx={})
+
+    def test_hit(self):
+
+        first = self.runnodes(read())
+        second = self.runnodes(read())
+
+        self.assertEqual(self.dispatcher.system.calls, 1)
+        self.assertEqual(first, second)
+
+    def test_miss(self):
+
+        self.runnodes(read('a'))
+        self.runnodes(read('b'))
+
+        self.assertEqual(self.dispatcher.system.calls, 2)
+
+    def test_write(self):
+
+        self.runnodes(read('a'), read('b'))
+        self.runnodes(Delete(schema='a'))
+
+        self.assertEqual(len(self.dispatcher.cache), 1)
+
+        self.runnodes(read('a'), read('b'))
+
+        self.assertEqual(self.dispatcher.system.calls, 3)
+
+    def test_delegatedwrite(self):
+
+        for _ in range(2):
+            self.runnodes(Create(schema='a', content={'v': 1}, system='s'))
+
+        self.assertEqual(self.dispatcher.system.calls, 2)
+
+    def test_otherwrite(self):
+
+        self.runnodes(read('a'))
+        self.runnodes(Delete(schema='b'))
+        self.runnodes(read('a'))
+
+        self.assertEqual(self.dispatcher.system.calls, 1)
+
+
+class SchemaCacheTest(UTCase):
+
+    def setUp(self):
+
+        self.dispatcher = CacheDispatcher(ResultCache(), SchemaSystem)
+
+    def runnodes(self, ctx, *nodes):
+
+        return runplan(list(nodes), dispatcher=self.dispatcher, ctx=ctx)
+
+    def test_filter(self):
+
+        for _ in range(2):
+            ctx = self.runnodes(
+                {}, read(), LT(params=[Expression(schema='a', prop='v'), 2])
+            )
+
+            self.assertEqual(ctx['a'], [{'v': 0}, {'v': 1}])
+
+        self.assertEqual(self.dispatcher.system.calls, 1)
+        self.assertEqual(self.dispatcher.cache.stats.hits, 1)
+
+    def test_inputs(self):
+
+        self.runnodes({}, read())
+        self.runnodes({'a': [{'v': 0}]}, read())
+        self.runnodes({'a': [{'v': 0}]}, read())
+
+        self.assertEqual(self.dispatcher.system.calls, 2)
+
+    def test_keys(self):
+
+        self.dispatcher.cache = KeyCache()
+
+        for _ in range(2):
+            self.runnodes({'a': [{'v': 0}]}, read())
+
+        self.assertEqual(self.dispatcher.cache.keys, 2)
+        self.assertEqual(self.dispatcher.cache.stats.hits, 1)
+
+    def test_writekey(self):
+
+        node = Create(schema='a', content={'v': 1}, system='s')
+
+        self.assertIsNone(self.dispatcher.cache.key('s', [node], {}))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,174 @@
+# -*- coding: utf-8 -*-
+
+# --------------------------------------------------------------------
+# The MIT License (MIT)
+#
+# Copyright (c) 2016 Jonathan Labéjof <jonathan.labejof@gmail.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+# --------------------------------------------------------------------
+
+
+
+from unittest import main
+
+from b3j0f.utils.ut import UTCase
+
+from ..cost import CostModel, countrows
+
+
+class CostModelTest(UTCase):
+
+    def setUp(self):
+
+        self.cost = CostModel(alpha=0.5)
+
+    def test_unobserved(self):
+
+        self.assertEqual(self.cost.cost('system'), 0)
+
+    def test_ewma(self):
+
+        self.cost.observe('system', 1.)
+        self.cost.observe('system', 3.)
+
+        self.assertEqual(self.cost.stats('system').latency, 2.)
+
+    def test_rank(self):
+
+        self.cost.observe('slow', 2.)
+        self.cost.observe('fast', 1.)
+
+        self.assertEqual(
+            self.cost.rank(['slow', 'new', 'fast']), ['new', 'fast', 'slow']
+        )
+
+    def test_rows(self):
+
+        self.cost.observe('big', 1., rows=10 ** 7)
+        self.cost.observe('small', 1., rows=1)
+
+        self.assertEqual(self.cost.rank(['big', 'small']), ['small', 'big'])
+
+    def test_fail(self):
+
+        self.cost.observe('failing', 1.)
+        self.cost.fail('failing')
+        self.cost.observe('other', 1.)
+
+        self.assertEqual(
+            self.cost.rank(['failing', 'other']), ['other', 'failing']
+        )
+
+        stats = self.cost.stats('failing')
+
+        self.assertEqual(stats.calls, 2)
+        self.assertEqual(stats.failures, 1)
+
+    def test_measure(self):
+
+        result = self.cost.measure('system', lambda: {'a': [1, 2], 'b': None})
+
+        self.assertEqual(result, {'a': [1, 2], 'b': None})
+        self.assertEqual(self.cost.stats('system').rows, 2)
+
+    def test_measurefail(self):
+
+        def fail():
+            raise RuntimeError()
+
+        self.assertRaises(RuntimeError, self.cost.measure, 'system', fail)
+        self.assertEqual(self.cost.stats('system').failures, 1)
+
+
+class CallTest(CostModelTest):
+
+    def test_cheapest(self):
+
+        self.cost.observe('slow', 2.)
+
+        calls = []
+
+        self.cost.call(['slow', 'fast'], calls.append)
+
+        self.assertEqual(calls, ['fast'])
+
+    def test_fallback(self):
+
+        self.cost.observe('slow', 2.)
+
+        calls = []
+
+        def func(system):
+            calls.append(system)
+
+            if system == 'fast':
+                raise RuntimeError()
+
+            return system
+
+        self.assertEqual(self.cost.call(['slow', 'fast'], func), 'slow')
+        self.assertEqual(calls, ['fast', 'slow'])
+
+        self.assertEqual(self.cost.rank(['fast', 'slow']), ['slow', 'fast'])
+
+    def test_allfail(self):
+
+        def func(system):
+            raise RuntimeError(system)
+
+        self.assertRaises(RuntimeError, self.cost.call, ['a', 'b'], func)
+
+    def test_callnames(self):
+
+        def func(system):
+            return {'s': [1, 2], 'other': [3]}
+
+        self.cost.call(['a'], func, names=['s'])
+
+        self.assertEqual(self.cost.stats('a').rows, 2)
+
+    def test_nosystem(self):
+
+        self.assertRaises(ValueError, self.cost.call, [], None)
+
+
+class CountRowsTest(UTCase):
+
+    def test_ctx(self):
+
+        self.assertEqual(countrows({'a': [1], 'b': [2, 3], 'c': 4}), 3)
+
+    def test_names(self):
+
+        self.assertEqual(
+            countrows({'a': [1], 'b': [2, 3], 'c': 4}, names=['b', 'c']), 2
+        )
+
+    def test_list(self):
+
+        self.assertEqual(countrows([1, 2]), 2)
+
+    def test_other(self):
+
+        self.assertEqual(countrows(None), 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,149 @@
+# -*- coding: utf-8 -*-
+
+# --------------------------------------------------------------------
+# The MIT License (MIT)
+#
+# Copyright (c) 2016 Jonathan Labéjof <jonathan.labejof@gmail.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+# --------------------------------------------------------------------
+
+
+
+from unittest import main
+
+from b3j0f.utils.ut import UTCase
+
+from time import sleep
+
+from threading import Lock, Thread
+
+from ..executor import Executor, ThreadExecutor, AsyncioExecutor
+
+
+class ExecutorTest(UTCase):
+
+    executorcls = Executor
+
+    def setUp(self):
+
+        self.executor = self.executorcls(workers=2)
+
+    def tearDown(self):
+
+        self.executor.close()
+
+    def test_empty(self):
+
+        self.assertEqual(self.executor.map(lambda item: item, []), [])
+
+    def test_order(self):
+
+        items = list(range(6))
+
+        def func(item):
+            sleep(0.001 * (len(items) - item))
+            return item * 2
+
+        self.assertEqual(
+            self.executor.map(func, items), [item * 2 for item in items]
+        )
+
+    def test_bounded(self):
+
+        lock = Lock()
+        running = [0, 0]  # current and maximal number of running calls
+
+        def func(item):
+
+            with lock:
+                running[0] += 1
+                running[1] = max(running)
+
+            sleep(0.005)
+
+            with lock:
+                running[0] -= 1
+
+        self.executor.map(func, range(6))
+
+        self.assertLessEqual(running[1], self.executor.workers)
+
+    def test_concurrent(self):
+
+        results = {}
+
+        def call(index):
+            results[index] = self.executor.map(
+                lambda item: item + index, range(4)
+            )
+
+        threads = [Thread(target=call, args=(index,)) for index in range(4)]
+
+        for thread in threads:
+            thread.start()
+
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(
+            results,
+            dict(
+                (index, [item + index for item in range(4)])
+                for index in range(4)
+            )
+        )
+
+    def test_nested(self):
+
+        def func(item):
+            return sum(self.executor.map(lambda value: value * item, [1, 2]))
+
+        self.assertEqual(self.executor.map(func, range(4)), [0, 3, 6, 9])
+
+
+class ThreadExecutorTest(ExecutorTest):
+
+    executorcls = ThreadExecutor
+
+
+class AsyncioExecutorTest(ExecutorTest):
+
+    executorcls = AsyncioExecutor
+
+    def test_runningloop(self):
+
+        from asyncio import new_event_loop
+
+        loop = new_event_loop()
+        results = []
+
+        def call():  # executed by the running loop
+            results.append(self.executor.map(lambda item: item, [1, 2]))
+            loop.stop()
+
+        loop.call_soon(call)
+        loop.run_forever()
+        loop.close()
+
+        self.assertEqual(results, [[1, 2]])
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,158 @@
+# -*- coding: utf-8 -*-
+
+# --------------------------------------------------------------------
+# The MIT License (MIT)
+#
+# Copyright (c) 2016 Jonathan Labéjof <jonathan.labejof@gmail.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+# --------------------------------------------------------------------
+
+
+
+from unittest import main
+
+from b3j0f.utils.ut import UTCase
+
+from ..routing import RoutingIndex
+
+
+class RoutingIndexTest(UTCase):
+
+    def setUp(self):
+
+        self.index = RoutingIndex()
+
+        self.count = 5
+
+        for i in range(self.count):
+            for j in range(self.count):
+                self.index.register(
+                    str(i), str(j), ['id'] + [str(k) for k in range(j)]
+                )
+
+    def test_register(self):
+
+        self.assertEqual(
+            self.index.systems, [str(i) for i in range(self.count)]
+        )
+        self.assertEqual(
+            self.index.schemas, [str(i) for i in range(self.count)]
+        )
+
+    def test_registertwice(self):
+
+        self.index.register('0', '0', ['id'])
+
+        self.assertEqual(len(self.index.systems), self.count)
+        self.assertEqual(len(self.index.schemas), self.count)
+
+    def test_schemasofprop(self):
+
+        mask = self.index.schemasofprop('3')
+
+        self.assertEqual(self.index.schemanames(mask), ['4'])
+
+    def test_decodeorder(self):
+
+        mask = self.index.systemsmask(['3', '1'])
+
+        self.assertEqual(self.index.systemnames(mask), ['1', '3'])
+        self.assertEqual(
+            self.index.systemnames(mask, order=['3', '1', '3']), ['3', '1']
+        )
+
+    def test_unknown(self):
+
+        self.assertRaises(KeyError, self.index.systemsmask, ['unknown'])
+
+
+class ResolveTest(RoutingIndexTest):
+
+    def test_default(self):
+
+        systems, schemas = self.index.resolve()
+
+        self.assertEqual(systems, [str(i) for i in range(self.count)])
+        self.assertEqual(schemas, [str(i) for i in range(self.count)])
+
+    def test_defaultsystems(self):
+
+        systems, schemas = self.index.resolve(defsystems=['2', '3', '2'])
+
+        self.assertEqual(systems, ['2', '3'])
+        self.assertEqual(schemas, [str(i) for i in range(self.count)])
+
+    def test_defaultschemas(self):
+
+        systems, schemas = self.index.resolve(defschemas=['3', '2'])
+
+        self.assertEqual(systems, [str(i) for i in range(self.count)])
+        self.assertEqual(schemas, ['3', '2'])
+
+    def test_system(self):
+
+        self.index.register('other', 'other')
+
+        systems, schemas = self.index.resolve(system='other')
+
+        self.assertEqual(systems, ['other'])
+        self.assertEqual(schemas, ['other'])
+
+    def test_schema(self):
+
+        self.index.register('other', 'other')
+
+        systems, schemas = self.index.resolve(schema='other')
+
+        self.assertEqual(systems, ['other'])
+        self.assertEqual(schemas, ['other'])
+
+    def test_systemandschema(self):
+
+        systems, schemas = self.index.resolve(system='1', schema='2')
+
+        self.assertEqual(systems, ['1'])
+        self.assertEqual(schemas, ['2'])
+
+    def test_prop(self):
+
+        systems, schemas = self.index.resolve(prop='2')
+
+        self.assertEqual(systems, [str(i) for i in range(self.count)])
+        self.assertEqual(schemas, ['3', '4'])
+
+    def test_propdefschemas(self):
+
+        systems, schemas = self.index.resolve(prop='2', defschemas=['0', '4'])
+
+        self.assertEqual(schemas, ['4'])
+
+    def test_propsystem(self):
+
+        self.index.register('other', 'other', ['2'])
+
+        systems, schemas = self.index.resolve(system='other', prop='2')
+
+        self.assertEqual(systems, ['other'])
+        self.assertEqual(schemas, ['other'])
+
+
+if __name__ == '__main__':
+    main()
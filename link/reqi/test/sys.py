@@ -31,9 +31,14 @@ from unittest import main
 from b3j0f.utils.ut import UTCase
 from b3j0f.schema import getschema
 
-from ..sys import System
+from ..sys import System, PARTIAL
 from ..dim.base import Dimension
 from ..request.base import Node, ALIAS
+from ..request.expr.base import Expression
+from ..request.expr.agg import Sum, First
+from ..request.expr.group import Or
+from ..request.expr.num import LT, GT
+from ..request.groupby import COMBINERS
 
 
 class TestSystem(System):
@@ -81,5 +86,173 @@ class SystemTest(UTCase):
         self.assertEqual(ctx, {'1': [nodes[0]], '2': [nodes[1]]})
 
 
+class ReadSystem(System):
+
+    def __init__(self, *args, **kwargs):
+
+        super(ReadSystem, self).__init__(
+            model=None, querymanager=None, *args, **kwargs
+        )
+
+        self.reads = []
+        self.groups = []
+        self.sorts = []
+
+    def read(self, schema, predicates, group=None, **kwargs):
+
+        self.reads.append((schema, predicates))
+        self.groups.append(group)
+        self.sorts.append(kwargs)
+
+        if group is None:
+            result = [{'x': 3}, {'x': 4}]
+
+        elif group.get('partial'):
+            result = [{PARTIAL: 7}]
+
+        else:
+            result = [{'x': 3, 'count': 2}, {'x': 4, 'count': 1}]
+
+        return result
+
+
+class PushDownTest(UTCase):
+
+    def setUp(self):
+
+        self.system = ReadSystem()
+        self.x = Expression(schema='schema', prop='x')
+
+    def test_read(self):
+
+        predicates = [LT(params=[self.x, 5]), GT(params=[self.x, 2])]
+
+        ctx = self.system.run(nodes=predicates, dispatcher=None, ctx={})
+
+        self.assertEqual(self.system.reads, [('schema', predicates)])
+        self.assertEqual(ctx['schema'], [{'x': 3}, {'x': 4}])
+
+    def test_inmemory(self):
+
+        ctx = {'schema': [{'x': 1}, {'x': 3}, {'x': 4}]}
+
+        ctx = self.system.run(
+            nodes=[GT(params=[self.x, 2]), LT(params=[self.x, 4])],
+            dispatcher=None, ctx=ctx
+        )
+
+        self.assertFalse(self.system.reads)
+        self.assertEqual(ctx['schema'], [{'x': 3}])
+
+
+    def test_runbatch(self):
+
+        lt, gt = LT(params=[self.x, 4]), GT(params=[self.x, 3])
+
+        ctxs = self.system.runbatch(
+            batches=[([lt], {}), ([gt], {})], dispatcher=None
+        )
+
+        # one read of both requests
+        self.assertEqual(len(self.system.reads), 1)
+
+        schema, (union,) = self.system.reads[0]
+
+        self.assertEqual(schema, 'schema')
+        self.assertIsInstance(union, Or)
+        self.assertEqual(union.params, [lt, gt])
+        self.assertEqual(
+            [ctx['schema'] for ctx in ctxs], [[{'x': 3}], [{'x': 4}]]
+        )
+
+    def test_rungroup(self):
+
+        predicate = GT(params=[self.x, 2])
+
+        ctx = self.system.rungroup(
+            nodes=[Expression(schema='schema'), predicate], groupby=['x'],
+            aggregates=[('count', COMBINERS['count'], None)],
+            dispatcher=None, ctx={}
+        )
+
+        self.assertEqual(self.system.reads, [('schema', [predicate])])
+        self.assertEqual(ctx, {'x': [3, 4], 'count': [2, 1]})
+
+    def test_runsort(self):
+
+        predicate = LT(params=[self.x, 5])
+
+        ctx = self.system.runsort(
+            nodes=[self.x, predicate], sort=[('x', -1)], offset=1, limit=2,
+            dispatcher=None, ctx={}
+        )
+
+        self.assertEqual(self.system.reads, [('schema', [predicate])])
+        self.assertEqual(
+            self.system.sorts, [{'sort': [('x', -1)], 'skip': 1, 'limit': 2}]
+        )
+        self.assertEqual(ctx['schema'], [{'x': 3}, {'x': 4}])
+        self.assertIs(ctx[self.x.getctxname()], ctx['schema'])
+
+    def test_runsortinmemory(self):
+
+        ctx = self.system.runsort(
+            nodes=[self.x], sort=[('x', -1)], offset=0, limit=None,
+            dispatcher=None, ctx={'schema': []}
+        )
+
+        self.assertIsNone(ctx)
+        self.assertEqual(self.system.reads, [])
+
+    def test_runpartial(self):
+
+        node = Sum(params=[self.x])
+
+        state = self.system.runpartial(
+            node=node, expr=self.x, dispatcher=None, ctx={}
+        )
+
+        self.assertEqual(state, 7)
+        self.assertEqual(
+            self.system.groups,
+            [
+                {
+                    'groupby': [], 'partial': True,
+                    'aggregates': [(PARTIAL, node.combiner, 'x')]
+                }
+            ]
+        )
+
+    def test_runpartialinmemory(self):
+
+        node = First(params=[self.x])
+
+        state = self.system.runpartial(
+            node=node, expr=self.x, dispatcher=None, ctx={}
+        )
+
+        self.assertEqual(state, (3,))
+        self.assertEqual(self.system.groups, [None])
+
+    def test_rungroupinmemory(self):
+
+        nodes = [Expression(schema='schema')]
+        aggregates = [('first', COMBINERS['first'], 'x')]
+
+        self.assertIsNone(
+            self.system.rungroup(
+                nodes=nodes, groupby=['x'], aggregates=aggregates,
+                dispatcher=None, ctx={}
+            )
+        )
+        self.assertIsNone(
+            self.system.rungroup(
+                nodes=nodes, groupby=['x'], aggregates=[],
+                dispatcher=None, ctx={'schema': []}
+            )
+        )
+        self.assertFalse(self.system.reads)
+
+
 if __name__ == '__main__':
     main()